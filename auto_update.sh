@@ -2,4 +2,7 @@
 cd /home/Coimpre/coimpres_cuba
 git fetch origin
 git reset --hard origin/main
+python manage.py clear_page_cache
 touch /var/www/coimpre_pythonanywhere_com_wsgi.py
+# El worker de la cola (always-on task, ver BACKGROUND_JOBS.md) se reinicia con el código nuevo
+pkill -f "manage.py run_jobs" || true
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coimpres_cuba.settings')
+# Vistas públicas asíncronas y middleware sin WhiteNoise (ver ASGI_DEPLOYMENT.md)
+os.environ.setdefault('ASYNC_PUBLIC_VIEWS', 'true')
 
 application = get_asgi_application()
@@ -0,0 +1,121 @@
+# coimpres_cuba/database.py
+# Perfiles de conexión a la base de datos, elegidos con la variable DB_PROFILE
+#
+#   sqlite    (por defecto) archivo local con WAL: las lecturas no esperan a las
+#             escrituras (subidas del panel) y cada transacción de escritura
+#             toma el bloqueo al empezar (BEGIN IMMEDIATE) en vez de fallar a mitad
+#   postgres  PostgreSQL con pool de conexiones (psycopg 3 + psycopg_pool)
+#             comprobadas antes de entregarse; o conexiones persistentes con
+#             health checks si POSTGRES_POOL=false
+#
+# Réplicas de solo lectura (alias replica_1, replica_2...; ver db_router.py):
+#   SQLITE_REPLICA_PATHS=/ruta/a.sqlite3,/ruta/b.sqlite3  (manage.py sync_sqlite_replicas)
+#   POSTGRES_REPLICA_HOSTS=replica1:5432,replica2
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # pragma: no cover - solo hace falta con DB_PROFILE=postgres
+    ConnectionPool = None
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+# =================== SQLITE ===================
+
+def sqlite_pragmas():
+    """PRAGMAs que se ejecutan al abrir cada conexión (ajustables por entorno)"""
+    return [
+        'PRAGMA journal_mode=WAL',
+        # Con WAL, NORMAL solo sincroniza en los checkpoints: seguro ante caídas del proceso
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)}',
+        f'PRAGMA mmap_size={env_int("SQLITE_MMAP_SIZE_MB", 256) * 1024 * 1024}',
+        # Negativo: en KiB (por conexión)
+        f'PRAGMA cache_size=-{env_int("SQLITE_CACHE_SIZE_MB", 32) * 1024}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def sqlite_profile(base_dir, path=None):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path or os.environ.get('SQLITE_PATH', os.path.join(base_dir, 'db.sqlite3')),
+    }
+    # SQLITE_TUNING=false: SQLite sin ajustar (para comparar con el benchmark)
+    if env_bool('SQLITE_TUNING', True):
+        config['OPTIONS'] = {
+            'init_command': '; '.join(sqlite_pragmas()),
+            'transaction_mode': 'IMMEDIATE',
+        }
+    return config
+
+
+# =================== POSTGRESQL ===================
+
+def postgres_profile(host=None):
+    host, _, port = (host or '').partition(':')
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'coimpres_cuba'),
+        'USER': os.environ.get('POSTGRES_USER', 'coimpres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': host or os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': port or os.environ.get('POSTGRES_PORT', '5432'),
+        # Comprueba la conexión reutilizada al empezar cada petición
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if env_bool('POSTGRES_POOL', True):
+        pool = {
+            'min_size': env_int('POSTGRES_POOL_MIN', 2),
+            'max_size': env_int('POSTGRES_POOL_MAX', 10),
+            'timeout': env_int('POSTGRES_POOL_TIMEOUT', 10),  # segundos esperando una conexión libre
+            'max_idle': env_int('POSTGRES_POOL_MAX_IDLE', 300),
+        }
+        if ConnectionPool is not None:
+            # Cada conexión se prueba antes de entregarla (descarta las cortadas por el servidor)
+            pool['check'] = ConnectionPool.check_connection
+        config['OPTIONS']['pool'] = pool
+        # Con pool, Django devuelve la conexión al pool al acabar cada petición
+        config['CONN_MAX_AGE'] = 0
+    else:
+        config['CONN_MAX_AGE'] = env_int('POSTGRES_CONN_MAX_AGE', 600)
+    return config
+
+
+PROFILES = {
+    'sqlite': sqlite_profile,
+    'postgres': postgres_profile,
+}
+
+
+def env_list(name):
+    return [item.strip() for item in os.environ.get(name, '').split(',') if item.strip()]
+
+
+def database_config(base_dir):
+    """DATABASES según DB_PROFILE: 'default' (primaria) y las réplicas configuradas"""
+    profile = os.environ.get('DB_PROFILE', 'sqlite').lower()
+    if profile == 'sqlite':
+        databases = {'default': sqlite_profile(base_dir)}
+        replicas = [sqlite_profile(base_dir, path) for path in env_list('SQLITE_REPLICA_PATHS')]
+    elif profile == 'postgres':
+        databases = {'default': postgres_profile()}
+        replicas = [postgres_profile(host) for host in env_list('POSTGRES_REPLICA_HOSTS')]
+    else:
+        raise ImproperlyConfigured(f'DB_PROFILE desconocido: {profile!r} (usa {", ".join(PROFILES)})')
+
+    for number, replica in enumerate(replicas, start=1):
+        # En los tests las réplicas apuntan a la base de datos de test de la primaria
+        replica['TEST'] = {'MIRROR': 'default'}
+        databases[f'replica_{number}'] = replica
+    return databases
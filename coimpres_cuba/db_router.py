@@ -0,0 +1,80 @@
+# coimpres_cuba/db_router.py
+# Lecturas en réplicas, escrituras en la primaria
+#
+# Solo las peticiones públicas de lectura (GET / HEAD fuera del panel) leen de
+# las réplicas (DATABASE_REPLICAS). Todo lo demás va a la primaria ('default'):
+# el panel, el admin de Django, los POST, los comandos y los hilos en segundo
+# plano. En cuanto una petición escribe, el resto de sus lecturas también van a
+# la primaria, y la respuesta deja una cookie que fija la primaria durante
+# REPLICA_READ_YOUR_WRITES_SECONDS: quien acaba de escribir ve su cambio
+# aunque la réplica vaya con retraso.
+#
+# Lo que se guarda en las cachés versionadas (páginas, facetas, portada,
+# directorio de proveedores) se lee siempre de la primaria (primary_reads):
+# las señales suben la versión al confirmar en la primaria, y una réplica con
+# retraso dejaría datos viejos guardados bajo la versión nueva hasta el
+# siguiente cambio.
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+
+class RoutingState:
+    """Estado del enrutado durante una petición (ver PrimaryReplicaMiddleware)"""
+
+    def __init__(self, allow_replica):
+        self.allow_replica = allow_replica
+        self.wrote = False
+        self.replica = None
+
+
+# Sin petición en curso (comandos, hilos en segundo plano): siempre la primaria
+routing_state = contextvars.ContextVar('routing_state', default=None)
+
+
+@contextmanager
+def primary_reads():
+    """Las lecturas del bloque van a la primaria (para rellenar cachés versionadas)"""
+    state = routing_state.get()
+    if state is None or not state.allow_replica:
+        yield
+        return
+    state.allow_replica = False
+    try:
+        yield
+    finally:
+        state.allow_replica = True
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or not state.allow_replica or state.wrote:
+            return PRIMARY
+        if state.replica is None:
+            # Una sola réplica por petición: lecturas coherentes entre sí
+            replicas = replica_aliases()
+            state.replica = random.choice(replicas) if replicas else PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases de datos tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas se copian de la primaria (replicación o sync_sqlite_replicas)
+        return db == PRIMARY
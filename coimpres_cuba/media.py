@@ -0,0 +1,164 @@
+# coimpres_cuba/media.py
+# Servidor de archivos media para producción (videos, fichas técnicas, catálogos PDF)
+#
+# - ETag / Last-Modified y 304
+# - Rangos HTTP (206) para que los videos se puedan adelantar sin descargarlos enteros
+# - Si hay un proxy delante, le delega el envío (MEDIA_OFFLOAD):
+#     'x-accel-redirect'  nginx:   location /protected-media/ { internal; alias /ruta/a/media/; }
+#     'x-sendfile'        apache (mod_xsendfile) / lighttpd
+# - Sin proxy, el archivo se entrega con wsgi.file_wrapper, que gunicorn envía con
+#   sendfile() (sin copiar el contenido por Python), también para los rangos
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Archivo limitado a un rango de bytes. Expone fileno() para que el servidor
+    pueda usar sendfile() desde la posición actual y con el Content-Length del rango.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_validators(stat):
+    """(etag, last_modified) a partir del tamaño y la fecha de modificación"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', int(stat.st_mtime)
+
+
+def parse_range(header, size):
+    """
+    (inicio, fin) inclusivos de un Range de un solo tramo, o None si no es válido
+    o tiene varios tramos (entonces se sirve el archivo completo).
+    Lanza ValueError si el rango no se puede satisfacer.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: los últimos N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Rango vacío')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Rango fuera del archivo')
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """If-Range: el rango solo se aplica si el cliente tiene la versión actual"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def offload_response(full_path, relative_path, content_type):
+    """Respuesta vacía con la cabecera para que el proxy envíe el archivo"""
+    mode = getattr(settings, 'MEDIA_OFFLOAD', '')
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + relative_path
+    else:
+        response['X-Sendfile'] = full_path
+    # El proxy calcula la longitud y atiende los rangos
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Sirve un archivo de MEDIA_ROOT con validadores, rangos y envío sin copia"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Archivo no encontrado')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Archivo no encontrado')
+    if not os.path.isfile(full_path):
+        raise Http404('Archivo no encontrado')
+
+    etag, last_modified = file_validators(stat)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if encoding or not content_type:
+        # Un .tar.gz se descarga tal cual: sin Content-Encoding el navegador no lo descomprime
+        content_type = 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response(request, full_path, path, stat.st_size, content_type, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_MAX_AGE', 60 * 60 * 24))
+    return response
+
+
+def build_response(request, full_path, relative_path, size, content_type, etag, last_modified):
+    if getattr(settings, 'MEDIA_OFFLOAD', ''):
+        return offload_response(full_path, relative_path, content_type)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = str(size)
+        return response
+
+    if byte_range is None:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = FileResponse(RangeFile(open(full_path, 'rb'), start, length), content_type=content_type, status=206)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
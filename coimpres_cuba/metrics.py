@@ -0,0 +1,311 @@
+# coimpres_cuba/metrics.py
+# Métricas de rendimiento por vista (latencia y consultas SQL)
+#
+# Cada proceso (worker de gunicorn) acumula sus histogramas en memoria y los
+# vuelca cada METRICS_FLUSH_INTERVAL segundos a METRICS_DIR/<pid>-<arranque>.json.
+# El endpoint de métricas suma los archivos de todos los workers.
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+
+# Límites superiores de los buckets (el último bucket, +Inf, es implícito)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+PROMETHEUS_PREFIX = 'coimpre'
+
+_BOOT = int(time.time())
+
+# Tiempos de la petición en curso (por hilo / tarea)
+current_timings = contextvars.ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Tiempos acumulados durante una petición, en milisegundos"""
+
+    def __init__(self):
+        self.db_ms = 0.0
+        self.queries = 0
+        self.template_ms = 0.0
+        self.context_processors_ms = 0.0
+        self.template_depth = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (perf_counter() - start) * 1000
+            self.queries += 1
+
+    def server_timing(self, total_ms):
+        """Valor de la cabecera Server-Timing"""
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={max(self.template_ms - self.context_processors_ms, 0):.1f};desc="templates"',
+            f'cp;dur={self.context_processors_ms:.1f};desc="context processors"',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+
+# =================== INSTRUMENTACIÓN DE PLANTILLAS ===================
+
+_installed = False
+
+
+def install_template_timers():
+    """Mide el render de plantillas y los context processors (una sola vez por proceso)"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from django.template.backends.django import Template as BackendTemplate
+    from django.template.context import RequestContext
+
+    original_render = BackendTemplate.render
+    original_bind_template = RequestContext.bind_template
+
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return original_render(self, context, request)
+        # Solo la plantilla más externa: los include anidados ya están dentro
+        timings.template_depth += 1
+        start = perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            timings.template_depth -= 1
+            if timings.template_depth == 0:
+                timings.template_ms += (perf_counter() - start) * 1000
+
+    @contextmanager
+    def bind_template(self, template):
+        timings = current_timings.get()
+        start = perf_counter()
+        with original_bind_template(self, template):
+            if timings is not None:
+                timings.context_processors_ms += (perf_counter() - start) * 1000
+            yield
+
+    BackendTemplate.render = render
+    RequestContext.bind_template = bind_template
+
+    # Las conexiones que se abran después (p. ej. en el hilo de la base de datos
+    # de las vistas asíncronas) también se miden
+    from django.db.backends.signals import connection_created
+    connection_created.connect(add_db_timer, dispatch_uid='coimpres_cuba.metrics.db_timer')
+
+
+# =================== INSTRUMENTACIÓN DE CONSULTAS ===================
+
+def db_timer(execute, sql, params, many, context):
+    """Execute wrapper permanente: suma la consulta a los tiempos de la petición en curso"""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.db_wrapper(execute, sql, params, many, context)
+
+
+def add_db_timer(connection, **kwargs):
+    if db_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_timer)
+
+
+# =================== HISTOGRAMAS ===================
+
+class Histogram:
+    def __init__(self, bounds, counts=None, total=0.0):
+        self.bounds = tuple(bounds)
+        self.counts = list(counts) if counts else [0] * (len(self.bounds) + 1)
+        self.total = total
+
+    def observe(self, value):
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def quantile(self, q):
+        """Estimación del cuantil: límite superior del bucket que lo contiene"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (None,), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound if bound is not None else self.bounds[-1]
+        return None
+
+    def to_dict(self):
+        return {'counts': self.counts, 'sum': self.total}
+
+    @classmethod
+    def from_dict(cls, bounds, data):
+        return cls(bounds, data['counts'], data['sum'])
+
+
+class MetricsRegistry:
+    """Histogramas de latencia y consultas por (vista, método) de este proceso"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_flush = 0.0
+
+    def observe(self, view, method, duration_ms, queries):
+        with self.lock:
+            metrics = self.views.get((view, method))
+            if metrics is None:
+                metrics = self.views[(view, method)] = {
+                    'latency_ms': Histogram(LATENCY_BUCKETS_MS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                }
+            metrics['latency_ms'].observe(duration_ms)
+            metrics['queries'].observe(queries)
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {
+                    'view': view,
+                    'method': method,
+                    'latency_ms': metrics['latency_ms'].to_dict(),
+                    'queries': metrics['queries'].to_dict(),
+                }
+                for (view, method), metrics in self.views.items()
+            ]
+
+    def flush(self, force=False):
+        """Vuelca el snapshot del proceso a METRICS_DIR (como mucho cada METRICS_FLUSH_INTERVAL)"""
+        now = time.monotonic()
+        if not force and now - self.last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            return
+        self.last_flush = now
+        directory = metrics_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'{os.getpid()}-{_BOOT}.json')
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, True)
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', os.path.join(settings.BASE_DIR, 'cache', 'metrics'))
+
+
+# =================== AGREGACIÓN ENTRE WORKERS ===================
+
+def collect_metrics():
+    """Suma los histogramas de todos los workers: {(vista, método): {...}}"""
+    registry.flush(force=True)
+    directory = metrics_dir()
+    retention = getattr(settings, 'METRICS_RETENTION', 60 * 60 * 24)
+    merged = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            # Workers que ya no escriben (reinicios antiguos)
+            if time.time() - os.path.getmtime(path) > retention:
+                os.remove(path)
+                continue
+            with open(path) as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for entry in entries:
+            latency = Histogram.from_dict(LATENCY_BUCKETS_MS, entry['latency_ms'])
+            queries = Histogram.from_dict(QUERY_BUCKETS, entry['queries'])
+            key = (entry['view'], entry['method'])
+            if key in merged:
+                merged[key]['latency_ms'].merge(latency)
+                merged[key]['queries'].merge(queries)
+            else:
+                merged[key] = {'latency_ms': latency, 'queries': queries}
+    return merged
+
+
+def metrics_summary(merged):
+    """Resumen legible (JSON) con percentiles estimados por vista"""
+    summary = []
+    for (view, method), metrics in sorted(merged.items()):
+        latency, queries = metrics['latency_ms'], metrics['queries']
+        summary.append({
+            'view': view,
+            'method': method,
+            'requests': latency.count,
+            'latency_ms': {
+                'mean': round(latency.total / latency.count, 2) if latency.count else None,
+                'p50': latency.quantile(0.5),
+                'p95': latency.quantile(0.95),
+                'p99': latency.quantile(0.99),
+                'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ['+Inf'], latency.counts)),
+            },
+            'queries': {
+                'mean': round(queries.total / queries.count, 2) if queries.count else None,
+                'p95': queries.quantile(0.95),
+                'buckets': dict(zip([str(b) for b in QUERY_BUCKETS] + ['+Inf'], queries.counts)),
+            },
+        })
+    return summary
+
+
+def _prometheus_histogram(lines, name, help_text, merged, key, scale=1.0):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (view, method), metrics in sorted(merged.items()):
+        histogram = metrics[key]
+        labels = f'view="{view}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound * scale:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.total * scale:g}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+def prometheus_text(merged):
+    """Formato de exposición de texto de Prometheus"""
+    lines = []
+    _prometheus_histogram(
+        lines, f'{PROMETHEUS_PREFIX}_request_duration_seconds',
+        'Latencia de las peticiones por vista', merged, 'latency_ms', scale=0.001,
+    )
+    _prometheus_histogram(
+        lines, f'{PROMETHEUS_PREFIX}_request_queries',
+        'Consultas SQL por petición y vista', merged, 'queries',
+    )
+    return '\n'.join(lines) + '\n'
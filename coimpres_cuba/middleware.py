@@ -1,37 +1,158 @@
 # coimpres_cuba/middleware.py
 # Middleware para optimizar rendimiento y simular beneficios HTTP/2
+import time
+from contextlib import contextmanager
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .db_router import RoutingState, replica_aliases, routing_state
+from .metrics import RequestTimings, add_db_timer, current_timings, install_template_timers, registry
+
+
+def view_label(request):
+    """Nombre de la vista para las métricas (nunca la URL, para no disparar la cardinalidad)"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unresolved'
+
 
 class PerformanceMiddleware:
     """
-    Middleware para agregar headers de rendimiento 
+    Middleware para agregar headers de rendimiento
     que mejoran el score de Lighthouse
+
+    Además mide cada petición: tiempo y número de consultas SQL, render de
+    plantillas y context processors. Lo envía en la cabecera Server-Timing y
+    lo acumula en los histogramas por vista (coimpres_cuba/metrics.py).
     """
-    
+
+    # Con ASGI la cadena de middleware se ejecuta en el bucle de eventos
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_template_timers()
+
+    @contextmanager
+    def measure(self):
+        """Mide la petición: produce los RequestTimings y al salir les añade total_ms"""
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = perf_counter()
+        try:
+            # current_timings se copia con el contexto a los hilos de sync_to_async
+            for connection in connections.all():
+                add_db_timer(connection)
+            yield timings
+        finally:
+            current_timings.reset(token)
+        timings.total_ms = (perf_counter() - start) * 1000
+
     def __call__(self, request):
-        response = self.get_response(request)
-        
+        if self.async_mode:
+            return self.__acall__(request)
+        with self.measure() as timings:
+            response = self.get_response(request)
+        return self.process_response(request, response, timings)
+
+    async def __acall__(self, request):
+        with self.measure() as timings:
+            response = await self.get_response(request)
+        return self.process_response(request, response, timings)
+
+    def process_response(self, request, response, timings):
+        total_ms = timings.total_ms
+        response['Server-Timing'] = timings.server_timing(total_ms)
+        registry.observe(view_label(request), request.method, total_ms, timings.queries)
+        registry.flush()
+
         # Headers de seguridad y rendimiento
         response['X-Content-Type-Options'] = 'nosniff'
-        response['X-Frame-Options'] = 'DENY' 
+        response['X-Frame-Options'] = 'DENY'
         response['X-XSS-Protection'] = '1; mode=block'
         response['Referrer-Policy'] = 'strict-origin-when-cross-origin'
         response['Permissions-Policy'] = 'camera=(), microphone=(), geolocation=()'
-        
+
         # Headers que simulan multiplexación HTTP/2
         if request.path.startswith('/static/'):
             response['Cache-Control'] = 'public, max-age=31536000, immutable'
-            response['Vary'] = 'Accept-Encoding'
-        
+            patch_vary_headers(response, ['Accept-Encoding'])
+
         # Header para indicar soporte de compresión (similar a HTTP/2)
+        # (sin pisar el Vary: Cookie de la sesión, del que depende el idioma)
         if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
-            response['Vary'] = 'Accept-Encoding'
-        
+            patch_vary_headers(response, ['Accept-Encoding'])
+
         # Server Push hints (preparación para HTTP/2)
         if request.path == '/':
             # Preload critical resources
             response['Link'] = '</static/css/styles.css>; rel=preload; as=style, </static/js/main.js>; rel=preload; as=script'
-        
-        return response
\ No newline at end of file
+
+        return response
+
+
+class PrimaryReplicaMiddleware:
+    """
+    Decide si la petición puede leer de las réplicas (coimpres_cuba/db_router.py)
+    y, si ha escrito, fija la primaria para las siguientes peticiones del cliente.
+    """
+
+    COOKIE_NAME = 'primary_until'
+    PRIMARY_PATHS = ('/admin/', '/productos/admin/', '/productos/secret-admin-login/')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def allow_replica(self, request):
+        if not replica_aliases() or request.method not in ('GET', 'HEAD'):
+            return False
+        if request.path.startswith(self.PRIMARY_PATHS):
+            return False
+        try:
+            pinned_until = int(request.COOKIES.get(self.COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+        return pinned_until <= time.time()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(self.allow_replica(request))
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin_primary(state, response)
+
+    async def __acall__(self, request):
+        # El estado se copia al hilo de cada sync_to_async junto con el contexto
+        state = RoutingState(self.allow_replica(request))
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin_primary(state, response)
+
+    def pin_primary(self, state, response):
+        if state.wrote and replica_aliases():
+            window = getattr(settings, 'REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+            response.set_cookie(
+                self.COOKIE_NAME, str(int(time.time()) + window),
+                max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
@@ -82,14 +82,36 @@ WSGI_APPLICATION = 'coimpres_cuba.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Perfil por entorno: DB_PROFILE=sqlite (WAL y pragmas) o DB_PROFILE=postgres (pool)
+# Ver coimpres_cuba/database.py
 
-DATABASES = {
+from coimpres_cuba.database import database_config  # noqa: E402
+
+DATABASES = database_config(BASE_DIR)
+
+# Lecturas públicas en las réplicas (coimpres_cuba/db_router.py)
+DATABASE_ROUTERS = ['coimpres_cuba.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10))
+
+
+# Cache
+# Compartida entre los workers de gunicorn (facetas, páginas del catálogo...).
+# Se puede cambiar por entorno, p. ej. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
 
+# Caché de páginas públicas (productos/page_cache.py). Se invalida por señales y al desplegar
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,11 +159,52 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de media en producción (coimpres_cuba/media.py). Con un proxy delante:
+# MEDIA_OFFLOAD='x-accel-redirect' (nginx, location interna MEDIA_ACCEL_PREFIX) o 'x-sendfile'
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Hilos por proceso para generar las variantes responsive de las imágenes subidas
+IMAGE_RENDITION_WORKERS = int(os.environ.get('IMAGE_RENDITION_WORKERS', 2))
+
+# Productos relacionados precalculados (productos/related.py, requiere NumPy)
+RELATED_PRODUCTS_TOP_N = 8
+RELATED_PRODUCTS_AUTO_REFRESH = True  # actualización incremental al guardar productos (cola de trabajos)
+RELATED_PRODUCTS_REFRESH_DELAY = 60  # segundos para acumular cambios en una sola actualización
+
+# Sitemaps pregenerados (productos/sitemap_files.py)
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'cache', 'sitemaps')
+SITEMAP_SHARD_SIZE = 5000  # URLs por archivo
+SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL', '')  # vacío: el host de la primera petición (configurar en producción)
+SITEMAP_BACKGROUND_REBUILD = True
+
+# SKU automáticos (productos/sku.py): números reservados por bloque en cada worker
+SKU_BLOCK_SIZE = 20
+
+# Subidas por partes de la galería (productos/uploads.py)
+UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024  # bytes por parte
+UPLOAD_MAX_SIZE = 1024 ** 3  # 1 GB por archivo
+UPLOAD_EXPIRY_HOURS = 24  # las subidas sin partes nuevas se eliminan
+UPLOAD_STAGING_DIR = os.path.join(BASE_DIR, 'upload_staging')  # partes sin confirmar, fuera de MEDIA_ROOT
+UPLOAD_CHUNK_LOCK_SECONDS = 10 * 60  # una parte en escritura más tiempo se da por abandonada
+
+# Cola de trabajos en segundo plano (productos/jobs.py, manage.py run_jobs)
+JOBS_WORKERS = 2  # hilos por proceso worker
+JOBS_POLL_INTERVAL = 2  # segundos entre consultas cuando la cola está vacía
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF_BASE = 10  # segundos antes del primer reintento; se duplica en cada uno
+JOBS_BACKOFF_MAX = 60 * 60
+JOBS_STALE_AFTER = 15 * 60  # un trabajo en curso más tiempo se da por abandonado
+JOBS_RETENTION_DAYS = 7  # los completados se purgan pasado este tiempo
+JOBS_BACKLOG_WARNING = 5 * 60  # el panel avisa si hay trabajos vencidos desde hace más (¿worker parado?)
+
 # WhiteNoise configuration mejorada
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Debe estar aquí
     'coimpres_cuba.middleware.PerformanceMiddleware',  # Nuestro middleware de rendimiento
+    'coimpres_cuba.middleware.PrimaryReplicaMiddleware',  # Lecturas públicas en réplicas
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -150,6 +213,18 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Vistas públicas asíncronas (productos/async_views.py). coimpres_cuba/asgi.py las
+# activa por defecto; con WSGI (gunicorn) siguen las vistas síncronas.
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS', 'false').lower() in ('1', 'true', 'yes')
+if ASYNC_PUBLIC_VIEWS:
+    # WhiteNoise es solo síncrono y obligaría a pasar cada petición por un hilo:
+    # con ASGI los estáticos los sirve el proxy (ver ASGI_DEPLOYMENT.md)
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
+# Métricas por vista (coimpres_cuba/metrics.py): cada worker vuelca las suyas a METRICS_DIR
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, 'cache', 'metrics'))
+METRICS_FLUSH_INTERVAL = 5  # segundos
+
 # Configuración específica para Render
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 WHITENOISE_USE_FINDERS = True
@@ -172,7 +247,9 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # WhiteNoise optimizations para simular beneficios HTTP/2
 WHITENOISE_MAX_AGE = 31536000  # 1 año cache para archivos estáticos
 WHITENOISE_SKIP_COMPRESS_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'webp', 'zip', 'gz', 'tgz', 'bz2', 'tbz', 'xz', 'br']
-WHITENOISE_ADD_HEADERS_FUNCTION = 'coimpres_cuba.whitenoise_headers.add_headers'
+# WhiteNoise espera la función, no su ruta en texto
+from coimpres_cuba.whitenoise_headers import add_headers as whitenoise_add_headers  # noqa: E402
+WHITENOISE_ADD_HEADERS_FUNCTION = whitenoise_add_headers
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
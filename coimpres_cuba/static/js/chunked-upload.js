@@ -0,0 +1,202 @@
+// Subidas por partes (reanudables) de la galería de productos
+// Formularios con data-chunked-upload="image|video" (ver productos/uploads.py)
+
+const UPLOAD_CHECKSUM_MAX_SIZE = 64 * 1024 * 1024;  // SHA-256 en el navegador solo hasta 64 MB
+const UPLOAD_MAX_RETRIES = 8;
+
+function getCsrfToken(form) {
+    const input = form.querySelector('input[name="csrfmiddlewaretoken"]');
+    return input ? input.value : '';
+}
+
+function uploadStorageKey(form, file) {
+    return `chunked-upload:${form.dataset.startUrl}:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function fileChecksum(file) {
+    if (file.size > UPLOAD_CHECKSUM_MAX_SIZE || !(window.crypto && crypto.subtle)) {
+        return '';
+    }
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Fila de progreso de un archivo
+function createProgressRow(list, file) {
+    const row = document.createElement('div');
+    row.className = 'upload-progress-item';
+    row.innerHTML = `
+        <div class="upload-progress-name"></div>
+        <progress max="100" value="0"></progress>
+        <span class="upload-progress-status">En cola</span>
+    `;
+    row.querySelector('.upload-progress-name').textContent = file.name;
+    list.appendChild(row);
+    return {
+        update(progress, text) {
+            row.querySelector('progress').value = progress;
+            row.querySelector('.upload-progress-status').textContent = text || `${progress.toFixed(0)}%`;
+        },
+        fail(text) {
+            row.classList.add('upload-progress-error');
+            row.querySelector('.upload-progress-status').textContent = text;
+        },
+    };
+}
+
+// Estado de una subida anterior del mismo archivo (para reanudar), o null
+async function resumeUpload(form, file) {
+    const uploadId = localStorage.getItem(uploadStorageKey(form, file));
+    if (!uploadId) {
+        return null;
+    }
+    const response = await fetch(form.dataset.chunkUrl.replace('00000000-0000-0000-0000-000000000000', uploadId));
+    if (!response.ok) {
+        localStorage.removeItem(uploadStorageKey(form, file));
+        return null;
+    }
+    return response.json();
+}
+
+async function startUpload(form, file, index) {
+    const data = new FormData();
+    data.append('kind', form.dataset.chunkedUpload);
+    data.append('filename', file.name);
+    data.append('size', file.size);
+    data.append('checksum', await fileChecksum(file));
+    // Datos de la galería del formulario; el orden sube con cada archivo
+    form.querySelectorAll('[data-upload-field]').forEach(field => {
+        let value = field.type === 'checkbox' ? String(field.checked) : field.value;
+        if (field.dataset.uploadField === 'order') {
+            value = String((parseInt(value, 10) || 1) + index);
+        }
+        data.append(field.dataset.uploadField, value);
+    });
+
+    const response = await fetch(form.dataset.startUrl, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': getCsrfToken(form) },
+        body: data,
+    });
+    const state = await response.json();
+    if (!response.ok) {
+        throw new Error(state.error || 'No se pudo iniciar la subida');
+    }
+    localStorage.setItem(uploadStorageKey(form, file), state.upload_id);
+    return state;
+}
+
+// Envía las partes desde el offset del servidor; reintenta si se corta la conexión
+async function sendChunks(form, file, state, row) {
+    const url = form.dataset.chunkUrl.replace('00000000-0000-0000-0000-000000000000', state.upload_id);
+    let retries = 0;
+    while (!state.complete) {
+        row.update(state.progress);
+        const chunk = file.slice(state.offset, state.offset + state.chunk_size);
+        let response;
+        try {
+            response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': getCsrfToken(form),
+                    'X-Upload-Offset': String(state.offset),
+                    'Content-Type': 'application/octet-stream',
+                },
+                body: chunk,
+            });
+        } catch (error) {
+            // Red caída: esperar y preguntar al servidor desde dónde seguir
+            if (++retries > UPLOAD_MAX_RETRIES) {
+                throw new Error('Conexión perdida');
+            }
+            row.update(state.progress, `Reintentando (${retries})...`);
+            await sleep(Math.min(1000 * 2 ** retries, 30000));
+            const status = await fetch(url).catch(() => null);
+            if (status && status.ok) {
+                state = await status.json();
+            }
+            continue;
+        }
+
+        const body = await response.json();
+        if (response.ok || response.status === 409) {
+            // 409: el servidor tiene otro offset (parte repetida o cortada); se sigue desde el suyo
+            if (!response.ok && ++retries > UPLOAD_MAX_RETRIES) {
+                throw new Error(body.error);
+            }
+            if (!response.ok && body.offset === state.offset) {
+                // Otra petición (un envío anterior aún en curso) está escribiendo esta parte
+                await sleep(Math.min(1000 * 2 ** retries, 30000));
+            }
+            state = body;
+        } else {
+            throw new Error(body.error || `Error ${response.status}`);
+        }
+    }
+    row.update(100, 'Completado');
+    return state;
+}
+
+async function handleChunkedUpload(event) {
+    const form = event.target;
+    const input = form.querySelector('input[type="file"]');
+    if (!input.files.length || !window.fetch) {
+        return;  // Sin archivos o navegador antiguo: envío normal del formulario
+    }
+    event.preventDefault();
+
+    const list = form.querySelector('.upload-progress-list');
+    const submit = form.querySelector('button[type="submit"]');
+    list.innerHTML = '';
+    submit.disabled = true;
+
+    const files = Array.from(input.files);
+    const rows = files.map(file => createProgressRow(list, file));
+    const uploadIds = [];
+    let failed = false;
+
+    // Un archivo tras otro: en conexiones lentas es mejor terminar cada uno
+    for (const [index, file] of files.entries()) {
+        try {
+            const state = (await resumeUpload(form, file)) || (await startUpload(form, file, index));
+            await sendChunks(form, file, state, rows[index]);
+            uploadIds.push(state.upload_id);
+        } catch (error) {
+            rows[index].fail(error.message);
+            failed = true;
+        }
+    }
+
+    if (failed) {
+        submit.disabled = false;
+        submit.textContent = '🔄 Reanudar';
+        return;
+    }
+
+    // Todas las partes han llegado: se crean las filas de la galería en una transacción
+    const data = new FormData();
+    uploadIds.forEach(id => data.append('upload_ids[]', id));
+    const response = await fetch(form.dataset.finalizeUrl, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': getCsrfToken(form) },
+        body: data,
+    });
+    const result = await response.json();
+    if (!response.ok) {
+        rows.forEach(row => row.fail(result.error));
+        submit.disabled = false;
+        return;
+    }
+    files.forEach(file => localStorage.removeItem(uploadStorageKey(form, file)));
+    window.location = result.redirect;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('form[data-chunked-upload]').forEach(form => {
+        form.addEventListener('submit', handleChunkedUpload);
+    });
+});
@@ -15,31 +15,32 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 # coimpres_cuba/urls.py
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from productos.sitemaps import StaticViewSitemap, ProductSitemap, CategorySitemap, ProveedorSitemap
 from . import views
+from .media import serve_media
 
-# Configuración de sitemaps para SEO
-sitemaps = {
-    'static': StaticViewSitemap,
-    'products': ProductSitemap,
-    'categories': CategorySitemap,
-    'suppliers': ProveedorSitemap,
-}
+# Con ASGI la portada usa su versión asíncrona (productos/async_views.py)
+if getattr(settings, 'ASYNC_PUBLIC_VIEWS', False):
+    from productos.async_views import home_view
+else:
+    home_view = views.home_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', views.home_view, name='home'),
+    path('', home_view, name='home'),
     path('productos/', include('productos.urls')),
     path('contact/', views.ContactView.as_view(), name='contact'),
     path('change-language/', views.change_language, name='change_language'),
     
     # SEO URLs
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    # Índice de sitemaps y tramos .xml.gz pregenerados (productos/sitemap_files.py)
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    re_path(r'^(?P<name>sitemap-[a-z]+-\d+\.xml\.gz)$', views.sitemap_shard, name='sitemap_shard'),
     path('robots.txt', views.robots_txt, name='robots_txt'),
 ]
 
@@ -48,5 +49,7 @@ if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 else:
-    # Para producción con WhiteNoise
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # En producción: rangos, validadores y envío delegado al proxy o con sendfile
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
\ No newline at end of file
@@ -1,22 +1,33 @@
 # coimpres_cuba/views.py - VERSIÓN SIMPLIFICADA
+import hashlib
+import os
+from calendar import timegm
+from datetime import datetime, timezone as dt_timezone
+
 from django.shortcuts import render
-from productos.models import Product
 from django.views.generic import TemplateView
 from django.contrib import messages
-from django.http import HttpResponse
-from django.views.decorators.http import require_GET
+from django.http import FileResponse, Http404, HttpResponse
+from django.contrib.sitemaps.views import SitemapIndexItem
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+from django.utils.decorators import method_decorator
+from productos.page_cache import cache_public_page, add_page_dependencies
+from productos.conditional import conditional_page, home_etag
+from productos.home_feed import get_home_feed
+from productos.sitemap_files import ensure_sitemaps, index_etag, load_manifest, shard_index, shard_path
 
+@conditional_page(home_etag)
+@cache_public_page
 def home_view(request):
     """Vista para la página de inicio - Con más productos para collage ampliado"""
-    # Obtener más productos para el hero collage (hasta 16 productos para el grid ampliado)
-    featured_products_query = Product.objects.filter(is_active=True, destacado=True).select_related('category', 'subcategory', 'proveedor', 'estatus')[:16]
-    
-    # Si no hay suficientes productos destacados, completar con productos activos
-    if featured_products_query.count() < 16:
-        additional_products = Product.objects.filter(is_active=True).exclude(id__in=featured_products_query).select_related('category', 'subcategory', 'proveedor', 'estatus')[:16-featured_products_query.count()]
-        featured_products_list = list(featured_products_query) + list(additional_products)
-    else:
-        featured_products_list = list(featured_products_query)
+    add_page_dependencies(request, 'home')
+    # Hasta 16 productos (destacados primero) para el hero collage y las tarjetas,
+    # desde la portada materializada: sin consultas al catálogo (productos/home_feed.py)
+    featured_products_list = get_home_feed()
     
     hero_image = "/static/img/hero-image.jpg"  # Default hero image path
     
@@ -27,6 +38,7 @@ def home_view(request):
     }
     return render(request, 'coimpres_cuba/home.html', context)
 
+@method_decorator(cache_public_page, name='dispatch')
 class ContactView(TemplateView):
     """Vista para la página de contacto - Simplificada usando context processor global"""
     template_name = 'coimpres_cuba/contact.html'
@@ -73,7 +85,20 @@ def change_language(request):
         # Si no hay referencia, ir al inicio
         return redirect('/')
 
-@require_GET
+def _with_validators(request, response, etag, last_modified=None, max_age=3600):
+    """ETag / Last-Modified / Cache-Control en la respuesta, o 304 si el cliente ya la tiene"""
+    etag = quote_etag(etag)
+    last_modified = timegm(last_modified.utctimetuple()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        response = not_modified
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+@require_safe
 def robots_txt(request):
     """Vista para robots.txt - Importante para SEO"""
     lines = [
@@ -85,4 +110,35 @@ def robots_txt(request):
         "",
         f"Sitemap: {request.build_absolute_uri('/sitemap.xml')}",
     ]
-    return HttpResponse("\n".join(lines), content_type="text/plain")
\ No newline at end of file
+    content = "\n".join(lines)
+    response = HttpResponse(content, content_type="text/plain")
+    etag = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    return _with_validators(request, response, etag, max_age=60 * 60 * 24)
+
+@require_safe
+def sitemap_index(request):
+    """Índice de sitemaps: enlaza los tramos .xml.gz pregenerados (productos/sitemap_files.py)"""
+    manifest = ensure_sitemaps(request)
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    items = [SitemapIndexItem(location, lastmod) for location, lastmod in shard_index(manifest, base_url)]
+    response = HttpResponse(render_to_string('sitemap_index.xml', {'sitemaps': items}), content_type='application/xml')
+    modified = parse_datetime(manifest['modified']) if manifest.get('modified') else None
+    return _with_validators(request, response, index_etag(manifest, base_url), modified)
+
+@require_safe
+def sitemap_shard(request, name):
+    """Un tramo del sitemap, servido tal cual desde disco (ya comprimido)"""
+    manifest = load_manifest()
+    entry = manifest['shards'].get(name) if manifest else None
+    if entry is None:
+        raise Http404("Sitemap no encontrado")
+    try:
+        fh = open(shard_path(name), 'rb')
+    except OSError:
+        raise Http404("Sitemap no encontrado")
+    modified = datetime.fromtimestamp(os.fstat(fh.fileno()).st_mtime, tz=dt_timezone.utc)
+    response = FileResponse(fh, content_type='application/gzip')
+    response = _with_validators(request, response, entry['sha1'], modified)
+    if response.status_code == 304:
+        fh.close()
+    return response
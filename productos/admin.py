@@ -2,7 +2,11 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.db import models
 from django.forms import TextInput, Textarea
-from .models import Category, Product, Proveedor, Subcategory, Estatus, ProductImage, ProductVideo
+from .models import Category, Product, Proveedor, Subcategory, Estatus, Job, ProductImage, ProductVideo
+from .cache import invalidate_products
+from .counters import update_active
+from .jobs import retry_jobs
+from .summaries import rebuild_summaries
 
 @admin.register(Proveedor)
 class ProveedorAdmin(admin.ModelAdmin):
@@ -49,11 +53,11 @@ class ProveedorAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'count_subcategorias', 'created_at') if hasattr(Category, 'created_at') else ('name', 'slug', 'count_subcategorias')
+    list_display = ('name', 'slug', 'count_subcategorias', 'count_productos', 'created_at') if hasattr(Category, 'created_at') else ('name', 'slug', 'count_subcategorias', 'count_productos')
     list_filter = ('created_at',) if hasattr(Category, 'created_at') else ()
     prepopulated_fields = {"slug": ("name",)}
     search_fields = ('name',)
-    readonly_fields = ('count_subcategorias',)
+    readonly_fields = ('count_subcategorias', 'count_productos')
     ordering = ('name',)
     
     fieldsets = (
@@ -230,32 +234,41 @@ class ProductAdmin(admin.ModelAdmin):
     actions = ['make_active', 'make_inactive', 'duplicate_product', 'mark_featured', 'unmark_featured', 'mark_on_sale', 'unmark_on_sale']
     
     def make_active(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        # update() no dispara señales: contadores (update_active), caché y resúmenes a mano
+        updated = update_active(queryset, True)
+        invalidate_products(queryset)
+        rebuild_summaries(queryset.values_list('proveedor_id', flat=True))
         self.message_user(request, f'{updated} productos fueron activados.')
     make_active.short_description = "Activar productos seleccionados"
     
     def make_inactive(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = update_active(queryset, False)
+        invalidate_products(queryset)
+        rebuild_summaries(queryset.values_list('proveedor_id', flat=True))
         self.message_user(request, f'{updated} productos fueron desactivados.')
     make_inactive.short_description = "Desactivar productos seleccionados"
     
     def mark_featured(self, request, queryset):
         updated = queryset.update(destacado=True)
+        invalidate_products(queryset)
         self.message_user(request, f'{updated} productos fueron marcados como destacados.')
     mark_featured.short_description = "Marcar como destacados"
     
     def unmark_featured(self, request, queryset):
         updated = queryset.update(destacado=False)
+        invalidate_products(queryset)
         self.message_user(request, f'{updated} productos fueron desmarcados como destacados.')
     unmark_featured.short_description = "Desmarcar como destacados"
     
     def mark_on_sale(self, request, queryset):
         updated = queryset.update(en_oferta=True)
+        invalidate_products(queryset)
         self.message_user(request, f'{updated} productos fueron marcados en oferta.')
     mark_on_sale.short_description = "Marcar en oferta"
     
     def unmark_on_sale(self, request, queryset):
         updated = queryset.update(en_oferta=False)
+        invalidate_products(queryset)
         self.message_user(request, f'{updated} productos fueron desmarcados de oferta.')
     unmark_on_sale.short_description = "Desmarcar de oferta"
     
@@ -309,3 +322,21 @@ class ProductVideoAdmin(admin.ModelAdmin):
             'fields': ('order',)
         }),
     )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key', 'last_error')
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ['retry_failed']
+
+    def has_add_permission(self, request):
+        # Los trabajos se crean desde el código (productos/jobs.py)
+        return False
+
+    def retry_failed(self, request, queryset):
+        updated = retry_jobs(queryset)
+        self.message_user(request, f'{updated} trabajos fallidos vueltos a encolar.')
+    retry_failed.short_description = "Reintentar trabajos fallidos"
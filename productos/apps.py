@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productos'
+
+    def ready(self):
+        # Registrar las señales que mantienen los índices del catálogo
+        from . import signals  # noqa: F401
+        # Registrar las tareas de la cola de trabajos (productos/jobs.py)
+        from . import tasks  # noqa: F401
+        # Aviso de despliegue si falta SITEMAP_BASE_URL (productos/sitemap_files.py)
+        from django.core.checks import register
+        from .sitemap_files import check_base_url
+        register(check_base_url, deploy=True)
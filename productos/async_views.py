@@ -0,0 +1,118 @@
+# productos/async_views.py
+# Versiones asíncronas de las vistas públicas del catálogo, para servir el sitio
+# con ASGI (coimpres_cuba/asgi.py, ver ASGI_DEPLOYMENT.md).
+#
+# Mismas plantillas, contexto, caché de páginas y validadores HTTP que las
+# vistas síncronas de productos/views.py. Los datos se cargan con el ORM
+# asíncrono; lo que solo existe en síncrono (paginadores, facetas, render de
+# plantillas) se ejecuta con sync_to_async, en el hilo de la base de datos.
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render
+
+from .conditional import conditional_page, catalog_etag, home_etag, product_etag, product_last_modified
+from .detail import product_detail_queryset, product_detail_context
+from .directory import get_proveedor_directory
+from .home_feed import get_home_feed
+from .models import Category, Subcategory, Proveedor, Estatus
+from .page_cache import cache_public_page, add_page_dependencies
+from .pagination import cursor_links
+from .views import (
+    ProductListView, product_list_queryset, paginate_products, product_filters_context, proveedor_detail_context,
+)
+
+arender = sync_to_async(render)
+
+
+async def aload_filter_taxonomies():
+    """Taxonomías de la barra de filtros (ver load_filter_taxonomies)"""
+    return {
+        'category': [category async for category in Category.objects.all()],
+        'subcategory': [subcategory async for subcategory in Subcategory.objects.select_related('category')],
+        'proveedor': [proveedor async for proveedor in Proveedor.objects.order_by('name')],
+        'estatus': [estatus async for estatus in Estatus.objects.all()],
+    }
+
+
+# =================== PORTADA ===================
+
+@conditional_page(home_etag)
+@cache_public_page
+async def home_view(request):
+    """Página de inicio: la portada materializada (productos/home_feed.py)"""
+    add_page_dependencies(request, 'home')
+    context = {
+        'featured_products': await sync_to_async(get_home_feed)(),
+        'hero_image': "/static/img/hero-image.jpg",
+    }
+    return await arender(request, 'coimpres_cuba/home.html', context)
+
+
+# =================== PRODUCTOS ===================
+
+@conditional_page(catalog_etag)
+@cache_public_page
+async def product_list_view(request):
+    """Listado con filtros, facetas y paginación por cursor (como ProductListView)"""
+    add_page_dependencies(request, 'catalog')
+    queryset = product_list_queryset(request.GET)
+    paginator, page = await sync_to_async(paginate_products)(request, queryset, ProductListView.paginate_by)
+    if not isinstance(page.object_list, list):
+        page.object_list = [product async for product in page.object_list]
+
+    context = {
+        'paginator': paginator,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'object_list': page.object_list,
+        'product_list': page.object_list,
+        **cursor_links(request, page),
+    }
+
+    # Barra de filtros: las taxonomías por el ORM asíncrono, los conteos en un hilo
+    taxonomies = await aload_filter_taxonomies()
+    context.update(await sync_to_async(product_filters_context)(request.GET, taxonomies))
+    return await arender(request, 'productos/product_list.html', context)
+
+
+@conditional_page(product_etag, product_last_modified)
+@cache_public_page
+async def product_detail_view(request, slug):
+    """Ficha de producto (como ProductDetailView)"""
+    product = await aget_object_or_404(product_detail_queryset(), slug=slug)
+    add_page_dependencies(
+        request, 'taxonomy', f'product:{product.pk}',
+        f'category:{product.category_id}', f'proveedor:{product.proveedor_id}',
+    )
+    context = {'object': product, 'product': product}
+    context.update(await sync_to_async(product_detail_context)(product))
+    return await arender(request, 'productos/product_detail.html', context)
+
+
+# =================== PROVEEDORES ===================
+
+@conditional_page(catalog_etag)
+@cache_public_page
+async def proveedor_list_view(request):
+    """Proveedores con productos activos y su número de productos (como ProveedorListView)"""
+    add_page_dependencies(request, 'catalog')
+    directory = await sync_to_async(get_proveedor_directory)()
+    proveedores = [item['proveedor'] for item in directory]
+
+    context = {
+        'proveedores': proveedores,
+        'object_list': proveedores,
+        'proveedores_con_productos': directory,
+    }
+    return await arender(request, 'productos/proveedor_list.html', context)
+
+
+@conditional_page(catalog_etag)
+@cache_public_page
+async def proveedor_detail_view(request, slug):
+    """Proveedor con sus productos activos, filtrables por categoría (como ProveedorDetailView)"""
+    proveedor = await aget_object_or_404(Proveedor, slug=slug)
+    add_page_dependencies(request, 'taxonomy', f'proveedor:{proveedor.pk}')
+
+    context = {'proveedor': proveedor, 'object': proveedor}
+    context.update(await sync_to_async(proveedor_detail_context)(request, proveedor))
+    return await arender(request, 'productos/proveedor_detail.html', context)
@@ -0,0 +1,350 @@
+# productos/benchmark.py
+# Benchmark reproducible del catálogo (ver manage.py benchmark)
+#
+# Siembra una base de datos desechable con N productos y lanza peticiones contra
+# la aplicación WSGI (o ASGI) en el mismo proceso, con varios hilos concurrentes.
+import asyncio
+import importlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from io import BytesIO
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError, connection, transaction
+from django.test import Client, RequestFactory
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+from .counters import reconcile_counters
+from .models import Category, Estatus, Product, Proveedor, Subcategory
+from .related import is_available as related_available, rebuild_related_products
+from .search import get_search_backend
+from .summaries import rebuild_summaries
+
+SEED = 20241018
+
+PROVEEDORES = 25
+CATEGORIES = 12
+SUBCATEGORIES_PER_CATEGORY = 4
+ESTATUS = ('En stock', 'Por pedido', 'En tránsito')
+
+WORDS = (
+    'pasta', 'café', 'aceite', 'oliva', 'tomate', 'queso', 'vino', 'cemento', 'azulejo', 'grifo',
+    'espresso', 'penne', 'fusilli', 'parmesano', 'balsámico', 'cerámica', 'mármol', 'tubería',
+    'válvula', 'lámpara', 'mueble', 'silla', 'mesa', 'italiano', 'artesanal', 'orgánico', 'premium',
+)
+
+BATCH_SIZE = 2000
+
+
+# =================== DATOS ===================
+
+def seed_taxonomy():
+    """Proveedores, categorías, subcategorías y estatus fijos (idempotente)"""
+    proveedores = [
+        Proveedor.objects.get_or_create(id_unico=f'BENCH{i:03d}', defaults={'name': f'Proveedor {i}'})[0]
+        for i in range(PROVEEDORES)
+    ]
+    categories = [Category.objects.get_or_create(name=f'Categoría {i}')[0] for i in range(CATEGORIES)]
+    subcategories = [
+        Subcategory.objects.get_or_create(name=f'Subcategoría {c.pk}-{j}', category=c)[0]
+        for c in categories
+        for j in range(SUBCATEGORIES_PER_CATEGORY)
+    ]
+    estatus = [Estatus.objects.get_or_create(name=name)[0] for name in ESTATUS]
+    return proveedores, categories, subcategories, estatus
+
+
+def seed_products(total):
+    """Completa el catálogo hasta `total` productos con datos pseudoaleatorios reproducibles"""
+    proveedores, categories, subcategories, estatus = seed_taxonomy()
+    existing = Product.objects.count()
+    if existing >= total:
+        return 0
+
+    rng = random.Random(SEED + existing)
+    by_category = {}
+    for sub in subcategories:
+        by_category.setdefault(sub.category_id, []).append(sub)
+
+    now = timezone.now()
+    created = 0
+    with transaction.atomic():
+        batch = []
+        for number in range(existing, total):
+            category = rng.choice(categories)
+            name = ' '.join(rng.sample(WORDS, 3)).capitalize() + f' {number}'
+            batch.append(Product(
+                name=name,
+                slug=f'bench-{number}',
+                sku=f'BENCH-{number:07d}',
+                proveedor=rng.choice(proveedores),
+                category=category,
+                subcategory=rng.choice(by_category[category.pk]),
+                estatus=rng.choice(estatus),
+                short_description=' '.join(rng.choices(WORDS, k=8)),
+                description=' '.join(rng.choices(WORDS, k=60)),
+                price=rng.randint(100, 100000) / 100,
+                destacado=rng.random() < 0.05,
+                en_oferta=rng.random() < 0.1,
+                is_active=rng.random() < 0.95,
+                created_at=now,
+                updated_at=now,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                created += len(Product.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(Product.objects.bulk_create(batch))
+
+    # bulk_create no dispara señales: índice de búsqueda, contadores, resúmenes
+    # por proveedor y productos relacionados en bloque
+    get_search_backend().rebuild()
+    reconcile_counters()
+    rebuild_summaries()
+    if related_available():
+        rebuild_related_products()
+    return created
+
+
+# =================== ESCENARIOS ===================
+
+def build_scenarios():
+    """Lista de (nombre, [rutas], requiere_staff). Las rutas rotan entre peticiones"""
+    category = Category.objects.filter(name__startswith='Categoría').order_by('pk').first()
+    subcategory = Subcategory.objects.filter(category=category).order_by('pk').first()
+    proveedor = Proveedor.objects.filter(id_unico__startswith='BENCH').order_by('pk').first()
+    estatus = Estatus.objects.order_by('pk').first()
+    # 50 fichas repartidas por todo el catálogo (siempre las mismas para un tamaño dado)
+    total = Product.objects.count()
+    sample = [f'bench-{n}' for n in range(0, total, max(total // 50, 1))]
+    slugs = list(Product.objects.filter(is_active=True, slug__in=sample).values_list('slug', flat=True))
+    proveedor_slugs = list(
+        Proveedor.objects.filter(id_unico__startswith='BENCH').values_list('slug', flat=True)[:10]
+    )
+    return [
+        ('home', ['/'], False),
+        ('product_list', ['/productos/'], False),
+        ('list_category', [f'/productos/?category={category.slug}'], False),
+        ('list_subcategory', [f'/productos/?subcategory={subcategory.slug}'], False),
+        ('list_proveedor', [f'/productos/?proveedor={proveedor.slug}'], False),
+        ('list_estatus', [f'/productos/?estatus={estatus.slug}'], False),
+        ('list_destacado', ['/productos/?destacado=true'], False),
+        ('list_en_oferta', ['/productos/?en_oferta=true'], False),
+        ('list_search', [f'/productos/?q={word}' for word in ('pasta', 'aceite oliva', 'cemento')], False),
+        ('product_detail', [f'/productos/{slug}/' for slug in slugs], False),
+        ('proveedor_list', ['/productos/proveedores/'], False),
+        ('proveedor_detail', [f'/productos/proveedores/{slug}/' for slug in proveedor_slugs], False),
+        ('sitemap', ['/sitemap.xml'], False),
+        ('admin_panel', ['/productos/admin/'], True),
+    ]
+
+
+def staff_cookie():
+    """Cookie de sesión de un usuario staff para las páginas protegidas"""
+    from django.contrib.auth.models import User
+    user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+    client = Client()
+    client.force_login(user)
+    return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+
+# =================== EJECUCIÓN ===================
+
+class WSGIDriver:
+    """Lanza peticiones GET contra la aplicación WSGI sin pasar por la red"""
+
+    def __init__(self):
+        self.application = get_wsgi_application()
+        self.factory = RequestFactory()
+
+    def get(self, url, cookie=None):
+        path, _, query = url.partition('?')
+        environ = self.factory._base_environ(
+            PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD='GET',
+            SERVER_NAME='localhost', HTTP_HOST='localhost',
+        )
+        environ['wsgi.input'] = BytesIO()
+        if cookie:
+            environ['HTTP_COOKIE'] = cookie
+        status = []
+
+        def start_response(value, headers, exc_info=None):
+            status.append(int(value.split(' ', 1)[0]))
+
+        start = time.perf_counter()
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return time.perf_counter() - start, status[0]
+
+
+class ASGIDriver:
+    """
+    Lanza peticiones GET contra la aplicación ASGI con las vistas públicas
+    asíncronas: un bucle de eventos en su propio hilo, como un worker de uvicorn.
+    Cada hilo del benchmark es una conexión concurrente en ese bucle.
+    """
+
+    def __init__(self):
+        # Las URLconf eligen las vistas según ASYNC_PUBLIC_VIEWS al importarse
+        for module in ('productos.urls', settings.ROOT_URLCONF):
+            importlib.reload(importlib.import_module(module))
+        clear_url_caches()
+        self.application = get_asgi_application()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def request(self, path, query, cookie):
+        headers = [(b'host', b'localhost')]
+        if cookie:
+            headers.append((b'cookie', cookie.encode('latin-1')))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode('utf-8'),
+            'query_string': query.encode('latin-1'), 'root_path': '', 'headers': headers,
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        status = []
+        finished = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Django escucha la desconexión del cliente hasta terminar la respuesta
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            finished.set()
+        return status[0]
+
+    def get(self, url, cookie=None):
+        path, _, query = url.partition('?')
+        start = time.perf_counter()
+        status = asyncio.run_coroutine_threadsafe(self.request(path, query, cookie), self.loop).result()
+        return time.perf_counter() - start, status
+
+
+DRIVERS = {'wsgi': WSGIDriver, 'asgi': ASGIDriver}
+
+
+class BackgroundWriter:
+    """
+    Simula ediciones del panel mientras se mide: transacciones de escritura
+    seguidas que mantienen el bloqueo `hold` segundos (p. ej. una subida).
+    """
+
+    def __init__(self, hold=0.02, pause=0.01):
+        self.hold = hold
+        self.pause = pause
+        self.writes = 0
+        self.errors = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        rng = random.Random(SEED)
+        ids = list(Product.objects.order_by('pk').values_list('pk', flat=True)[:500])
+        try:
+            while ids and not self.stop_event.is_set():
+                try:
+                    with transaction.atomic():
+                        Product.objects.filter(pk=rng.choice(ids)).update(updated_at=timezone.now())
+                        time.sleep(self.hold)
+                    self.writes += 1
+                except OperationalError:
+                    self.errors += 1
+                time.sleep(self.pause)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.thread.join()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(driver, urls, requests, concurrency, cookie=None, warmup=5, writers=0):
+    """
+    Ejecuta `requests` peticiones con `concurrency` hilos, con `writers` hilos
+    escribiendo a la vez. Latencias en ms
+    """
+    for i in range(warmup):
+        driver.get(urls[i % len(urls)], cookie)
+
+    def worker(index):
+        return driver.get(urls[index % len(urls)], cookie)
+
+    with ExitStack() as stack:
+        background = [stack.enter_context(BackgroundWriter()) for _ in range(writers)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(worker, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(duration * 1000 for duration, _ in samples)
+    errors = sum(1 for _, status in samples if status >= 400)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'throughput_rps': round(requests / elapsed, 1) if elapsed else None,
+        'writes': sum(writer.writes for writer in background),
+        'write_errors': sum(writer.errors for writer in background),
+    }
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Compara con la línea base. Devuelve la lista de regresiones: p95 más de un
+    `threshold` (fracción) por encima, o throughput más de un `threshold` por debajo.
+    """
+    regressions = []
+    for size, scenarios in results.items():
+        for scenario, levels in scenarios.items():
+            for concurrency, current in levels.items():
+                previous = baseline.get(size, {}).get(scenario, {}).get(concurrency)
+                if not previous:
+                    continue
+                if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+                    regressions.append(
+                        f'{size} productos / {scenario} / c={concurrency}: '
+                        f'p95 {previous["p95_ms"]} → {current["p95_ms"]} ms'
+                    )
+                if current['throughput_rps'] < previous['throughput_rps'] * (1 - threshold):
+                    regressions.append(
+                        f'{size} productos / {scenario} / c={concurrency}: '
+                        f'throughput {previous["throughput_rps"]} → {current["throughput_rps"]} req/s'
+                    )
+    return regressions
@@ -0,0 +1,76 @@
+# productos/cache.py
+# Versionado de la caché del catálogo: cada cambio incrementa la versión de los
+# grupos afectados y las claves derivadas de la versión anterior dejan de usarse.
+#
+# Grupos usados:
+#   site             todas las páginas cacheadas (manage.py clear_page_cache)
+#   catalog          cualquier producto o taxonomía (listados, facetas)
+#   taxonomy         categorías, subcategorías y estatus
+#   home             productos de la portada (productos/home_feed.py)
+#   product:<id>     un producto, su galería y sus videos
+#   category:<id>    productos de una categoría (productos relacionados)
+#   proveedor:<id>   un proveedor y sus productos
+import hashlib
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = 'productos:version:'
+
+
+def _initial_version():
+    # Basada en el tiempo para no reutilizar claves si la versión se pierde de la caché
+    return int(time.time() * 1000)
+
+
+def get_versions(groups):
+    """Versión actual de cada grupo: {grupo: versión}"""
+    keys = {f'{VERSION_KEY_PREFIX}{group}': group for group in groups}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, group in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _initial_version(), None)
+            version = cache.get(key, _initial_version())
+        versions[group] = version
+    return versions
+
+
+def bump_versions(*groups):
+    """Invalida todas las entradas de caché que dependen de los grupos indicados"""
+    for group in set(groups):
+        key = f'{VERSION_KEY_PREFIX}{group}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def catalog_version():
+    """Versión actual del catálogo"""
+    return get_versions(['catalog'])['catalog']
+
+
+def invalidate_catalog():
+    """Invalida todas las entradas de caché que dependen del catálogo"""
+    bump_versions('catalog')
+
+
+def product_groups(product_id, category_id, proveedor_id):
+    """Grupos que dependen de un producto"""
+    return ['catalog', f'product:{product_id}', f'category:{category_id}', f'proveedor:{proveedor_id}']
+
+
+def invalidate_products(queryset):
+    """Invalida los grupos de los productos de un queryset (para update() masivos)"""
+    groups = ['catalog', 'home']
+    for row in queryset.values_list('pk', 'category_id', 'proveedor_id'):
+        groups += product_groups(*row)
+    bump_versions(*groups)
+
+
+def catalog_cache_key(prefix, *parts):
+    """Clave de caché ligada a la versión actual del catálogo"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'productos:{prefix}:{catalog_version()}:{digest}'
@@ -0,0 +1,144 @@
+# productos/conditional.py
+# Validadores HTTP (ETag / Last-Modified) para las páginas del catálogo.
+#
+# Se calculan antes de ejecutar la vista con consultas muy ligeras; si el
+# navegador ya tiene la página, Django responde 304 sin renderizar la plantilla.
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from coimpres_cuba.context_processors import get_language
+
+from .cache import get_versions
+from .models import Product, ProductImage, ProductVideo
+from .page_cache import aload_request_state, has_pending_messages
+
+
+def _etag(request, *parts):
+    # La página cambia con el idioma y con el usuario (enlaces de staff)
+    signature = repr((get_language(request), request.user.pk) + parts)
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag de listados y páginas de proveedores: versión global del catálogo"""
+    if has_pending_messages(request):
+        return None
+    return _etag(request, get_versions(['site', 'catalog']))
+
+
+def home_etag(request, *args, **kwargs):
+    """ETag de la portada: solo cambia con sus productos (productos/home_feed.py)"""
+    if has_pending_messages(request):
+        return None
+    return _etag(request, get_versions(['site', 'home']))
+
+
+def gallery_subquery(model, aggregate):
+    """Agregado de las filas de la galería del producto, como subconsulta escalar"""
+    rows = model.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    return Subquery(rows.annotate(value=aggregate).values('value')[:1])
+
+
+def product_validators(request, slug):
+    """
+    (etag, last_modified) de la ficha de un producto, a partir de su updated_at
+    y de las filas de su galería. Se memoriza en la request.
+    """
+    cached = getattr(request, '_product_validators', None)
+    if cached is not None:
+        return cached
+
+    validators = (None, None)
+    product = (
+        Product.objects.filter(slug=slug, is_active=True)
+        .annotate(
+            images_count=gallery_subquery(ProductImage, Count('pk')),
+            images_modified=gallery_subquery(ProductImage, Max('created_at')),
+            videos_count=gallery_subquery(ProductVideo, Count('pk')),
+            videos_modified=gallery_subquery(ProductVideo, Max('created_at')),
+        )
+        .values(
+            'pk', 'updated_at', 'category_id', 'proveedor_id',
+            'images_count', 'images_modified', 'videos_count', 'videos_modified',
+        )
+        .order_by()
+        .first()
+    )
+    if product and not has_pending_messages(request):
+        # Las ediciones de la galería (orden, textos...) incrementan product:<id>;
+        # la taxonomía y los productos relacionados también aparecen en la ficha
+        versions = get_versions([
+            'site', 'taxonomy', f'product:{product["pk"]}',
+            f'category:{product["category_id"]}', f'proveedor:{product["proveedor_id"]}',
+        ])
+        etag = _etag(request, sorted(product.items()), versions)
+        modified = [product['updated_at'], product['images_modified'], product['videos_modified']]
+        validators = (etag, max(value for value in modified if value is not None))
+
+    request._product_validators = validators
+    return validators
+
+
+def product_etag(request, slug, *args, **kwargs):
+    return product_validators(request, slug)[0]
+
+
+def product_last_modified(request, slug, *args, **kwargs):
+    return product_validators(request, slug)[1]
+
+
+def conditional_page(etag_func, last_modified_func=None):
+    """
+    Como django.views.decorators.http.condition, pero obligando al navegador a
+    revalidar siempre (no-cache) para que nunca muestre una página desactualizada.
+
+    En vistas asíncronas los validadores (que consultan la base de datos) se
+    calculan en un hilo antes de llamar a condition.
+
+    Con ?lang= no hay 304: el cambio de idioma se guarda en la sesión al
+    renderizar (coimpres_cuba/context_processors.py), igual que la caché de
+    páginas no sirve esas peticiones (is_cacheable_request).
+    """
+    def validators(request, *args, **kwargs):
+        etag = etag_func(request, *args, **kwargs) if etag_func else None
+        last_modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+        return etag, last_modified
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            conditional_view = condition(
+                etag_func=lambda request, *args, **kwargs: request._page_validators[0],
+                last_modified_func=lambda request, *args, **kwargs: request._page_validators[1],
+            )(view_func)
+
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if 'lang' in request.GET:
+                    return await view_func(request, *args, **kwargs)
+                await aload_request_state(request)
+                request._page_validators = await sync_to_async(validators)(request, *args, **kwargs)
+                response = await conditional_view(request, *args, **kwargs)
+                if request.method in ('GET', 'HEAD'):
+                    patch_cache_control(response, no_cache=True)
+                return response
+
+            return async_wrapper
+
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if 'lang' in request.GET:
+                return view_func(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+    return decorator
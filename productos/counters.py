@@ -0,0 +1,116 @@
+# productos/counters.py
+# Contadores desnormalizados de productos activos (productos_count) en
+# Category, Subcategory, Estatus y Proveedor, y de subcategorías
+# (subcategorias_count) en Category: el admin y las páginas de edición los
+# leen sin un COUNT por fila.
+#
+# Se mantienen con UPDATE ... SET productos_count = productos_count ± n dentro
+# de la transacción del guardado o borrado (productos/signals.py, Product.save)
+# y en los update() masivos (update_active). `manage.py reconcile_counters`
+# compara con los conteos reales y corrige cualquier desviación.
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Category, Estatus, Proveedor, Subcategory
+
+# Relación del producto -> modelo con contador productos_count
+COUNTED_MODELS = {
+    'category': Category,
+    'subcategory': Subcategory,
+    'estatus': Estatus,
+    'proveedor': Proveedor,
+}
+
+# Columnas del producto que deciden qué contadores lo incluyen
+COUNTED_VALUES = ('is_active',) + tuple(f'{field}_id' for field in COUNTED_MODELS)
+
+
+def product_values(product):
+    return {name: getattr(product, name) for name in COUNTED_VALUES}
+
+
+def counted_relations(values):
+    """{relación: id} de los contadores que incluyen al producto (ninguno si no está activo)"""
+    if not values['is_active']:
+        return {}
+    return {field: values[f'{field}_id'] for field in COUNTED_MODELS if values[f'{field}_id']}
+
+
+def relation_deltas(before, after, deltas=None):
+    """Acumula en `deltas` ({relación: Counter(id: ±n)}) el paso de `before` a `after`"""
+    deltas = defaultdict(Counter) if deltas is None else deltas
+    for field in COUNTED_MODELS:
+        old, new = before.get(field), after.get(field)
+        if old == new:
+            continue
+        if old:
+            deltas[field][old] -= 1
+        if new:
+            deltas[field][new] += 1
+    return deltas
+
+
+def queryset_deltas(queryset, sign):
+    """Deltas de sumar (sign=1) o restar (sign=-1) los productos del queryset: una consulta por relación"""
+    deltas = defaultdict(Counter)
+    for field in COUNTED_MODELS:
+        column = f'{field}_id'
+        rows = queryset.filter(**{f'{column}__isnull': False}).values(column).annotate(total=Count('pk')).order_by()
+        for row in rows:
+            deltas[field][row[column]] += sign * row['total']
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Aplica los deltas con expresiones F: sin leer ni pisar el valor de otras transacciones"""
+    for field, counter in deltas.items():
+        model = COUNTED_MODELS[field]
+        for pk, delta in counter.items():
+            if delta:
+                model.objects.filter(pk=pk).update(productos_count=F('productos_count') + delta)
+
+
+def update_active(queryset, is_active):
+    """queryset.update(is_active=...) manteniendo los contadores (update() no dispara señales)"""
+    with transaction.atomic():
+        changed = queryset.exclude(is_active=is_active)
+        apply_deltas(queryset_deltas(changed, 1 if is_active else -1))
+        if is_active:
+            # Como en Product.save: reactivar cancela la eliminación pendiente
+            return queryset.update(is_active=True, delete_requested_at=None)
+        return queryset.update(is_active=False)
+
+
+def change_subcategory_count(category_id, delta):
+    if category_id:
+        Category.objects.filter(pk=category_id).update(subcategorias_count=F('subcategorias_count') + delta)
+
+
+# =================== CONCILIACIÓN ===================
+
+def actual_counts():
+    """Conteos reales: [(modelo, campo, queryset anotado con `actual`)]"""
+    active = Q(product__is_active=True)
+    counts = [
+        (model, 'productos_count', model.objects.annotate(actual=Count('product', filter=active)))
+        for model in COUNTED_MODELS.values()
+    ]
+    counts.append((Category, 'subcategorias_count', Category.objects.annotate(actual=Count('subcategories'))))
+    return counts
+
+
+def reconcile_counters(repair=True):
+    """
+    Compara cada contador con su conteo real y, si `repair`, corrige los que
+    se desviaron. Devuelve [(modelo, pk, campo, guardado, real)].
+    """
+    drift = []
+    for model, field, queryset in actual_counts():
+        for pk, stored, actual in queryset.values_list('pk', field, 'actual').order_by('pk').iterator():
+            if stored != actual:
+                drift.append((model, pk, field, stored, actual))
+                if repair:
+                    model.objects.filter(pk=pk).update(**{field: actual})
+    return drift
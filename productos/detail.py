@@ -0,0 +1,57 @@
+# productos/detail.py
+# Carga de la ficha de producto: una consulta para el producto (con sus FK) y
+# prefetch de galería, videos y relacionados. El contexto se construye en
+# memoria a partir de esos datos, sin volver a consultar los managers.
+from django.db.models import Prefetch
+
+from .models import Product, RelatedProduct
+
+RELATED_PRODUCTS_LIMIT = 3
+
+
+def product_detail_queryset():
+    """Queryset de la ficha: productos activos con todo lo que la plantilla necesita"""
+    # Relacionados precalculados (productos/related.py), leídos por el índice (product, rank)
+    related = RelatedProduct.objects.filter(related__is_active=True).select_related('related')
+    return (
+        Product.objects.filter(is_active=True)
+        .select_related('proveedor', 'category', 'subcategory', 'estatus')
+        .prefetch_related(
+            'images',
+            'videos',
+            Prefetch('related_links', queryset=related.order_by('rank'), to_attr='related_entries'),
+        )
+    )
+
+
+def product_detail_context(product):
+    """Contexto de la ficha a partir de un producto cargado con product_detail_queryset()"""
+    gallery_images = list(product.images.all())
+    gallery_videos = list(product.videos.all())
+
+    # Imagen principal: priorizar imagen principal del producto, luego imagen marcada como main
+    if product.image:
+        main_image = product.image
+    else:
+        main_image_obj = next((image for image in gallery_images if image.is_main), None)
+        if main_image_obj is None and gallery_images:
+            main_image_obj = gallery_images[0]
+        main_image = main_image_obj.image if main_image_obj else None
+
+    context = {
+        'gallery_images': gallery_images,
+        'main_image': main_image,
+        'has_multiple_images': bool(gallery_images) or bool(product.image),
+        'gallery_videos': gallery_videos,
+        'has_multiple_videos': bool(gallery_videos),
+    }
+
+    related_products = [entry.related for entry in product.related_entries[:RELATED_PRODUCTS_LIMIT]]
+    if not related_products and product.category:
+        # Aún sin calcular (producto nuevo o sin NumPy): de la misma categoría
+        related_products = list(
+            Product.objects.filter(category=product.category, is_active=True)
+            .exclude(pk=product.pk)[:RELATED_PRODUCTS_LIMIT]
+        )
+    context['related_products'] = related_products
+    return context
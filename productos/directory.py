@@ -0,0 +1,59 @@
+# productos/directory.py
+# Directorio de proveedores (/productos/proveedores/): cada proveedor con
+# productos activos, su número de productos y unos pocos para la vista previa.
+#
+# Dos consultas de tamaño fijo, sin importar el tamaño del catálogo: los
+# proveedores con su contador de productos y, con una función de ventana, los
+# primeros PREVIEW_PRODUCTS productos de cada uno. El resultado se guarda en
+# caché ligado a la versión del catálogo, que cambia con cualquier Product o
+# Proveedor (productos/signals.py).
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from coimpres_cuba.db_router import primary_reads
+
+from .cache import catalog_cache_key
+from .models import Product, Proveedor
+
+PREVIEW_PRODUCTS = 3
+DIRECTORY_CACHE_TIMEOUT = 60 * 60
+
+
+def preview_products(limit=PREVIEW_PRODUCTS):
+    """Primeros `limit` productos activos de cada proveedor, en el orden del catálogo"""
+    ranked = (
+        Product.objects.filter(is_active=True, proveedor__isnull=False)
+        .only('pk', 'slug', 'name', 'image', 'proveedor_id')
+        .annotate(rank=Window(RowNumber(), partition_by=F('proveedor_id'), order_by=Product._meta.ordering))
+        .filter(rank__lte=limit)
+    )
+    previews = {}
+    for product in ranked:
+        previews.setdefault(product.proveedor_id, []).append(product)
+    return previews
+
+
+def build_proveedor_directory():
+    # productos_count es el contador de productos activos (productos/counters.py)
+    proveedores = Proveedor.objects.filter(productos_count__gt=0).order_by('name')
+    previews = preview_products()
+    return [
+        {
+            'proveedor': proveedor,
+            'productos_count': proveedor.productos_count,
+            'preview': previews.get(proveedor.pk, []),
+        }
+        for proveedor in proveedores
+    ]
+
+
+def get_proveedor_directory():
+    """Directorio de proveedores en caché hasta el siguiente cambio del catálogo"""
+    key = catalog_cache_key('proveedor_directory')
+    directory = cache.get(key)
+    if directory is None:
+        with primary_reads():
+            directory = build_proveedor_directory()
+        cache.set(key, directory, DIRECTORY_CACHE_TIMEOUT)
+    return directory
@@ -0,0 +1,200 @@
+# productos/export.py
+# Exportación del catálogo en streaming (CSV / JSONL / XLSX)
+#
+# Las filas salen de queryset.iterator(chunk_size=...) con las FK en el mismo
+# JOIN y se envían al cliente según se generan: la memoria no depende del
+# tamaño del catálogo y la primera respuesta sale enseguida, así que una
+# exportación de 100k productos no choca con el timeout del worker.
+#
+# Las cabeceras son las que entiende el importador (productos/importer.py):
+# un archivo exportado se puede editar y volver a importar.
+import csv
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def _name(obj):
+    return obj.name if obj is not None else ''
+
+
+def _yes_no(value):
+    return 'sí' if value else 'no'
+
+
+# (cabecera, valor)
+COLUMNS = (
+    ('sku', lambda p: p.sku),
+    ('nombre', lambda p: p.name),
+    ('proveedor', lambda p: _name(p.proveedor)),
+    ('categoria', lambda p: _name(p.category)),
+    ('subcategoria', lambda p: _name(p.subcategory)),
+    ('estatus', lambda p: _name(p.estatus)),
+    ('descripcion_corta', lambda p: p.short_description),
+    ('descripcion', lambda p: p.description),
+    ('precio', lambda p: p.price),
+    ('origen', lambda p: p.origen),
+    ('peso', lambda p: p.peso),
+    ('activo', lambda p: _yes_no(p.is_active)),
+    ('destacado', lambda p: _yes_no(p.destacado)),
+    ('en_oferta', lambda p: _yes_no(p.en_oferta)),
+)
+
+HEADERS = [header for header, _ in COLUMNS]
+
+
+def export_queryset(queryset):
+    """Solo las columnas exportadas, con las FK en el mismo JOIN"""
+    return queryset.select_related('proveedor', 'category', 'subcategory', 'estatus').only(
+        'sku', 'name', 'short_description', 'description', 'price', 'origen', 'peso',
+        'is_active', 'destacado', 'en_oferta',
+        'proveedor__name', 'category__name', 'subcategory__name', 'estatus__name',
+    )
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    for product in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield [value(product) for _, value in COLUMNS]
+
+
+# =================== CSV / JSONL ===================
+
+class Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo(), delimiter=';')
+    # BOM para que Excel abra el archivo en UTF-8
+    yield '\ufeff' + writer.writerow(HEADERS)
+    for row in iter_rows(queryset):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def stream_jsonl(queryset):
+    for row in iter_rows(queryset):
+        record = {
+            header: str(value) if value is not None and header in ('precio', 'peso') else value
+            for header, value in zip(HEADERS, row)
+        }
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+# =================== XLSX ===================
+# Un XLSX es un ZIP: se escribe con zipfile sobre un flujo no posicionable
+# (descriptores de datos al final de cada entrada) y cada trozo comprimido se
+# envía en cuanto está listo. No hace falta openpyxl.
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Productos" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '</Relationships>'
+)
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+# Caracteres de control que XML 1.0 no admite
+ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ChunkBuffer:
+    """Destino de zipfile que acumula los bytes hasta que el generador los recoge"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)) or hasattr(value, 'as_tuple'):  # Decimal
+        return f'<c><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_row(values):
+    return '<row>' + ''.join(xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(queryset, rows_per_chunk=500):
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr('xl/workbook.xml', WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            pending = [SHEET_START, xlsx_row(HEADERS)]
+            for row in iter_rows(queryset):
+                pending.append(xlsx_row(row))
+                if len(pending) >= rows_per_chunk:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            pending.append(SHEET_END)
+            sheet.write(''.join(pending).encode('utf-8'))
+    yield buffer.drain()
+
+
+STREAMS = {'csv': stream_csv, 'jsonl': stream_jsonl, 'xlsx': stream_xlsx}
+
+
+def stream_export(queryset, fmt):
+    """Generador con el contenido del archivo en el formato pedido"""
+    return STREAMS[fmt](queryset)
@@ -0,0 +1,75 @@
+# productos/facets.py
+# Conteos de facetas para la barra de filtros del catálogo
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from coimpres_cuba.db_router import primary_reads
+
+from .cache import catalog_cache_key
+from .models import Product
+from .search import search_products, tokenize
+
+# Faceta -> columna agrupada
+FACET_FIELDS = {
+    'category': 'category_id',
+    'subcategory': 'subcategory_id',
+    'proveedor': 'proveedor_id',
+    'estatus': 'estatus_id',
+    'en_oferta': 'en_oferta',
+    'destacado': 'destacado',
+}
+
+FACET_CACHE_TIMEOUT = 60 * 60
+
+
+def facet_signature(search_term, selected):
+    """Firma normalizada de los filtros: el orden y las mayúsculas no importan"""
+    terms = tuple(sorted(token.lower() for token in tokenize(search_term)))
+    return terms, tuple(sorted(selected.items()))
+
+
+def compute_facet_counts(search_term, selected):
+    """
+    Calcula los conteos de todas las facetas con una sola consulta agrupada.
+
+    Cada faceta se cuenta aplicando los demás filtros seleccionados pero no el
+    suyo propio, para que la barra muestre cuántos productos daría cada opción.
+    """
+    queryset = Product.objects.filter(is_active=True)
+    if search_term:
+        queryset = search_products(queryset, search_term)
+
+    columns = list(FACET_FIELDS.values())
+    groups = queryset.values(*columns).annotate(total=Count('pk')).order_by()
+
+    counts = {facet: defaultdict(int) for facet in FACET_FIELDS}
+    for group in groups:
+        for facet, column in FACET_FIELDS.items():
+            others_match = all(
+                group[FACET_FIELDS[other]] == value
+                for other, value in selected.items()
+                if other != facet
+            )
+            if others_match and group[column] is not None:
+                counts[facet][group[column]] += group['total']
+
+    return {
+        facet: dict(values) if facet not in ('en_oferta', 'destacado') else values.get(True, 0)
+        for facet, values in counts.items()
+    }
+
+
+def get_facet_counts(search_term, selected):
+    """
+    Conteos de facetas en caché por firma de filtros.
+    `selected` relaciona cada faceta con el id (o True) seleccionado.
+    """
+    key = catalog_cache_key('facets', facet_signature(search_term, selected))
+    counts = cache.get(key)
+    if counts is None:
+        with primary_reads():
+            counts = compute_facet_counts(search_term, selected)
+        cache.set(key, counts, FACET_CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,117 @@
+# productos/home_feed.py
+# Portada materializada: los 16 productos del collage y de "Destacados" con los
+# campos que usan sus tarjetas, listos para renderizar sin consultar el catálogo.
+#
+# Las filas se guardan en la caché compartida bajo la versión del grupo 'home'
+# (productos/cache.py) y cada proceso conserva en memoria las tarjetas de la
+# última versión. Las señales solo incrementan 'home' cuando el cambio se ve en
+# la portada (productos/signals.py): destacado, activo, imagen, los productos
+# que ya están en ella y los nombres de la taxonomía.
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db.models.fields.files import ImageFieldFile
+from django.urls import reverse
+
+from coimpres_cuba.db_router import primary_reads
+
+from .cache import get_versions
+from .models import Product
+
+HOME_PRODUCTS = 16
+FEED_CACHE_PREFIX = 'productos:home_feed:'
+FEED_TIMEOUT = 60 * 60 * 24 * 7
+
+# Campos de las tarjetas de la portada (coimpres_cuba/templates/coimpres_cuba/home.html)
+CARD_FIELDS = (
+    'pk', 'slug', 'name', 'short_description', 'price', 'image', 'destacado', 'en_oferta',
+    'category__name', 'subcategory__name', 'estatus__name',
+)
+
+# Campos cuyo cambio puede meter o sacar un producto de la portada: el filtro,
+# la imagen del collage y los del orden del modelo (destacado, en_oferta...)
+TRIGGER_FIELDS = ('is_active', 'image') + tuple(
+    name.lstrip('-') for name in Product._meta.ordering if name.lstrip('-') not in ('id', 'pk')
+)
+
+IMAGE_FIELD = Product._meta.get_field('image')
+
+# (versión, tarjetas) de este proceso
+_memory = (None, [])
+
+
+class HomeCard:
+    """Producto de la portada: solo lo que usan el collage y las tarjetas"""
+
+    def __init__(self, row):
+        self.pk = self.id = row['pk']
+        self.slug = row['slug']
+        self.name = row['name']
+        self.short_description = row['short_description']
+        self.price = row['price']
+        self.destacado = row['destacado']
+        self.en_oferta = row['en_oferta']
+        self.image = ImageFieldFile(None, IMAGE_FIELD, row['image']) if row['image'] else None
+        self.category = row['category__name'] or ''
+        self.subcategory = SimpleNamespace(name=row['subcategory__name']) if row['subcategory__name'] else None
+        self.estatus = SimpleNamespace(name=row['estatus__name']) if row['estatus__name'] else None
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('productos:product_detail', kwargs={'slug': self.slug})
+
+
+def build_home_feed():
+    """
+    Filas de la portada en una consulta: el orden del modelo ya pone primero los
+    destacados, y los demás productos activos completan hasta 16
+    """
+    return list(Product.objects.filter(is_active=True).values(*CARD_FIELDS)[:HOME_PRODUCTS])
+
+
+def _feed_key(version):
+    return f'{FEED_CACHE_PREFIX}{version}'
+
+
+def get_home_feed():
+    """Tarjetas de la portada: de la memoria del proceso, de la caché o reconstruidas"""
+    global _memory
+    version = get_versions(['home'])['home']
+    memory_version, cards = _memory
+    if memory_version == version:
+        return cards
+
+    rows = cache.get(_feed_key(version))
+    if rows is None:
+        with primary_reads():
+            rows = build_home_feed()
+        cache.set(_feed_key(version), rows, FEED_TIMEOUT)
+    cards = [HomeCard(row) for row in rows]
+    _memory = (version, cards)
+    return cards
+
+
+def in_home_feed(product_id):
+    """¿Está el producto en la portada actual? (True si no se sabe, para invalidar de más y no de menos)"""
+    version = get_versions(['home'])['home']
+    memory_version, cards = _memory
+    if memory_version == version:
+        return any(card.pk == product_id for card in cards)
+    rows = cache.get(_feed_key(version))
+    if rows is None:
+        return True
+    return any(row['pk'] == product_id for row in rows)
+
+
+def trigger_values(values):
+    """Valores de TRIGGER_FIELDS de un dict de .values(), comparables entre sí (imagen vacía: '')"""
+    return tuple((values[name] or '') if name == 'image' else values[name] for name in TRIGGER_FIELDS)
+
+
+def instance_trigger_values(product):
+    """trigger_values() de una instancia sin guardar todavía"""
+    values = {name: getattr(product, name) for name in TRIGGER_FIELDS}
+    values['image'] = product.image.name
+    return trigger_values(values)
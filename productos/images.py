@@ -0,0 +1,195 @@
+# productos/images.py
+# Variantes responsive (WebP/JPEG a varios anchos) de las imágenes de productos.
+# Se guardan junto al original: products/foo.jpg -> products/foo.w640.webp
+#
+# Al terminar de generarlas se escribe un manifiesto con los anchos de cada
+# formato (products/foo.renditions.json) y se guarda también en la caché: las
+# etiquetas de plantilla leen de ahí y no comprueban cada archivo en disco.
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = (320, 640, 960, 1280)
+
+# extensión -> (formato de Pillow, tipo MIME, opciones de guardado)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Segundos que se recuerda en caché que una imagen aún no tiene variantes
+MISSING_MANIFEST_TIMEOUT = 5 * 60
+
+_executor = None
+
+
+def rendition_name(name, width, ext):
+    """Nombre de la variante de una imagen para un ancho y formato"""
+    base, _ = os.path.splitext(name)
+    return f'{base}.w{width}.{ext}'
+
+
+def is_rendition(name):
+    """True si el nombre corresponde a una variante generada"""
+    stem = os.path.splitext(name)[0]
+    suffix = os.path.splitext(stem)[1]
+    return suffix.startswith('.w') and suffix[2:].isdigit()
+
+
+def manifest_name(name):
+    """Manifiesto de las variantes de una imagen: {'webp': [anchos], 'jpg': [anchos]}"""
+    base, _ = os.path.splitext(name)
+    return f'{base}.renditions.json'
+
+
+def manifest_cache_key(name):
+    return f'renditions:{name}'
+
+
+def has_renditions(name, storage=default_storage):
+    # El manifiesto se escribe el último: si existe, el original está procesado
+    return storage.exists(manifest_name(name))
+
+
+def read_manifest(name, storage=default_storage):
+    """Manifiesto de la imagen (None si aún no se generaron las variantes)"""
+    try:
+        with storage.open(manifest_name(name), 'rb') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(name, manifest, storage=default_storage):
+    target = manifest_name(name)
+    if storage.exists(target):
+        storage.delete(target)
+    storage.save(target, ContentFile(json.dumps(manifest).encode()))
+    cache.set(manifest_cache_key(name), manifest, None)
+
+
+def forget_manifest(name, storage=default_storage):
+    target = manifest_name(name)
+    if storage.exists(target):
+        storage.delete(target)
+    cache.delete(manifest_cache_key(name))
+
+
+def _encode(image, fmt, options):
+    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+        # JPEG no admite transparencia: componer sobre fondo blanco
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(name, storage=default_storage, force=False):
+    """
+    Genera las variantes de una imagen almacenada. Es idempotente: si ya están
+    generadas (y no se fuerza) no hace nada. Devuelve el número de archivos escritos.
+    """
+    if not name or is_rendition(name):
+        return 0
+    if not force and has_renditions(name, storage):
+        return 0
+    if force:
+        forget_manifest(name, storage)
+
+    with storage.open(name, 'rb') as fh:
+        original = Image.open(fh)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    # Nunca ampliar: solo anchos menores que el original (siempre al menos el más pequeño)
+    widths = [w for w in RENDITION_WIDTHS if w < original.width] or [RENDITION_WIDTHS[0]]
+
+    pending = []
+    for width in widths:
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.LANCZOS)
+        for ext, (fmt, _, options) in RENDITION_FORMATS.items():
+            pending.append((rendition_name(name, width, ext), resized, fmt, options))
+
+    # Las variantes que ya existen (proceso interrumpido) no se vuelven a codificar
+    written = 0
+    for target, image, fmt, options in pending:
+        if storage.exists(target):
+            if not force:
+                continue
+            storage.delete(target)
+        storage.save(target, ContentFile(_encode(image, fmt, options)))
+        written += 1
+
+    # El manifiesto va al final para que un proceso interrumpido se reanude
+    write_manifest(name, {ext: widths for ext in RENDITION_FORMATS}, storage)
+    return written
+
+
+def delete_renditions(name, storage=default_storage):
+    """Elimina las variantes de una imagen (p. ej. al borrar el original)"""
+    forget_manifest(name, storage)
+    for width in RENDITION_WIDTHS:
+        for ext in RENDITION_FORMATS:
+            target = rendition_name(name, width, ext)
+            if storage.exists(target):
+                storage.delete(target)
+
+
+def available_renditions(name, storage=default_storage):
+    """
+    Variantes generadas de una imagen: {'webp': [(url, ancho), ...], 'jpg': [...]}.
+    Sale del manifiesto en caché; sin caché se lee el manifiesto (una sola
+    lectura) y se guarda. Que aún no hay variantes se recuerda unos minutos.
+    """
+    renditions = {ext: [] for ext in RENDITION_FORMATS}
+    if not name:
+        return renditions
+    key = manifest_cache_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = read_manifest(name, storage)
+        if manifest is None:
+            manifest = {}
+            cache.set(key, manifest, MISSING_MANIFEST_TIMEOUT)
+        else:
+            cache.set(key, manifest, None)
+    for ext in renditions:
+        renditions[ext] = [(storage.url(rendition_name(name, width, ext)), width) for width in manifest.get(ext, [])]
+    return renditions
+
+
+def get_executor():
+    """Pool de hilos del proceso para generar variantes fuera de la petición"""
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'IMAGE_RENDITION_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='renditions')
+    return _executor
+
+
+def _generate_safely(name):
+    try:
+        generate_renditions(name)
+    except Exception:
+        logger.exception('Error generando variantes de %s', name)
+
+
+def schedule_renditions(name):
+    """Programa la generación de variantes cuando se confirme la transacción"""
+    if name and not is_rendition(name):
+        transaction.on_commit(lambda: get_executor().submit(_generate_safely, name))
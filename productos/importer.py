@@ -0,0 +1,401 @@
+# productos/importer.py
+# Importación masiva de listas de precios de proveedores (CSV / XLSX)
+#
+# El archivo se lee fila a fila (nunca entero en memoria) y se escribe por lotes
+# con bulk_create / bulk_update, cada lote en su propia transacción. Proveedor,
+# categoría, subcategoría y estatus se resuelven por nombre con mapas en memoria.
+#
+# Cada producto importado guarda el hash de su fila: al reimportar el mismo
+# archivo solo se tocan las filas que han cambiado.
+import csv
+import hashlib
+import io
+import unicodedata
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import bump_versions, product_groups
+from .counters import apply_deltas, counted_relations, product_values, relation_deltas
+from .models import Category, Estatus, Product, Proveedor, Subcategory
+from .related import schedule_related_refresh
+from .search import get_search_backend
+from .sku import allocate_skus, sku_prefix
+from .summaries import rebuild_summaries
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - solo hace falta para .xlsx
+    openpyxl = None
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+# Cabecera normalizada -> campo
+COLUMN_ALIASES = {
+    'sku': 'sku', 'codigo': 'sku', 'code': 'sku', 'referencia': 'sku',
+    'nombre': 'name', 'name': 'name', 'producto': 'name',
+    'proveedor': 'proveedor', 'supplier': 'proveedor', 'fornitore': 'proveedor',
+    'categoria': 'category', 'category': 'category',
+    'subcategoria': 'subcategory', 'subcategory': 'subcategory',
+    'estatus': 'estatus', 'estado': 'estatus', 'status': 'estatus',
+    'descripcion_corta': 'short_description', 'short_description': 'short_description',
+    'descripcion': 'description', 'description': 'description',
+    'precio': 'price', 'price': 'price', 'prezzo': 'price',
+    'origen': 'origen', 'pais_de_origen': 'origen', 'origin': 'origen',
+    'peso': 'peso', 'peso_kg': 'peso', 'weight': 'peso',
+    'activo': 'is_active', 'is_active': 'is_active',
+    'destacado': 'destacado', 'en_oferta': 'en_oferta', 'oferta': 'en_oferta',
+}
+
+# Campos que se escriben en Product (además de las FK)
+TEXT_FIELDS = ('name', 'short_description', 'description', 'origen')
+DECIMAL_FIELDS = ('price', 'peso')
+BOOLEAN_FIELDS = ('is_active', 'destacado', 'en_oferta')
+UPDATE_FIELDS = (
+    TEXT_FIELDS + DECIMAL_FIELDS + BOOLEAN_FIELDS
+    + ('proveedor_id', 'category_id', 'subcategory_id', 'estatus_id', 'import_hash', 'updated_at')
+)
+
+TRUE_VALUES = {'1', 'si', 'sí', 'yes', 'true', 'x', 'verdadero'}
+
+
+class RowError(Exception):
+    """Error de una fila concreta (se informa y la fila se salta)"""
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+    taxonomy_created: int = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def normalize_header(value):
+    value = unicodedata.normalize('NFKD', str(value or '').strip().lower())
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return value.replace(' ', '_').replace('-', '_')
+
+
+# =================== LECTORES ===================
+
+def _map_headers(headers):
+    mapping = {}
+    for index, header in enumerate(headers):
+        target = COLUMN_ALIASES.get(normalize_header(header))
+        if target and target not in mapping.values():
+            mapping[index] = target
+    if 'name' not in mapping.values():
+        raise ValueError('El archivo necesita una columna "nombre"')
+    return mapping
+
+
+def read_csv(fileobj, encoding='utf-8-sig'):
+    """Filas (número de línea, dict) de un CSV binario, detectando el separador (, ; tab)"""
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    mapping = _map_headers(next(reader, []))
+    for line, row in enumerate(reader, start=2):
+        if any(cell.strip() for cell in row):
+            yield line, {name: row[i] for i, name in mapping.items() if i < len(row)}
+
+
+def read_xlsx(fileobj):
+    """Filas (número de línea, dict) de la primera hoja de un XLSX, en modo streaming"""
+    if openpyxl is None:
+        raise ValueError('Para importar XLSX se necesita openpyxl: pip install openpyxl')
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        mapping = _map_headers(next(rows, ()))
+        for line, row in enumerate(rows, start=2):
+            if any(cell not in (None, '') for cell in row):
+                yield line, {
+                    name: '' if row[i] is None else str(row[i])
+                    for i, name in mapping.items() if i < len(row)
+                }
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename, encoding='utf-8-sig'):
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        return read_xlsx(fileobj)
+    return read_csv(fileobj, encoding)
+
+
+# =================== LIMPIEZA DE VALORES ===================
+
+def parse_decimal(value):
+    """
+    Admite '1234.5', '1234,5', '1.234,50', '1,234.50' y '1.234.567'. Con los dos
+    separadores, el último es el decimal; los de miles van de tres en tres y un
+    número que no encaja se rechaza en vez de guardarse con otro valor.
+    """
+    value = (value or '').strip().replace(' ', '').replace('€', '').replace('$', '')
+    if not value:
+        return None
+    if ',' in value and '.' in value:
+        mark = ',' if value.rfind(',') > value.rfind('.') else '.'
+        integer, fraction = value.rsplit(mark, 1)
+        thousands = '.' if mark == ',' else ','
+    elif value.count(',') == 1 or value.count('.') == 1:
+        integer, fraction = value.replace(',', '.').split('.')
+        thousands = None
+    else:
+        # Sin decimales, o solo separadores de miles
+        integer, fraction = value, ''
+        thousands = ',' if ',' in value else '.'
+    groups = integer.split(thousands) if thousands else [integer]
+    if any(len(group) != 3 for group in groups[1:]):
+        raise RowError(f'Número no válido: {value}')
+    try:
+        return Decimal(f'{"".join(groups)}.{fraction}' if fraction else ''.join(groups))
+    except InvalidOperation:
+        raise RowError(f'Número no válido: {value}')
+
+
+def parse_boolean(value, default):
+    value = (value or '').strip().lower()
+    if not value:
+        return default
+    return value in TRUE_VALUES
+
+
+# =================== TAXONOMÍA ===================
+
+class TaxonomyMaps:
+    """Mapas nombre -> objeto cargados una vez; lo que falta se crea al vuelo"""
+
+    def __init__(self, create_missing=True):
+        self.create_missing = create_missing
+        self.created = 0
+        self.proveedores = {self.key(p.name): p for p in Proveedor.objects.all()}
+        self.categories = {self.key(c.name): c for c in Category.objects.all()}
+        self.estatus = {self.key(e.name): e for e in Estatus.objects.all()}
+        self.subcategories = {
+            (s.category_id, self.key(s.name)): s for s in Subcategory.objects.all()
+        }
+
+    @staticmethod
+    def key(name):
+        return ' '.join(str(name).split()).lower()
+
+    def _resolve(self, mapping, key, label, factory):
+        obj = mapping.get(key)
+        if obj is None:
+            if not self.create_missing:
+                raise RowError(f'{label} desconocido')
+            obj = mapping[key] = factory()
+            self.created += 1
+        return obj
+
+    def proveedor(self, name):
+        if not name.strip():
+            return None
+        slug = slugify(name)
+        return self._resolve(
+            self.proveedores, self.key(name), f'Proveedor "{name}"',
+            lambda: Proveedor.objects.create(name=name.strip(), id_unico=slug.upper()[:50]),
+        )
+
+    def category(self, name):
+        if not name.strip():
+            return None
+        return self._resolve(
+            self.categories, self.key(name), f'Categoría "{name}"',
+            lambda: Category.objects.create(name=name.strip()),
+        )
+
+    def subcategory(self, name, category):
+        if not name.strip():
+            return None
+        if category is None:
+            raise RowError(f'Subcategoría "{name}" sin categoría')
+        return self._resolve(
+            self.subcategories, (category.pk, self.key(name)), f'Subcategoría "{name}"',
+            lambda: Subcategory.objects.create(name=name.strip(), category=category),
+        )
+
+    def estado(self, name):
+        if not name.strip():
+            return None
+        return self._resolve(
+            self.estatus, self.key(name), f'Estatus "{name}"',
+            lambda: Estatus.objects.create(name=name.strip()),
+        )
+
+
+# =================== IMPORTACIÓN ===================
+
+def clean_row(row, maps, default_proveedor=None):
+    """Valores listos para Product a partir de una fila del archivo"""
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise RowError('Fila sin nombre')
+
+    values = {field: (row.get(field) or '').strip() for field in TEXT_FIELDS}
+    for field in DECIMAL_FIELDS:
+        values[field] = parse_decimal(row.get(field))
+    values['is_active'] = parse_boolean(row.get('is_active'), True)
+    values['destacado'] = parse_boolean(row.get('destacado'), False)
+    values['en_oferta'] = parse_boolean(row.get('en_oferta'), False)
+
+    proveedor = maps.proveedor(row.get('proveedor') or '') or default_proveedor
+    category = maps.category(row.get('category') or '')
+    values['proveedor_id'] = proveedor.pk if proveedor else None
+    values['category_id'] = category.pk if category else None
+    values['subcategory_id'] = getattr(maps.subcategory(row.get('subcategory') or '', category), 'pk', None)
+    values['estatus_id'] = getattr(maps.estado(row.get('estatus') or ''), 'pk', None)
+
+    signature = repr(sorted((key, str(value)) for key, value in values.items()))
+    values['import_hash'] = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+    sku = (row.get('sku') or '').strip()
+    names = (proveedor.name if proveedor else '', category.name if category else '')
+    return sku, values, names
+
+
+def name_slugs(values, names):
+    """
+    Slugs con los que se guarda un producto sin SKU: el de su nombre o, si ese
+    ya lo usa un producto de otro proveedor, el del nombre con el proveedor
+    """
+    base = slugify(values['name'])
+    return [base, slugify(f'{values["name"]} {names[0]}')] if names[0] else [base]
+
+
+def write_batch(batch, result):
+    """Crea o actualiza un lote de filas ya limpias: [(línea, sku, values, names)]"""
+    skus = [sku for _, sku, _, _ in batch if sku]
+    slugs = {slug for _, _, values, names in batch for slug in name_slugs(values, names)}
+    existing = list(Product.objects.filter(Q(sku__in=skus) | Q(slug__in=slugs)).order_by())
+    by_sku = {p.sku: p for p in existing if p.sku}
+    by_slug = {p.slug: p for p in existing}
+    counted_before = {p.pk: counted_relations(product_values(p)) for p in existing}
+    # Grupos de caché de antes del lote: un producto que cambia de proveedor o
+    # de categoría también invalida las páginas del anterior
+    groups_before = {p.pk: product_groups(p.pk, p.category_id, p.proveedor_id) for p in existing}
+
+    now = timezone.now()
+    to_create, to_update, seen = [], [], set()
+    assigned = set()  # slugs de los productos nuevos de este lote
+
+    def is_free(slug):
+        if not slug or slug in by_slug or slug in assigned:
+            return False
+        return slug in slugs or not Product.objects.filter(slug=slug).exists()
+
+    without_sku = {}
+    for line, sku, values, names in batch:
+        slug = slugify(values['name'])
+        if sku:
+            product = by_sku.get(sku)
+        else:
+            # Sin SKU solo se actualiza un producto del mismo proveedor con ese nombre
+            product = next((
+                by_slug[candidate] for candidate in name_slugs(values, names)
+                if candidate in by_slug and by_slug[candidate].proveedor_id == values['proveedor_id']
+            ), None)
+        key = product.pk if product else (sku or (values['proveedor_id'], slug))
+        if key in seen:
+            result.add_error(line, 'Fila duplicada en el mismo lote (se usa la primera)')
+            continue
+        seen.add(key)
+
+        if product is None:
+            # Si el nombre ya lo usa otro producto (en la base o en este lote): con el código o el proveedor
+            fallback = slugify(f'{values["name"]} {sku or names[0]}')
+            slug = next((candidate for candidate in (slug, fallback) if is_free(candidate)), None)
+            if slug is None:
+                slug = slugify(f'{values["name"]} {sku} {uuid.uuid4().hex[:6]}')
+            assigned.add(slug)
+            product = Product(slug=slug, sku=sku, created_at=now, updated_at=now, **values)
+            to_create.append(product)
+            if not sku:
+                without_sku.setdefault(sku_prefix(*names), []).append(product)
+        elif product.import_hash == values['import_hash']:
+            result.unchanged += 1
+        else:
+            for field_name, value in values.items():
+                setattr(product, field_name, value)
+            product.updated_at = now
+            to_update.append(product)
+
+    with transaction.atomic():
+        # Un bloque de SKU por prefijo para todo el lote
+        for prefix, products in without_sku.items():
+            for product, new_sku in zip(products, allocate_skus(prefix, len(products))):
+                product.sku = new_sku
+        created = Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+        touched = created + to_update
+
+        # bulk_create / bulk_update no disparan señales: índice, caché y relacionados a mano
+        if touched:
+            backend = get_search_backend()
+            if not all(p.pk for p in created):
+                created = list(Product.objects.filter(sku__in=[p.sku for p in to_create]))
+                touched = created + to_update
+            for product in touched:
+                backend.index_product(product)
+            ids = [p.pk for p in touched]
+            groups = ['catalog', 'home']
+            for product in touched:
+                groups += groups_before.get(product.pk, [])
+                groups += product_groups(product.pk, product.category_id, product.proveedor_id)
+            transaction.on_commit(lambda: bump_versions(*groups))
+            # Proveedores de antes (existing) y de después del lote
+            rebuild_summaries({p.proveedor_id for p in existing} | {p.proveedor_id for p in touched})
+            # Contadores de la taxonomía: de lo que contaba cada producto a lo que cuenta ahora
+            deltas = relation_deltas({}, {})
+            for product in touched:
+                relation_deltas(counted_before.get(product.pk, {}), counted_relations(product_values(product)), deltas)
+            apply_deltas(deltas)
+            schedule_related_refresh(ids)
+
+    result.created += len(created)
+    result.updated += len(to_update)
+
+
+def import_catalog(rows, default_proveedor=None, create_missing=True, batch_size=BATCH_SIZE):
+    """
+    Importa las filas de read_rows(). La memoria usada depende del tamaño del
+    lote, no del archivo. Devuelve un ImportResult.
+    """
+    result = ImportResult()
+    maps = TaxonomyMaps(create_missing=create_missing)
+    batch = []
+    for line, row in rows:
+        try:
+            sku, values, names = clean_row(row, maps, default_proveedor)
+        except RowError as exc:
+            result.add_error(line, str(exc))
+            continue
+        batch.append((line, sku, values, names))
+        if len(batch) >= batch_size:
+            write_batch(batch, result)
+            batch = []
+    if batch:
+        write_batch(batch, result)
+    result.taxonomy_created = maps.created
+    return result
@@ -0,0 +1,219 @@
+# productos/jobs.py
+# Cola de trabajos en segundo plano guardada en la base de datos (modelo Job),
+# sin brokers externos: las vistas encolan con enqueue() y `manage.py run_jobs`
+# los ejecuta en un pool de hilos.
+#
+# - Tareas: funciones registradas con @task('nombre') (productos/tasks.py),
+#   que reciben el payload JSON como argumentos con nombre.
+# - Idempotencia: enqueue(..., key=...) devuelve el trabajo existente con esa
+#   clave en vez de crear otro. Las tareas deben poder repetirse sin efectos
+#   dobles, porque un worker caído a mitad deja el trabajo para reintentar.
+# - Reintentos: si la tarea lanza una excepción se reprograma con espera
+#   exponencial (JOBS_BACKOFF_BASE · 2^(intento-1), hasta JOBS_BACKOFF_MAX) y
+#   pasa a fallido tras max_attempts intentos.
+# - Reparto: cada worker reclama trabajos con un UPDATE condicional sobre el
+#   estado, así dos workers (o dos hilos) nunca ejecutan el mismo trabajo.
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Registra una función como tarea de la cola"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+# =================== ENCOLAR ===================
+
+def enqueue(name, payload=None, key=None, delay=0, max_attempts=None):
+    """
+    Encola la tarea `name` y devuelve su Job. Con `key`, si ya existe un
+    trabajo con esa clave se devuelve ese y no se crea otro.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Tarea desconocida: {name}')
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'run_after': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts or setting('JOBS_MAX_ATTEMPTS', 5),
+    }
+    if key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(idempotency_key=key, **fields)
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=key)
+
+
+def enqueue_on_commit(name, payload=None, key=None, **kwargs):
+    """Encola cuando se confirme la transacción (los datos que usa la tarea ya son visibles)"""
+    transaction.on_commit(lambda: enqueue(name, payload, key=key, **kwargs))
+
+
+def enqueue_debounced(name, ids, delay):
+    """
+    Junta `ids` con los del trabajo pendiente de la tarea `name` (payload
+    {'ids': [...]}) o, si no hay ninguno, lo crea para dentro de `delay`
+    segundos: muchos cambios seguidos se procesan en una sola ejecución.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update()
+            .filter(name=name, status=Job.PENDING, idempotency_key__isnull=True)
+            .order_by('run_after', 'pk')
+            .first()
+        )
+        if job is None:
+            return enqueue(name, {'ids': sorted(set(ids))}, delay=delay)
+        job.payload = {'ids': sorted(set(job.payload.get('ids', [])) | set(ids))}
+        job.save(update_fields=['payload'])
+        return job
+
+
+# =================== EJECUTAR ===================
+
+def backoff(attempts):
+    """Segundos hasta el siguiente intento tras `attempts` intentos fallidos"""
+    base = setting('JOBS_BACKOFF_BASE', 10)
+    return min(base * 2 ** (attempts - 1), setting('JOBS_BACKOFF_MAX', 3600))
+
+
+def recover_stale_jobs():
+    """Devuelve a la cola los trabajos en curso de un worker que murió (sin terminar en JOBS_STALE_AFTER)"""
+    limit = timezone.now() - timedelta(seconds=setting('JOBS_STALE_AFTER', 15 * 60))
+    return Job.objects.filter(status=Job.RUNNING, started_at__lt=limit).update(status=Job.PENDING, worker='')
+
+
+def claim_jobs(limit, worker=None):
+    """Reclama hasta `limit` trabajos pendientes ya vencidos, en orden de ejecución"""
+    worker = worker or worker_name()
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.PENDING, run_after__lte=now)
+        .order_by('run_after', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+    claimed = []
+    for pk in candidates:
+        # Solo uno de los workers que compiten por el trabajo lo pasa a "en curso"
+        updated = Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, worker=worker, started_at=now, attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_after', 'pk'))
+
+
+def run_job(job):
+    """Ejecuta un trabajo reclamado y guarda el resultado (completado, reintento o fallido)"""
+    try:
+        func = TASKS.get(job.name)
+        if func is None:
+            raise LookupError(f'Tarea desconocida: {job.name}')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Error en el trabajo %s', job)
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.PENDING, last_error=error, worker='',
+                run_after=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=error, finished_at=timezone.now())
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, finished_at=timezone.now())
+    return True
+
+
+def run_job_in_thread(job):
+    """run_job() para un hilo del pool: conexiones propias y cerradas al terminar"""
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit=100, executor=None):
+    """Reclama y ejecuta los trabajos vencidos (en el pool si se indica). Devuelve cuántos se ejecutaron"""
+    jobs = claim_jobs(limit)
+    if executor is None:
+        for job in jobs:
+            run_job(job)
+    else:
+        list(executor.map(run_job_in_thread, jobs))
+    return len(jobs)
+
+
+def purge_finished_jobs():
+    """Elimina los trabajos completados hace más de JOBS_RETENTION_DAYS (los fallidos se conservan)"""
+    limit = timezone.now() - timedelta(days=setting('JOBS_RETENTION_DAYS', 7))
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=limit).delete()
+    return deleted
+
+
+def retry_jobs(queryset):
+    """Vuelve a encolar trabajos fallidos (acción del admin)"""
+    return queryset.filter(status=Job.FAILED).update(
+        status=Job.PENDING, attempts=0, run_after=timezone.now(), finished_at=None, worker='',
+    )
+
+
+# =================== ESTADO ===================
+
+def job_summary():
+    """{estado: número de trabajos} para el panel de staff"""
+    counts = dict(Job.objects.values_list('status').annotate(total=Count('pk')).order_by())
+    return {status: counts.get(status, 0) for status, _ in Job.STATUS_CHOICES}
+
+
+def job_backlog():
+    """
+    Aviso para el panel: trabajos pendientes que llevan más de JOBS_BACKLOG_WARNING
+    segundos vencidos (no hay worker o no da abasto) y trabajos fallidos
+    """
+    limit = timezone.now() - timedelta(seconds=setting('JOBS_BACKLOG_WARNING', 5 * 60))
+    overdue = Job.objects.filter(status=Job.PENDING, run_after__lt=limit).count()
+    failed = Job.objects.filter(status=Job.FAILED).count()
+    return {'overdue': overdue, 'failed': failed} if overdue or failed else None
+
+
+def job_state(job):
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'run_after': job.run_after.isoformat(),
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'last_error': job.last_error.strip().splitlines()[-1] if job.last_error else '',
+    }
@@ -0,0 +1,148 @@
+# productos/management/commands/benchmark.py
+import json
+import os
+import platform
+import shutil
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from productos.benchmark import (
+    DRIVERS, build_scenarios, compare_results, run_scenario, seed_products, staff_cookie,
+)
+
+
+def int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark del catálogo sobre una base de datos desechable: siembra N productos, '
+        'lanza peticiones WSGI o ASGI concurrentes y compara p50/p95/p99 y throughput con una línea base'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int_list, default=[1000, 10000, 100000],
+                            help='Tamaños del catálogo, separados por comas (por defecto 1000,10000,100000)')
+        parser.add_argument('--concurrency', type=int_list, default=[1, 4, 16],
+                            help='Niveles de concurrencia, separados por comas (por defecto 1,4,16)')
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones por escenario y nivel')
+        parser.add_argument('--scenarios', default='', help='Solo estos escenarios (separados por comas)')
+        parser.add_argument('--cold', action='store_true', help='Sin caché de páginas (mide el render completo)')
+        parser.add_argument('--writers', type=int, default=0,
+                            help='Hilos que simulan ediciones del panel durante la medición')
+        parser.add_argument('--driver', choices=sorted(DRIVERS), default='wsgi',
+                            help='wsgi: vistas síncronas; asgi: vistas públicas asíncronas en un bucle de eventos')
+        parser.add_argument('--output', default='benchmark-results.json', help='Archivo JSON de resultados')
+        parser.add_argument('--baseline', default='', help='Archivo JSON de línea base con el que comparar')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Regresión tolerada, en fracción (0.2 = 20%% peor en p95 o throughput)')
+        parser.add_argument('--save-baseline', action='store_true', help='Guarda los resultados como línea base')
+
+    def handle(self, *args, **options):
+        selected = {name for name in options['scenarios'].split(',') if name}
+        workdir = tempfile.mkdtemp(prefix='coimpre-bench-')
+        overrides = override_settings(
+            DEBUG=False,  # como en producción: sin registrar cada consulta en memoria
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            PAGE_CACHE_ENABLED=not options['cold'],
+            RELATED_PRODUCTS_AUTO_REFRESH=False,
+            METRICS_DIR=os.path.join(workdir, 'metrics'),
+            SITEMAP_ROOT=os.path.join(workdir, 'sitemaps'),
+            ASYNC_PUBLIC_VIEWS=options['driver'] == 'asgi',
+            # Como en coimpres_cuba/settings.py: con ASGI sin WhiteNoise (solo síncrono)
+            MIDDLEWARE=[
+                name for name in settings.MIDDLEWARE
+                if options['driver'] == 'wsgi' or not name.startswith('whitenoise.')
+            ],
+        )
+
+        # Base de datos desechable; en SQLite un archivo para que la compartan los hilos
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        self.stdout.write('Creando base de datos desechable...')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        results = {}
+        try:
+            with overrides:
+                driver = DRIVERS[options['driver']]()
+                for size in sorted(options['sizes']):
+                    results[str(size)] = self.run_size(driver, size, options, selected)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'driver': options['driver'],
+                'writers': options['writers'],
+                'db_profile': os.environ.get('DB_PROFILE', 'sqlite'),
+                'db_init_command': connection.settings_dict.get('OPTIONS', {}).get('init_command', ''),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'\nResultados guardados en {options["output"]}'))
+
+        if options['baseline']:
+            self.check_baseline(options['baseline'], report, options)
+
+    def run_size(self, driver, size, options, selected):
+        self.stdout.write(f'\nSembrando {size} productos...')
+        seed_products(size)
+        cookie = staff_cookie()
+
+        self.stdout.write(
+            f'{"escenario":<18} {"c":>4} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>9} {"errores":>8}'
+            + (f' {"escrituras":>11}' if options['writers'] else '')
+        )
+        scenarios = {}
+        for name, urls, needs_staff in build_scenarios():
+            if selected and name not in selected:
+                continue
+            scenarios[name] = {}
+            for concurrency in options['concurrency']:
+                stats = run_scenario(
+                    driver, urls, options['requests'], concurrency,
+                    cookie=cookie if needs_staff else None, writers=options['writers'],
+                )
+                scenarios[name][str(concurrency)] = stats
+                self.stdout.write(
+                    f'{name:<18} {concurrency:>4} {stats["p50_ms"]:>9} {stats["p95_ms"]:>9} '
+                    f'{stats["p99_ms"]:>9} {stats["throughput_rps"]:>9} {stats["errors"]:>8}'
+                    + (f' {stats["writes"]:>6}/{stats["write_errors"]:<4}' if options['writers'] else '')
+                )
+        return scenarios
+
+    def check_baseline(self, path, report, options):
+        if options['save_baseline'] or not os.path.exists(path):
+            with open(path, 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Línea base guardada en {path}'))
+            return
+
+        with open(path) as fh:
+            baseline = json.load(fh)
+        regressions = compare_results(report['results'], baseline.get('results', {}), options['threshold'])
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f'  {line}'))
+            raise CommandError(
+                f'{len(regressions)} regresiones por encima del {options["threshold"]:.0%} respecto a {path}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones respecto a {path} (umbral {options["threshold"]:.0%})'))
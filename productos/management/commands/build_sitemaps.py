@@ -0,0 +1,23 @@
+# productos/management/commands/build_sitemaps.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.sitemap_files import build_sitemaps, load_manifest
+
+
+class Command(BaseCommand):
+    help = 'Regenera los sitemaps .xml.gz en disco (solo reescribe los tramos que han cambiado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='',
+                            help='URL pública del sitio, p. ej. https://coimpre.pythonanywhere.com '
+                                 '(por defecto SITEMAP_BASE_URL o la del último índice servido)')
+
+    def handle(self, *args, **options):
+        manifest = load_manifest() or {}
+        base_url = (options['base_url'] or settings.SITEMAP_BASE_URL or manifest.get('base_url', '')).rstrip('/')
+        if not base_url:
+            raise CommandError('Indica --base-url o SITEMAP_BASE_URL')
+        written = build_sitemaps(base_url)
+        total = len(load_manifest()['shards'])
+        self.stdout.write(self.style.SUCCESS(f'Sitemaps generados: {written} de {total} archivos reescritos'))
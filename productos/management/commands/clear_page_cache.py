@@ -0,0 +1,12 @@
+# productos/management/commands/clear_page_cache.py
+from django.core.management.base import BaseCommand
+
+from productos.cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Invalida todas las páginas públicas cacheadas (usar tras cada despliegue)'
+
+    def handle(self, *args, **options):
+        bump_versions('site')
+        self.stdout.write(self.style.SUCCESS('Caché de páginas invalidada'))
@@ -0,0 +1,55 @@
+# productos/management/commands/generate_image_renditions.py
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from productos.images import generate_renditions, has_renditions
+from productos.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las variantes responsive (WebP/JPEG) de las imágenes existentes. '
+        'Es reanudable: las imágenes ya procesadas (con manifiesto) se omiten salvo con --force, '
+        'y las variantes que ya existen no se vuelven a codificar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Hilos en paralelo (por defecto 4)')
+        parser.add_argument('--force', action='store_true', help='Regenerar aunque ya existan variantes')
+
+    def collect_names(self):
+        names = set(Product.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+        names.update(ProductImage.objects.exclude(image='').values_list('image', flat=True))
+        return sorted(names)
+
+    def handle(self, *args, **options):
+        names = self.collect_names()
+        if not options['force']:
+            pending = [name for name in names if not has_renditions(name)]
+            self.stdout.write(f'{len(names) - len(pending)} imágenes ya procesadas, se omiten')
+            names = pending
+
+        self.stdout.write(f'Procesando {len(names)} imágenes con {options["workers"]} hilos...')
+        start = time.perf_counter()
+        done = written = errors = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = {
+                executor.submit(generate_renditions, name, force=options['force']): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                done += 1
+                try:
+                    written += future.result()
+                except Exception as e:
+                    errors += 1
+                    self.stderr.write(f'Error en {futures[future]}: {e}')
+                if done % 50 == 0:
+                    self.stdout.write(f'  {done}/{len(names)}')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Listo: {done - errors} imágenes, {written} variantes escritas, {errors} errores en {elapsed:.1f}s'
+        ))
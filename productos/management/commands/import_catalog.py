@@ -0,0 +1,56 @@
+# productos/management/commands/import_catalog.py
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from productos.importer import BATCH_SIZE, import_catalog, read_rows
+from productos.models import Proveedor
+
+
+class Command(BaseCommand):
+    help = 'Importa la lista de precios de un proveedor (CSV o XLSX) por lotes; al reimportar solo toca las filas cambiadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .xlsx')
+        parser.add_argument('--proveedor', default='', help='Proveedor (nombre) de las filas sin columna proveedor')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Filas por lote/transacción')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificación del CSV (p. ej. latin-1)')
+        parser.add_argument('--no-create', action='store_true',
+                            help='No crear proveedores/categorías/subcategorías/estatus desconocidos')
+        parser.add_argument('--dry-run', action='store_true', help='Procesa el archivo sin guardar nada')
+
+    def handle(self, *args, **options):
+        default_proveedor = None
+        if options['proveedor']:
+            default_proveedor = Proveedor.objects.filter(name__iexact=options['proveedor']).first()
+            if default_proveedor is None:
+                raise CommandError(f'Proveedor "{options["proveedor"]}" no encontrado')
+
+        start = time.perf_counter()
+        # Sin --dry-run cada lote va en su propia transacción; en simulación, todo se deshace
+        atomic = transaction.atomic() if options['dry_run'] else nullcontext()
+        try:
+            with open(options['path'], 'rb') as fh, atomic:
+                result = import_catalog(
+                    read_rows(fh, options['path'], options['encoding']),
+                    default_proveedor=default_proveedor,
+                    create_missing=not options['no_create'],
+                    batch_size=max(options['batch_size'], 1),
+                )
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        for line, message in result.errors:
+            self.stdout.write(self.style.WARNING(f'  línea {line}: {message}'))
+        if result.error_count > len(result.errors):
+            self.stdout.write(self.style.WARNING(f'  ... y {result.error_count - len(result.errors)} errores más'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{"[simulación] " if options["dry_run"] else ""}'
+            f'Creados: {result.created} | Actualizados: {result.updated} | Sin cambios: {result.unchanged} | '
+            f'Errores: {result.error_count} | Taxonomía nueva: {result.taxonomy_created} | {elapsed:.1f}s'
+        ))
@@ -0,0 +1,56 @@
+# productos/management/commands/profile_context_processors.py
+import time
+
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory
+from django.utils.functional import LazyObject
+
+
+class Command(BaseCommand):
+    help = 'Mide el coste por render de cada context processor configurado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='Renders simulados por processor')
+        parser.add_argument('--path', default='/', help='Ruta de la petición simulada')
+        parser.add_argument('--lang', default='', help='Valor del parámetro ?lang= (opcional)')
+
+    def build_request(self, path, lang):
+        """Petición con sesión, usuario y mensajes, como la ve una plantilla real"""
+        request = RequestFactory().get(path, {'lang': lang} if lang else {})
+        for middleware in (SessionMiddleware, AuthenticationMiddleware, MessageMiddleware):
+            middleware(lambda r: HttpResponse()).process_request(request)
+        return request
+
+    def handle(self, *args, **options):
+        iterations = max(options['iterations'], 1)
+        processors = engines['django'].engine.template_context_processors
+
+        self.stdout.write(f'Context processors: {len(processors)} | {iterations} renders por processor\n')
+        self.stdout.write(f'{"processor":<60} {"media (µs)":>12} {"p95 (µs)":>12}')
+
+        total = 0.0
+        for processor in processors:
+            name = f'{processor.__module__}.{processor.__qualname__}'
+            samples = []
+            for _ in range(iterations):
+                request = self.build_request(options['path'], options['lang'])
+                start = time.perf_counter()
+                context = processor(request)
+                # Forzar los valores perezosos como lo haría la plantilla al usarlos
+                for value in context.values():
+                    if isinstance(value, LazyObject):
+                        bool(value)
+                samples.append(time.perf_counter() - start)
+
+            samples.sort()
+            mean = sum(samples) / len(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            total += mean
+            self.stdout.write(f'{name:<60} {mean * 1e6:>12.1f} {p95 * 1e6:>12.1f}')
+
+        self.stdout.write(self.style.SUCCESS(f'\nCoste total por render: {total * 1e6:.1f} µs'))
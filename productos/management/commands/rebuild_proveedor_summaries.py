@@ -0,0 +1,14 @@
+# productos/management/commands/rebuild_proveedor_summaries.py
+from django.core.management.base import BaseCommand
+
+from productos.models import ProveedorCategorySummary
+from productos.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen de productos activos por proveedor y categoría'
+
+    def handle(self, *args, **options):
+        rebuild_summaries()
+        total = ProveedorCategorySummary.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes de proveedores recalculados: {total} filas'))
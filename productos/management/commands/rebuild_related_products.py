@@ -0,0 +1,15 @@
+# productos/management/commands/rebuild_related_products.py
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.related import is_available, rebuild_related_products
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la tabla de productos relacionados (taxonomía + similitud TF-IDF)'
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('Se necesita NumPy: pip install numpy')
+        self.stdout.write('Calculando productos relacionados...')
+        total = rebuild_related_products()
+        self.stdout.write(self.style.SUCCESS(f'Productos relacionados recalculados: {total} productos'))
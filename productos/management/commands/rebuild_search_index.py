@@ -0,0 +1,14 @@
+# productos/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from productos.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto completo de productos'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Reconstruyendo índice con {backend.__class__.__name__}...')
+        total = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido: {total} productos indexados'))
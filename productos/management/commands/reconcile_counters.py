@@ -0,0 +1,23 @@
+# productos/management/commands/reconcile_counters.py
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Verifica los contadores de productos y subcategorías de la taxonomía y corrige las desviaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Solo verifica: no corrige y termina con error si hay desviaciones')
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters(repair=not options['check'])
+        for model, pk, field, stored, actual in drift:
+            self.stdout.write(f'  {model._meta.verbose_name} #{pk} {field}: {stored} → {actual}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Contadores correctos'))
+        elif options['check']:
+            raise CommandError(f'{len(drift)} contadores desviados (ejecutar sin --check para corregirlos)')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Contadores corregidos: {len(drift)}'))
@@ -0,0 +1,46 @@
+# productos/management/commands/run_jobs.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from productos.jobs import purge_finished_jobs, recover_stale_jobs, run_pending
+
+# Cada cuánto se recuperan trabajos abandonados y se purgan los completados
+MAINTENANCE_INTERVAL = 5 * 60
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano de la cola (productos/jobs.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOBS_WORKERS,
+                            help='Hilos que ejecutan trabajos a la vez (con 1, en el hilo principal)')
+        parser.add_argument('--sleep', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help='Segundos de espera cuando no hay trabajos vencidos')
+        parser.add_argument('--once', action='store_true',
+                            help='Vacía la cola de trabajos vencidos y termina (para cron)')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        total = 0
+        last_maintenance = None
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs') if workers > 1 else nullcontext()
+        with pool as executor:
+            try:
+                while True:
+                    if last_maintenance is None or time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                        recover_stale_jobs()
+                        purge_finished_jobs()
+                        last_maintenance = time.monotonic()
+                    done = run_pending(limit=workers * 2, executor=executor)
+                    total += done
+                    if not done:
+                        if options['once']:
+                            break
+                        time.sleep(options['sleep'])
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(self.style.SUCCESS(f'Trabajos ejecutados: {total}'))
@@ -0,0 +1,44 @@
+# productos/management/commands/sync_sqlite_replicas.py
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia la base de datos SQLite primaria en las réplicas (SQLITE_REPLICA_PATHS). '
+        'Con --interval se repite sin parar: réplicas con retraso para probar el router en local'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Segundos entre copias (0 = una sola copia)')
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [connections[alias].settings_dict for alias in settings.DATABASE_REPLICAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3' or not replicas:
+            raise CommandError('Solo con DB_PROFILE=sqlite y SQLITE_REPLICA_PATHS definido')
+
+        while True:
+            start = time.perf_counter()
+            source = sqlite3.connect(primary['NAME'])
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(replica['NAME'])
+                    try:
+                        # API de backup de SQLite: copia coherente aunque haya escrituras
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(
+                f'{len(replicas)} réplicas sincronizadas en {(time.perf_counter() - start) * 1000:.0f} ms'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
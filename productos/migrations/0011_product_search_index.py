@@ -0,0 +1,58 @@
+# Índice de búsqueda de texto completo para productos (tabla sombra)
+
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS productos_product_fts USING fts5("
+    "name, sku, short_description, description, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO productos_product_fts (rowid, name, sku, short_description, description) "
+    "SELECT id, COALESCE(name, ''), COALESCE(sku, ''), COALESCE(short_description, ''), "
+    "COALESCE(description, '') FROM productos_product",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS productos_product_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE IF NOT EXISTS productos_product_search ("
+    "product_id bigint PRIMARY KEY REFERENCES productos_product (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS productos_product_search_document_idx "
+    "ON productos_product_search USING GIN (document)",
+    "INSERT INTO productos_product_search (product_id, document) "
+    "SELECT id, "
+    "setweight(to_tsvector('simple', COALESCE(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', COALESCE(sku, '')), 'A') || "
+    "setweight(to_tsvector('simple', COALESCE(short_description, '')), 'B') || "
+    "setweight(to_tsvector('simple', COALESCE(description, '')), 'C') "
+    "FROM productos_product",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TABLE IF EXISTS productos_product_search",
+]
+
+
+def run_statements(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0010_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_statements({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
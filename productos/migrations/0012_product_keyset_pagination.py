@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0011_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='product',
+            options={'ordering': ['-destacado', '-en_oferta', '-created_at', 'id'], 'verbose_name': 'Producto', 'verbose_name_plural': 'Productos'},
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-destacado', '-en_oferta', '-created_at', 'id'], name='productos_p_is_acti_ff147d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='productos_p_created_5777a3_idx'),
+        ),
+    ]
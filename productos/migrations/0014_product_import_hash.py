@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0013_related_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='Hash de importación'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0014_product_import_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkuSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=20, unique=True, verbose_name='Prefijo')),
+                ('next_value', models.PositiveBigIntegerField(default=1, verbose_name='Siguiente número')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de SKU',
+                'verbose_name_plural': 'Secuencias de SKU',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0015_sku_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(choices=[('image', 'Imagen'), ('video', 'Video')], max_length=10, verbose_name='Tipo')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nombre original')),
+                ('path', models.CharField(max_length=255, verbose_name='Ruta del archivo')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Bytes recibidos')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 esperado')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 recibido')),
+                ('metadata', models.JSONField(blank=True, default=dict, verbose_name='Datos de la galería')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='productos.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Subida por partes',
+                'verbose_name_plural': 'Subidas por partes',
+                'ordering': ['created_at', 'pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_summaries(apps, schema_editor):
+    """Resúmenes iniciales a partir de los productos existentes"""
+    Product = apps.get_model('productos', 'Product')
+    ProveedorCategorySummary = apps.get_model('productos', 'ProveedorCategorySummary')
+    rows = (
+        Product.objects.filter(is_active=True, proveedor__isnull=False)
+        .values('proveedor_id', 'category_id')
+        .annotate(productos_count=Count('pk'))
+        .order_by()
+    )
+    ProveedorCategorySummary.objects.bulk_create([ProveedorCategorySummary(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0016_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProveedorCategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('productos_count', models.PositiveIntegerField(default=0, verbose_name='Productos activos')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Proveedor por Categoría',
+                'verbose_name_plural': 'Resúmenes de Proveedor por Categoría',
+                'ordering': ['proveedor', 'category__name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['proveedor', 'is_active', '-destacado', '-en_oferta', '-created_at', 'id'], name='productos_p_proveed_b5fee7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['proveedor', 'category', 'is_active', '-destacado', '-en_oferta', '-created_at', 'id'], name='productos_p_proveed_f6eba9_idx'),
+        ),
+        migrations.AddField(
+            model_name='proveedorcategorysummary',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos.category', verbose_name='Categoría'),
+        ),
+        migrations.AddField(
+            model_name='proveedorcategorysummary',
+            name='proveedor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_summaries', to='productos.proveedor', verbose_name='Proveedor'),
+        ),
+        migrations.AddConstraint(
+            model_name='proveedorcategorysummary',
+            constraint=models.UniqueConstraint(fields=('proveedor', 'category'), name='productos_proveedor_category_summary_uniq'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
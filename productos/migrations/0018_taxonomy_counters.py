@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:17
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    """Contadores iniciales a partir de los productos y subcategorías existentes"""
+    active = Q(product__is_active=True)
+    for model_name in ('Category', 'Subcategory', 'Estatus', 'Proveedor'):
+        model = apps.get_model('productos', model_name)
+        for pk, total in model.objects.annotate(total=Count('product', filter=active)).values_list('pk', 'total'):
+            model.objects.filter(pk=pk).update(productos_count=total)
+    Category = apps.get_model('productos', 'Category')
+    for pk, total in Category.objects.annotate(total=Count('subcategories')).values_list('pk', 'total'):
+        Category.objects.filter(pk=pk).update(subcategorias_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0017_proveedor_category_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='productos_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Productos Activos'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subcategorias_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Subcategorías'),
+        ),
+        migrations.AddField(
+            model_name='estatus',
+            name='productos_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Productos Activos'),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='productos_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Productos Activos'),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='productos_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Productos Activos'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
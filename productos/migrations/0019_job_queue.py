@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0018_taxonomy_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Datos')),
+                ('idempotency_key', models.CharField(blank=True, max_length=200, null=True, unique=True, verbose_name='Clave de idempotencia')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En curso'), ('done', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Intentos máximos')),
+                ('run_after', models.DateTimeField(verbose_name='Ejecutar desde')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminado')),
+            ],
+            options={
+                'verbose_name': 'Trabajo en segundo plano',
+                'verbose_name_plural': 'Trabajos en segundo plano',
+                'ordering': ['-created_at', '-pk'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='productos_j_status_b5c2bb_idx')],
+            },
+        ),
+    ]
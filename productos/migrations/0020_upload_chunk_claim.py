@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0019_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writer',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Escritor de la parte en curso'),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writing_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Escribiendo desde'),
+        ),
+    ]
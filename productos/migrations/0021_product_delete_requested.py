@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0020_upload_chunk_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='delete_requested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Eliminación solicitada'),
+        ),
+    ]
@@ -1,14 +1,41 @@
-from django.db import models
-from django.utils.text import slugify
 import uuid
-from datetime import datetime
 
-class Proveedor(models.Model):
+from django.db import models, transaction
+from django.utils.text import slugify
+
+
+class CountedModel(models.Model):
+    """
+    Modelo con contadores desnormalizados (productos/counters.py). Esos campos
+    solo se escriben con UPDATE ... F() al guardar o borrar productos: save()
+    de una instancia ya existente no los incluye, así un objeto cargado antes
+    de crear un producto no devuelve el contador a su valor antiguo.
+    """
+    COUNTER_FIELDS = ('productos_count',)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                ]
+            kwargs['update_fields'] = [name for name in update_fields if name not in self.COUNTER_FIELDS]
+        super().save(*args, **kwargs)
+
+
+class Proveedor(CountedModel):
     name = models.CharField(max_length=120, verbose_name="Nombre")
     slug = models.SlugField(unique=True, blank=True)
     logo = models.ImageField(upload_to='proveedores/', blank=True, null=True, verbose_name="Logo")
     id_unico = models.CharField(max_length=50, unique=True, verbose_name="ID Único", help_text="Identificador único del proveedor", default="temp_id")
     catalogo = models.FileField(upload_to='catalogos/', blank=True, null=True, verbose_name="Catálogo (PDF)")
+    # Contador de productos activos (productos/counters.py)
+    productos_count = models.IntegerField(default=0, editable=False, verbose_name="Productos Activos")
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -24,17 +51,23 @@ class Proveedor(models.Model):
         return self.product_set.filter(is_active=True)
     
     def count_productos(self):
-        """Cuenta los productos activos del proveedor"""
-        return self.productos_asociados.count()
+        """Productos activos del proveedor (contador desnormalizado)"""
+        return self.productos_count
     count_productos.short_description = "Productos Activos"
+    count_productos.admin_order_field = 'productos_count'
     
     class Meta:
         verbose_name = "Proveedor"
         verbose_name_plural = "Proveedores"
 
-class Category(models.Model):
+class Category(CountedModel):
     name = models.CharField(max_length=120, verbose_name="Nombre")
     slug = models.SlugField(unique=True, blank=True)
+    # Contadores de productos activos y de subcategorías (productos/counters.py)
+    productos_count = models.IntegerField(default=0, editable=False, verbose_name="Productos Activos")
+    subcategorias_count = models.IntegerField(default=0, editable=False, verbose_name="Subcategorías")
+
+    COUNTER_FIELDS = ('productos_count', 'subcategorias_count')
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -50,18 +83,27 @@ class Category(models.Model):
         return self.subcategories.all()
     
     def count_subcategorias(self):
-        """Cuenta las subcategorías de la categoría"""
-        return self.subcategorias_asociadas.count()
+        """Subcategorías de la categoría (contador desnormalizado)"""
+        return self.subcategorias_count
     count_subcategorias.short_description = "Subcategorías"
+    count_subcategorias.admin_order_field = 'subcategorias_count'
+    
+    def count_productos(self):
+        """Productos activos de la categoría (contador desnormalizado)"""
+        return self.productos_count
+    count_productos.short_description = "Productos Activos"
+    count_productos.admin_order_field = 'productos_count'
     
     class Meta:
         verbose_name = "Categoría"
         verbose_name_plural = "Categorías"
 
-class Subcategory(models.Model):
+class Subcategory(CountedModel):
     name = models.CharField(max_length=120, verbose_name="Nombre")
     slug = models.SlugField(unique=True, blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="subcategories", verbose_name="Categoría")
+    # Contador de productos activos (productos/counters.py)
+    productos_count = models.IntegerField(default=0, editable=False, verbose_name="Productos Activos")
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -77,18 +119,21 @@ class Subcategory(models.Model):
         return self.product_set.filter(is_active=True)
     
     def count_productos(self):
-        """Cuenta los productos activos de la subcategoría"""
-        return self.productos_asociados.count()
+        """Productos activos de la subcategoría (contador desnormalizado)"""
+        return self.productos_count
     count_productos.short_description = "Productos Activos"
+    count_productos.admin_order_field = 'productos_count'
     
     class Meta:
         verbose_name = "Subcategoría"
         verbose_name_plural = "Subcategorías"
 
-class Estatus(models.Model):
+class Estatus(CountedModel):
     name = models.CharField(max_length=120, verbose_name="Nombre")
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField(blank=True, verbose_name="Descripción")
+    # Contador de productos activos (productos/counters.py)
+    productos_count = models.IntegerField(default=0, editable=False, verbose_name="Productos Activos")
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -104,9 +149,10 @@ class Estatus(models.Model):
         return self.product_set.filter(is_active=True)
     
     def count_productos(self):
-        """Cuenta los productos activos del estatus"""
-        return self.productos_asociados.count()
+        """Productos activos del estatus (contador desnormalizado)"""
+        return self.productos_count
     count_productos.short_description = "Productos Activos"
+    count_productos.admin_order_field = 'productos_count'
     
     class Meta:
         verbose_name = "Estatus de Procedencia"
@@ -133,39 +179,18 @@ class Product(models.Model):
     destacado = models.BooleanField(default=False, verbose_name="Producto Destacado")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
+    import_hash = models.CharField(max_length=40, blank=True, editable=False, verbose_name="Hash de importación")
+    # Eliminación en segundo plano pedida desde el panel (productos/tasks.py); reactivar la cancela
+    delete_requested_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Eliminación solicitada")
 
     def generate_sku(self):
-        """Genera un SKU único para el producto"""
-        if self.proveedor:
-            # Usar las primeras 3 letras del proveedor
-            proveedor_code = self.proveedor.name[:3].upper().replace(' ', '')
-        else:
-            proveedor_code = 'GEN'  # General si no hay proveedor
-        
-        if self.category:
-            # Usar las primeras 2 letras de la categoría
-            category_code = self.category.name[:2].upper().replace(' ', '')
-        else:
-            category_code = 'XX'  # Default si no hay categoría
-        
-        # Fecha actual en formato YYMMDD
-        date_code = datetime.now().strftime('%y%m%d')
-        
-        # Número secuencial basado en la hora actual + últimos 4 dígitos del UUID
-        time_code = datetime.now().strftime('%H%M')
-        uuid_suffix = str(uuid.uuid4().hex)[-4:].upper()
-        
-        # Formato: PROV-CAT-YYMMDD-HHMM-UUID4
-        base_sku = f"{proveedor_code}-{category_code}-{date_code}-{time_code}-{uuid_suffix}"
-        
-        # Verificar que el SKU sea único
-        counter = 1
-        sku = base_sku
-        while Product.objects.filter(sku=sku).exclude(pk=self.pk).exists():
-            sku = f"{base_sku}-{counter:02d}"
-            counter += 1
-        
-        return sku
+        """Genera un SKU único para el producto: PROV-CAT-NNNNNN (ver productos/sku.py)"""
+        from .sku import allocate_sku, sku_prefix
+
+        return allocate_sku(sku_prefix(
+            self.proveedor.name if self.proveedor else None,
+            self.category.name if self.category else None,
+        ))
 
     def save(self, *args, **kwargs):
         # Generar slug si no existe
@@ -176,7 +201,15 @@ class Product(models.Model):
         if not self.sku:
             self.sku = self.generate_sku()
         
-        super().save(*args, **kwargs)
+        # Reactivar el producto cancela su eliminación pendiente
+        if self.is_active and self.delete_requested_at:
+            self.delete_requested_at = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'delete_requested_at'}
+        
+        # Las señales actualizan los contadores de la taxonomía en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -224,12 +257,10 @@ class Product(models.Model):
     
     def get_main_image(self):
         """Retorna la imagen principal del producto o la primera imagen disponible"""
-        main_image = self.images.filter(is_main=True).first()
+        images = list(self.images.all())  # Usa prefetch_related('images') si lo hay
+        main_image = next((image for image in images if image.is_main), None) or (images[0] if images else None)
         if main_image:
             return main_image.image
-        first_image = self.images.first()
-        if first_image:
-            return first_image.image
         return self.image  # Fallback a la imagen original del modelo
     
     def get_all_images(self):
@@ -258,12 +289,18 @@ class Product(models.Model):
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
-        ordering = ['-destacado', '-en_oferta', '-created_at']  # Destacados y ofertas primero
+        ordering = ['-destacado', '-en_oferta', '-created_at', 'id']  # Destacados y ofertas primero (id desempata)
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['is_active', 'destacado']),
             models.Index(fields=['category', 'is_active']),
             models.Index(fields=['proveedor', 'is_active']),
+            # Índices para la paginación por cursor (catálogo público y panel de staff)
+            models.Index(fields=['is_active', '-destacado', '-en_oferta', '-created_at', 'id']),
+            models.Index(fields=['-created_at', '-id']),
+            # Página del proveedor por cursor, con y sin pestaña de categoría
+            models.Index(fields=['proveedor', 'is_active', '-destacado', '-en_oferta', '-created_at', 'id']),
+            models.Index(fields=['proveedor', 'category', 'is_active', '-destacado', '-en_oferta', '-created_at', 'id']),
         ]
 
 
@@ -307,3 +344,128 @@ class ProductVideo(models.Model):
         ordering = ['order']
         verbose_name = "Video de Galería"
         verbose_name_plural = "Videos de Galería"
+
+
+class RelatedProduct(models.Model):
+    """Productos relacionados precalculados (ver productos/related.py)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_links', verbose_name="Producto")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', verbose_name="Producto relacionado")
+    rank = models.PositiveSmallIntegerField(verbose_name="Posición")
+    score = models.FloatField(verbose_name="Puntuación")
+
+    def __str__(self):
+        return f"{self.product} → {self.related} ({self.score:.3f})"
+
+    class Meta:
+        ordering = ['product', 'rank']
+        verbose_name = "Producto Relacionado"
+        verbose_name_plural = "Productos Relacionados"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='productos_related_product_rank_uniq'),
+        ]
+
+
+class ProveedorCategorySummary(models.Model):
+    """Productos activos de un proveedor en cada categoría (ver productos/summaries.py)"""
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='category_summaries', verbose_name="Proveedor")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Categoría")
+    productos_count = models.PositiveIntegerField(default=0, verbose_name="Productos activos")
+
+    def __str__(self):
+        return f"{self.proveedor} / {self.category or 'Sin categoría'}: {self.productos_count}"
+
+    class Meta:
+        ordering = ['proveedor', 'category__name']
+        verbose_name = "Resumen de Proveedor por Categoría"
+        verbose_name_plural = "Resúmenes de Proveedor por Categoría"
+        constraints = [
+            models.UniqueConstraint(fields=['proveedor', 'category'], name='productos_proveedor_category_summary_uniq'),
+        ]
+
+
+class SkuSequence(models.Model):
+    """Contador de SKU por prefijo PROV-CAT (ver productos/sku.py)"""
+    prefix = models.CharField(max_length=20, unique=True, verbose_name="Prefijo")
+    next_value = models.PositiveBigIntegerField(default=1, verbose_name="Siguiente número")
+
+    def __str__(self):
+        return f"{self.prefix} → {self.next_value}"
+
+    class Meta:
+        verbose_name = "Secuencia de SKU"
+        verbose_name_plural = "Secuencias de SKU"
+
+
+class UploadSession(models.Model):
+    """Subida por partes (reanudable) de una imagen o video de la galería (ver productos/uploads.py)"""
+    KIND_CHOICES = [
+        ('image', 'Imagen'),
+        ('video', 'Video'),
+    ]
+
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='uploads', verbose_name="Producto")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Tipo")
+    filename = models.CharField(max_length=255, verbose_name="Nombre original")
+    path = models.CharField(max_length=255, verbose_name="Ruta del archivo")
+    size = models.PositiveBigIntegerField(verbose_name="Tamaño (bytes)")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Bytes recibidos")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 esperado")
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 recibido")
+    metadata = models.JSONField(default=dict, blank=True, verbose_name="Datos de la galería")
+    # Petición que está escribiendo una parte (ver claim_chunk en productos/uploads.py)
+    writer = models.CharField(max_length=32, blank=True, verbose_name="Escritor de la parte en curso")
+    writing_since = models.DateTimeField(null=True, blank=True, verbose_name="Escribiendo desde")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+        verbose_name = "Subida por partes"
+        verbose_name_plural = "Subidas por partes"
+
+
+class Job(models.Model):
+    """Trabajo en segundo plano (ver productos/jobs.py y manage.py run_jobs)"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En curso'),
+        (DONE, 'Completado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Tarea")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Datos")
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True, verbose_name="Clave de idempotencia")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Estado")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Intentos máximos")
+    run_after = models.DateTimeField(verbose_name="Ejecutar desde")
+    last_error = models.TextField(blank=True, verbose_name="Último error")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminado")
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        ordering = ['-created_at', '-pk']
+        verbose_name = "Trabajo en segundo plano"
+        verbose_name_plural = "Trabajos en segundo plano"
+        indexes = [
+            # Cola: pendientes por orden de ejecución
+            models.Index(fields=['status', 'run_after']),
+        ]
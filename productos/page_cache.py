@@ -0,0 +1,175 @@
+# productos/page_cache.py
+# Caché de páginas completas para las vistas públicas, por idioma.
+#
+# Cada página guarda las versiones de los grupos de los que depende (ver
+# productos/cache.py); las señales de los modelos incrementan esas versiones y
+# la página deja de servirse en cuanto cambia cualquiera de ellas.
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from coimpres_cuba.context_processors import aget_language, get_language
+from coimpres_cuba.db_router import primary_reads
+
+from .cache import get_versions
+
+PAGE_CACHE_PREFIX = 'productos:page:'
+
+# Parámetros que no cambian el contenido de la página
+IGNORED_QUERY_PARAMS = ('fbclid', 'gclid')
+
+
+def normalized_query(request):
+    """Querystring ordenada, sin parámetros vacíos ni de seguimiento"""
+    items = []
+    for key, values in request.GET.lists():
+        if key in IGNORED_QUERY_PARAMS or key.startswith('utm_'):
+            continue
+        items.extend((key, value) for value in values if value != '')
+    return sorted(items)
+
+
+def page_cache_key(request):
+    signature = repr((
+        request.get_host(),
+        request.path,
+        normalized_query(request),
+        get_language(request),
+    ))
+    return PAGE_CACHE_PREFIX + hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+
+def add_page_dependencies(request, *groups):
+    """Declara los grupos del catálogo de los que depende la página en curso"""
+    dependencies = getattr(request, '_page_cache_dependencies', None)
+    if dependencies is not None:
+        dependencies.update(get_versions([g for g in groups if g not in dependencies]))
+
+
+def has_pending_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def is_cacheable_request(request):
+    """Solo GET anónimos, sin cambio de idioma (?lang= escribe en sesión) ni mensajes"""
+    return (
+        getattr(settings, 'PAGE_CACHE_ENABLED', True)
+        and request.method == 'GET'
+        and 'lang' not in request.GET
+        and not request.user.is_authenticated
+        and not has_pending_messages(request)
+    )
+
+
+def is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Set-Cookie')
+        and 'private' not in response.get('Cache-Control', '')
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and not has_pending_messages(request)
+    )
+
+
+async def aload_request_state(request):
+    """
+    Vistas asíncronas: carga antes de la vista el usuario y el idioma de la
+    sesión, que en el código síncrono (caché, validadores, plantillas) se leen
+    de forma perezosa y harían consultas desde el bucle de eventos.
+    """
+    if getattr(request, '_request_state_loaded', False):
+        return
+    if hasattr(request, 'auser'):
+        request.user = await request.auser()
+    if hasattr(request, 'session'):
+        await aget_language(request)
+    request._request_state_loaded = True
+
+
+def cached_page(entry):
+    """Respuesta guardada si sus dependencias no han cambiado, o None"""
+    if entry is None or get_versions(entry['versions']) != entry['versions']:
+        return None
+    response = entry['response']
+    # Los validadores HTTP se recalculan en cada petición (productos/conditional.py)
+    for header in ('ETag', 'Last-Modified'):
+        if response.has_header(header):
+            del response[header]
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def page_entry(request, response):
+    """Entrada de caché de la respuesta, o None si no se puede cachear"""
+    if not is_cacheable_response(request, response):
+        return None
+    return {'response': response, 'versions': request._page_cache_dependencies}
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def cache_public_page(view_func):
+    """
+    Decorador para vistas públicas: sirve la página desde caché mientras no
+    cambie ninguna de sus dependencias. Nunca cachea ni sirve páginas a usuarios
+    autenticados (staff) ni respuestas con mensajes o cookies.
+
+    Admite vistas síncronas y asíncronas (productos/async_views.py).
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            await aload_request_state(request)
+            if not is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+
+            key = page_cache_key(request)
+            response = cached_page(await cache.aget(key))
+            if response is not None:
+                return response
+
+            request._page_cache_dependencies = get_versions(['site'])
+            # Las vistas asíncronas devuelven la respuesta ya renderizada
+            with primary_reads():
+                response = await view_func(request, *args, **kwargs)
+            entry = page_entry(request, response)
+            if entry is not None:
+                await cache.aset(key, entry, page_timeout())
+            response['X-Page-Cache'] = 'MISS'
+            return response
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        response = cached_page(cache.get(key))
+        if response is not None:
+            return response
+
+        # Todas las páginas dependen de 'site' (se invalida al desplegar, ver clear_page_cache)
+        request._page_cache_dependencies = get_versions(['site'])
+        # La página se guarda bajo las versiones actuales: se renderiza aquí,
+        # leyendo de la primaria, y no de una réplica que aún no tenga el cambio
+        with primary_reads():
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        entry = page_entry(request, response)
+        if entry is not None:
+            cache.set(key, entry, page_timeout())
+        response['X-Page-Cache'] = 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,160 @@
+# productos/pagination.py
+# Paginación por cursor (keyset): cada página cuesta una búsqueda por índice,
+# sin COUNT(*) ni OFFSET, sin importar lo profunda que sea.
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'productos.pagination.cursor'
+
+# Orden del catálogo público (Product.Meta.ordering)
+CATALOG_ORDERING = ('-destacado', '-en_oferta', '-created_at', 'id')
+
+
+class InvalidCursor(Exception):
+    """El cursor recibido no es válido o fue manipulado"""
+
+
+class CursorPage:
+    """Página de resultados con cursores opacos hacia la página siguiente y anterior"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagina un queryset usando los valores de la última fila vista como cursor.
+    `ordering` debe ser un orden total (terminar en un campo único, p. ej. id)
+    y sus campos no deben admitir NULL.
+    """
+
+    def __init__(self, queryset, per_page, ordering=CATALOG_ORDERING):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    # ---- Cursores ----
+
+    def encode_cursor(self, obj, direction):
+        values = []
+        for name, _ in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'v': values, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+            values, direction = payload['v'], payload['d']
+        except (signing.BadSignature, KeyError, TypeError) as exc:
+            raise InvalidCursor(str(exc))
+        if direction not in ('next', 'prev') or len(values) != len(self.fields):
+            raise InvalidCursor('Cursor incompatible con el orden de la paginación')
+        model = self.queryset.model
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except Exception as exc:
+            raise InvalidCursor(str(exc))
+        return values, direction
+
+    # ---- Consultas ----
+
+    def seek_filter(self, values, reverse=False):
+        """
+        Condición lexicográfica "fila posterior al cursor" según el orden:
+        (a > a0) OR (a = a0 AND b > b0) OR ...
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values):
+            after = descending != reverse
+            lookup = f'{name}__lt' if after else f'{name}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    def get_page(self, cursor=None):
+        """Devuelve la página indicada por el cursor (la primera si no hay cursor)"""
+        limit = self.per_page + 1
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:limit])
+            return self.build_page(rows, has_more=len(rows) > self.per_page, has_before=False)
+
+        values, direction = self.decode_cursor(cursor)
+        if direction == 'next':
+            queryset = self.queryset.filter(self.seek_filter(values)).order_by(*self.ordering)
+            rows = list(queryset[:limit])
+            return self.build_page(rows, has_more=len(rows) > self.per_page, has_before=True)
+
+        # Página anterior: recorrer en orden inverso y voltear el resultado
+        queryset = self.queryset.filter(self.seek_filter(values, reverse=True)).order_by(*self.reversed_ordering())
+        rows = list(queryset[:limit])
+        has_before = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self.build_page(rows, has_more=True, has_before=has_before, trimmed=True)
+
+    def build_page(self, rows, has_more, has_before, trimmed=False):
+        if not trimmed:
+            rows = rows[:self.per_page]
+        next_cursor = self.encode_cursor(rows[-1], 'next') if rows and has_more else None
+        previous_cursor = self.encode_cursor(rows[0], 'prev') if rows and has_before else None
+        return CursorPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+
+def cursor_querystring(request, cursor):
+    """Querystring actual con el cursor indicado (sin el número de página clásico)"""
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return params.urlencode()
+
+
+def uses_offset_pagination(request, queryset):
+    """
+    La paginación clásica se mantiene para enlaces antiguos con ?page= y para
+    búsquedas ordenadas por relevancia, que no tienen un orden de cursor estable.
+    """
+    return 'page' in request.GET or 'search_rank' in queryset.query.extra_select
+
+
+def cursor_links(request, page):
+    """Querystrings de las páginas siguiente y anterior de una página por cursor"""
+    links = {}
+    if getattr(page, 'is_cursor', False):
+        if page.has_next():
+            links['next_page_query'] = cursor_querystring(request, page.next_cursor)
+        if page.has_previous():
+            links['previous_page_query'] = cursor_querystring(request, page.previous_cursor)
+    return links
@@ -0,0 +1,263 @@
+# productos/related.py
+# Productos relacionados precalculados.
+#
+# Cada producto activo se describe con su taxonomía (categoría, subcategoría,
+# proveedor, estatus) y un vector TF-IDF del nombre y las descripciones. La
+# puntuación entre dos productos es la similitud coseno del texto más un peso por
+# cada campo de taxonomía compartido. Se guardan los RELATED_PRODUCTS_TOP_N
+# mejores vecinos de cada producto en RelatedProduct y la ficha los lee con una
+# sola consulta por índice.
+#
+# Requiere NumPy. Los vectores TF-IDF se guardan dispersos (solo los términos
+# presentes en cada producto, por filas y por columnas), así que su memoria es
+# proporcional al número total de términos del catálogo y no a productos x
+# vocabulario. Las puntuaciones se calculan por bloques de BLOCK_SIZE filas:
+# cada bloque ocupa BLOCK_SIZE x productos floats (unos 25 MB con 100.000).
+#
+# Los guardados de productos no recalculan nada en la petición: se acumulan en
+# un único trabajo de la cola (productos/jobs.py) que se ejecuta
+# RELATED_PRODUCTS_REFRESH_DELAY segundos después del primer cambio.
+import math
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import bump_versions
+from .jobs import enqueue_debounced
+from .models import Product, RelatedProduct
+from .search import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional en desarrollo
+    np = None
+
+TOP_N = getattr(settings, 'RELATED_PRODUCTS_TOP_N', 8)
+
+# Peso de cada componente en la puntuación
+SCORE_WEIGHTS = {
+    'text': 1.0,
+    'category_id': 0.6,
+    'subcategory_id': 0.4,
+    'proveedor_id': 0.2,
+    'estatus_id': 0.05,
+}
+TAXONOMY_FIELDS = ('category_id', 'subcategory_id', 'proveedor_id', 'estatus_id')
+
+# Peso de cada campo de texto en el vector TF-IDF
+TEXT_FIELDS = (('name', 3), ('short_description', 2), ('description', 1))
+
+MAX_FEATURES = 4096
+MIN_TOKEN_LENGTH = 3
+BLOCK_SIZE = 64
+
+
+def is_available():
+    return np is not None
+
+
+def normalize_token(token):
+    """Minúsculas y sin acentos, para que 'Café' y 'cafe' sean el mismo término"""
+    token = unicodedata.normalize('NFKD', token.lower())
+    return ''.join(c for c in token if not unicodedata.combining(c))
+
+
+def product_terms(row):
+    terms = Counter()
+    for field, weight in TEXT_FIELDS:
+        for token in tokenize(row[field]):
+            if len(token) >= MIN_TOKEN_LENGTH and not token.isdigit():
+                terms[normalize_token(token)] += weight
+    return terms
+
+
+class SparseVectors:
+    """
+    Vectores dispersos con NumPy: los términos de cada fila (CSR) y, para el
+    producto escalar, las filas de cada término (CSC)
+    """
+
+    def __init__(self, documents, index, weights):
+        indptr, indices, data = [0], [], []
+        for terms in documents:
+            entries = [(index[term], value) for term, value in terms.items() if term in index]
+            indices.extend(column for column, _ in entries)
+            data.extend(value for _, value in entries)
+            indptr.append(len(indices))
+        self.rows = len(documents)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int32)
+        self.data = np.array(data, dtype=np.float32) * weights[self.indices] if data else np.zeros(0, np.float32)
+        # Normalizar cada fila (similitud coseno = producto escalar)
+        row_of = np.repeat(np.arange(self.rows), np.diff(self.indptr))
+        norms = np.sqrt(np.bincount(row_of, weights=self.data ** 2, minlength=self.rows)).astype(np.float32)
+        norms[norms == 0] = 1.0
+        self.data /= norms[row_of]
+        # Por columnas: filas y valores de cada término
+        order = np.argsort(self.indices, kind='stable')
+        self.col_rows = row_of[order]
+        self.col_data = self.data[order]
+        self.col_indptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=len(weights)))))
+
+    def dot_all(self, rows):
+        """Producto escalar de las filas indicadas con todas: matriz densa len(rows) x filas"""
+        result = np.zeros((len(rows), self.rows), dtype=np.float32)
+        for i, row in enumerate(rows):
+            for column, value in zip(self.indices[self.indptr[row]:self.indptr[row + 1]],
+                                     self.data[self.indptr[row]:self.indptr[row + 1]]):
+                start, end = self.col_indptr[column], self.col_indptr[column + 1]
+                result[i, self.col_rows[start:end]] += value * self.col_data[start:end]
+        return result
+
+
+class CatalogMatrix:
+    """Vectores de todos los productos activos, listos para calcular similitudes"""
+
+    def __init__(self, rows):
+        self.ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.position = {pk: i for i, pk in enumerate(self.ids.tolist())}
+        self.taxonomy = {
+            field: np.array([row[field] or 0 for row in rows], dtype=np.int64)
+            for field in TAXONOMY_FIELDS
+        }
+        self.text = self._tfidf([product_terms(row) for row in rows])
+
+    @staticmethod
+    def _tfidf(documents):
+        document_frequency = Counter()
+        for terms in documents:
+            document_frequency.update(terms.keys())
+        # Los términos más frecuentes (pero no los que aparecen en un solo producto)
+        vocabulary = [term for term, df in document_frequency.most_common(MAX_FEATURES) if df > 1]
+        index = {term: i for i, term in enumerate(vocabulary)}
+        total = len(documents)
+        idf = np.log((1.0 + total) / (1.0 + np.array([document_frequency[t] for t in vocabulary], dtype=np.float32))) + 1.0
+        tf = [{term: 1.0 + math.log(count) for term, count in terms.items()} for terms in documents]
+        return SparseVectors(tf, index, idf.astype(np.float32))
+
+    def scores(self, rows):
+        """Puntuaciones de las filas indicadas (posiciones) contra todo el catálogo"""
+        rows = np.asarray(rows)
+        result = SCORE_WEIGHTS['text'] * self.text.dot_all(rows)
+        for field in TAXONOMY_FIELDS:
+            values = self.taxonomy[field]
+            same = (values[rows][:, None] == values[None, :]) & (values[None, :] != 0)
+            result += SCORE_WEIGHTS[field] * same
+        # Un producto nunca es relacionado de sí mismo
+        result[np.arange(len(rows)), rows] = -np.inf
+        return result
+
+    def top_neighbours(self, rows, top_n=TOP_N):
+        """{id del producto: [(id relacionado, puntuación), ...]} ordenados de mayor a menor"""
+        top_n = min(top_n, len(self.ids) - 1)
+        result = {}
+        if top_n <= 0:
+            return {int(self.ids[row]): [] for row in rows}
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            scores = self.scores(block)
+            best = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            for row, neighbours, values in zip(block, best, best_scores):
+                result[int(self.ids[row])] = [
+                    (int(self.ids[n]), float(v)) for n, v in zip(neighbours, values) if v > 0
+                ]
+        return result
+
+
+def load_catalog_matrix():
+    rows = list(
+        Product.objects.filter(is_active=True).order_by('id').values(
+            'id', 'name', 'short_description', 'description', *TAXONOMY_FIELDS,
+        )
+    )
+    return CatalogMatrix(rows)
+
+
+def save_neighbours(neighbours):
+    """Reemplaza las filas de RelatedProduct de los productos indicados"""
+    with transaction.atomic():
+        RelatedProduct.objects.filter(product_id__in=list(neighbours)).delete()
+        RelatedProduct.objects.bulk_create(
+            [
+                RelatedProduct(product_id=product_id, related_id=related_id, rank=rank, score=score)
+                for product_id, entries in neighbours.items()
+                for rank, (related_id, score) in enumerate(entries)
+            ],
+            batch_size=1000,
+        )
+        # La ficha de esos productos cambia: invalidar su caché al confirmar. Se
+        # registra dentro del bloque: fuera de una transacción (el worker de la
+        # cola) on_commit se ejecutaría ya, antes de escribir las filas nuevas
+        transaction.on_commit(lambda: bump_versions(*[f'product:{pk}' for pk in neighbours]))
+
+
+def rebuild_related_products():
+    """Recalcula la tabla completa. Devuelve el número de productos procesados"""
+    matrix = load_catalog_matrix()
+    neighbours = matrix.top_neighbours(list(range(len(matrix.ids))))
+    with transaction.atomic():
+        RelatedProduct.objects.exclude(product_id__in=list(neighbours)).delete()
+        save_neighbours(neighbours)
+    return len(neighbours)
+
+
+def refresh_related_products(product_ids):
+    """
+    Actualización incremental tras cambiar algunos productos: recalcula sus
+    vecinos y los de los productos cuya lista puede cambiar, es decir, los que
+    ya los tenían como relacionados o cuyo último vecino puntúa menos que ellos.
+
+    El vocabulario y los pesos IDF se recalculan con el catálogo actual; el resto
+    de listas pueden quedar algo desfasadas hasta el próximo rebuild_related_products.
+    """
+    product_ids = set(product_ids)
+    matrix = load_catalog_matrix()
+
+    # Los productos que ya no están activos dejan de tener y de ser relacionados
+    gone = product_ids - set(matrix.position)
+    RelatedProduct.objects.filter(product_id__in=gone).delete()
+
+    changed_rows = [matrix.position[pk] for pk in product_ids if pk in matrix.position]
+    affected = set(
+        RelatedProduct.objects.filter(related_id__in=product_ids).values_list('product_id', flat=True)
+    )
+    if changed_rows:
+        # El último vecino actual de cada producto: si un cambio lo supera, hay que recalcular
+        # (con la lista incompleta basta cualquier puntuación positiva)
+        thresholds = dict(
+            RelatedProduct.objects.filter(rank=TOP_N - 1).values_list('product_id', 'score')
+        )
+        floor = np.array([thresholds.get(pk, 0.0) for pk in matrix.ids.tolist()], dtype=np.float32)
+        enters = np.zeros(len(matrix.ids), dtype=bool)
+        for start in range(0, len(changed_rows), BLOCK_SIZE):
+            scores = matrix.scores(changed_rows[start:start + BLOCK_SIZE])
+            enters |= (scores > floor[None, :]).any(axis=0)
+        affected.update(int(pk) for pk in matrix.ids[enters])
+
+    rows = sorted(
+        set(changed_rows) | {matrix.position[pk] for pk in affected if pk in matrix.position}
+    )
+    neighbours = matrix.top_neighbours(rows) if rows else {}
+    save_neighbours(neighbours)
+    return len(neighbours)
+
+
+def schedule_related_refresh(product_ids):
+    """
+    Acumula los productos cambiados en el trabajo pendiente de actualización de
+    relacionados (o lo crea para dentro de RELATED_PRODUCTS_REFRESH_DELAY
+    segundos) cuando se confirme la transacción
+    """
+    if not is_available() or not getattr(settings, 'RELATED_PRODUCTS_AUTO_REFRESH', True):
+        return
+    product_ids = [int(pk) for pk in product_ids]
+    if not product_ids:
+        return
+    delay = getattr(settings, 'RELATED_PRODUCTS_REFRESH_DELAY', 60)
+    transaction.on_commit(lambda: enqueue_debounced('refresh_related_products', product_ids, delay))
@@ -0,0 +1,194 @@
+# productos/search.py
+# Índice de búsqueda de texto completo para el catálogo de productos
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+# Tablas sombra del índice (creadas en la migración 0011)
+SQLITE_FTS_TABLE = 'productos_product_fts'
+POSTGRES_SEARCH_TABLE = 'productos_product_search'
+
+# Campos indexados y su peso en el ranking (mayor peso = más relevante)
+SEARCH_FIELDS = (
+    ('name', 10.0),
+    ('sku', 8.0),
+    ('short_description', 3.0),
+    ('description', 1.0),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(term):
+    """Divide el término de búsqueda en palabras, descartando la sintaxis especial"""
+    return TOKEN_RE.findall(term or '')
+
+
+class BaseSearchBackend:
+    """Interfaz común de los backends de búsqueda"""
+
+    def search(self, queryset, term, fields=None):
+        raise NotImplementedError
+
+    def index_product(self, product):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Backend de respaldo: búsqueda con icontains para bases de datos sin índice"""
+
+    def search(self, queryset, term, fields=None):
+        query = Q()
+        for field in fields or [name for name, _ in SEARCH_FIELDS]:
+            query |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(query)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Backend FTS5 de SQLite: el rowid de la tabla virtual es el id del producto"""
+
+    def build_query(self, term, fields=None):
+        tokens = tokenize(term)
+        if not tokens:
+            return ''
+        # Cada palabra entre comillas con búsqueda por prefijo, unidas con AND implícito
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        if fields:
+            query = '{%s} : (%s)' % (' '.join(fields), query)
+        return query
+
+    def search(self, queryset, term, fields=None):
+        match = self.build_query(term, fields)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for _, weight in SEARCH_FIELDS)
+        return queryset.extra(
+            select={'search_rank': f'-bm25({SQLITE_FTS_TABLE}, {weights})'},
+            tables=[SQLITE_FTS_TABLE],
+            where=[
+                f'{SQLITE_FTS_TABLE}.rowid = productos_product.id',
+                f'{SQLITE_FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        )
+
+    def index_product(self, product):
+        columns = ', '.join(name for name, _ in SEARCH_FIELDS)
+        placeholders = ', '.join(['%s'] * (len(SEARCH_FIELDS) + 1))
+        values = [getattr(product, name) or '' for name, _ in SEARCH_FIELDS]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s', [product.pk])
+            cursor.execute(
+                f'INSERT INTO {SQLITE_FTS_TABLE} (rowid, {columns}) VALUES ({placeholders})',
+                [product.pk, *values],
+            )
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s', [product_id])
+
+    def rebuild(self):
+        columns = ', '.join(name for name, _ in SEARCH_FIELDS)
+        sources = ', '.join(f"COALESCE({name}, '')" for name, _ in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {SQLITE_FTS_TABLE} (rowid, {columns}) '
+                f'SELECT id, {sources} FROM productos_product'
+            )
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {SQLITE_FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Backend PostgreSQL: tabla sombra con un tsvector ponderado e índice GIN"""
+
+    config = 'simple'
+    # Pesos de tsvector equivalentes a SEARCH_FIELDS
+    labels = {'name': 'A', 'sku': 'A', 'short_description': 'B', 'description': 'C'}
+
+    def document_sql(self, sources=None):
+        sources = sources or [f'COALESCE({name}, \'\')' for name, _ in SEARCH_FIELDS]
+        parts = [
+            f"setweight(to_tsvector('{self.config}', {source}), '{self.labels[name]}')"
+            for (name, _), source in zip(SEARCH_FIELDS, sources)
+        ]
+        return ' || '.join(parts)
+
+    def build_query(self, term):
+        tokens = tokenize(term)
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search(self, queryset, term, fields=None):
+        tsquery = self.build_query(term)
+        if not tsquery:
+            return queryset.none()
+        if fields:
+            # Restringir a campos concretos se resuelve filtrando por etiquetas de peso
+            weights = ''.join(sorted({self.labels[field] for field in fields}))
+            tsquery = ' & '.join(f'{part}{weights}' for part in tsquery.split(' & '))
+        return queryset.extra(
+            select={
+                'search_rank': f"ts_rank({POSTGRES_SEARCH_TABLE}.document, to_tsquery('{self.config}', %s))",
+            },
+            select_params=[tsquery],
+            tables=[POSTGRES_SEARCH_TABLE],
+            where=[
+                f'{POSTGRES_SEARCH_TABLE}.product_id = productos_product.id',
+                f"{POSTGRES_SEARCH_TABLE}.document @@ to_tsquery('{self.config}', %s)",
+            ],
+            params=[tsquery],
+        )
+
+    def index_product(self, product):
+        placeholders = self.document_sql(['%s'] * len(SEARCH_FIELDS))
+        values = [getattr(product, name) or '' for name, _ in SEARCH_FIELDS]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_SEARCH_TABLE} (product_id, document) VALUES (%s, {placeholders}) '
+                f'ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document',
+                [product.pk, *values],
+            )
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRES_SEARCH_TABLE} WHERE product_id = %s', [product_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {POSTGRES_SEARCH_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_SEARCH_TABLE} (product_id, document) '
+                f'SELECT id, {self.document_sql()} FROM productos_product'
+            )
+            return cursor.rowcount
+
+
+def get_search_backend():
+    """Selecciona el backend de búsqueda según el motor de base de datos en uso"""
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+def search_products(queryset, term, fields=None, ordering=None):
+    """
+    Filtra el queryset por el término de búsqueda usando el índice de texto completo
+    y lo ordena por relevancia (después por `ordering` o el orden del modelo).
+    """
+    backend = get_search_backend()
+    results = backend.search(queryset, term, fields=fields)
+    if 'search_rank' not in results.query.extra_select:
+        return results
+    ordering = ordering or list(queryset.model._meta.ordering)
+    return results.order_by('-search_rank', *ordering)
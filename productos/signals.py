@@ -0,0 +1,214 @@
+# productos/signals.py
+# Señales para mantener sincronizados los índices derivados del catálogo
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_versions, product_groups
+from .counters import COUNTED_VALUES, apply_deltas, change_subcategory_count, counted_relations, product_values, relation_deltas
+from .home_feed import TRIGGER_FIELDS as HOME_TRIGGER_FIELDS, in_home_feed, instance_trigger_values, trigger_values
+from .images import schedule_renditions
+from .models import (
+    Category, Estatus, Product, ProductImage, ProductVideo, Proveedor, ProveedorCategorySummary, RelatedProduct, Subcategory,
+)
+from .related import schedule_related_refresh
+from .search import get_search_backend
+from .summaries import refresh_summaries
+
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, **kwargs):
+    """Actualiza el índice de búsqueda cuando se guarda un producto"""
+    if raw:
+        return
+    get_search_backend().index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    """Elimina el producto del índice de búsqueda"""
+    get_search_backend().remove_product(instance.pk)
+
+
+def bump_on_commit(*groups):
+    """Invalida los grupos de caché indicados cuando se confirma la transacción"""
+    transaction.on_commit(lambda: bump_versions(*groups))
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_relations(sender, instance, raw=False, **kwargs):
+    """
+    Guarda la categoría y el proveedor anteriores para invalidar también sus
+    páginas, los campos que deciden si el producto está en la portada y los
+    contadores de la taxonomía que lo incluían
+    """
+    instance._previous_relations = None
+    instance._previous_home = None
+    instance._previous_counted = {}
+    if raw or not instance.pk:
+        return
+    previous = (
+        Product.objects.filter(pk=instance.pk)
+        .values(*COUNTED_VALUES, *HOME_TRIGGER_FIELDS)
+        .first()
+    )
+    if previous:
+        instance._previous_relations = (previous['category_id'], previous['proveedor_id'])
+        instance._previous_home = trigger_values(previous)
+        instance._previous_counted = counted_relations(previous)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Invalida la caché del catálogo (facetas, páginas, etc.) cuando se confirma el cambio"""
+    groups = product_groups(instance.pk, instance.category_id, instance.proveedor_id)
+    previous = getattr(instance, '_previous_relations', None)
+    if previous:
+        groups += product_groups(instance.pk, *previous)
+    bump_on_commit(*groups)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_home_feed_on_save(sender, instance, created=False, raw=False, **kwargs):
+    """La portada (productos/home_feed.py) solo se reconstruye si el cambio se ve en ella"""
+    if raw:
+        return
+    if created:
+        affects_home = instance.is_active
+    else:
+        previous = getattr(instance, '_previous_home', None)
+        current = instance_trigger_values(instance)
+        affects_home = previous != current or in_home_feed(instance.pk)
+    if affects_home:
+        bump_on_commit('home')
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_home_feed_on_delete(sender, instance, **kwargs):
+    if in_home_feed(instance.pk):
+        bump_on_commit('home')
+
+
+@receiver(post_save, sender=Product)
+def update_counters_on_save(sender, instance, raw=False, **kwargs):
+    """Mueve el producto entre los contadores de la taxonomía (Product.save es atómico)"""
+    if raw:
+        return
+    apply_deltas(relation_deltas(instance._previous_counted, counted_relations(product_values(instance))))
+
+
+@receiver(post_delete, sender=Product)
+def update_counters_on_delete(sender, instance, **kwargs):
+    apply_deltas(relation_deltas(counted_relations(product_values(instance)), {}))
+
+
+@receiver(pre_save, sender=Subcategory)
+def remember_subcategory_category(sender, instance, raw=False, **kwargs):
+    instance._previous_category_id = None
+    if not raw and instance.pk:
+        instance._previous_category_id = (
+            Subcategory.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Subcategory)
+def update_subcategory_count_on_save(sender, instance, created=False, raw=False, **kwargs):
+    """Contador de subcategorías de la categoría (nueva subcategoría o cambio de categoría)"""
+    if raw:
+        return
+    previous = None if created else instance._previous_category_id
+    if previous != instance.category_id:
+        with transaction.atomic():
+            change_subcategory_count(previous, -1)
+            change_subcategory_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Subcategory)
+def update_subcategory_count_on_delete(sender, instance, **kwargs):
+    change_subcategory_count(instance.category_id, -1)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_proveedor_summaries(sender, instance, **kwargs):
+    """Recalcula los resúmenes (proveedor, categoría) actuales y anteriores del producto"""
+    pairs = [(instance.proveedor_id, instance.category_id)]
+    previous = getattr(instance, '_previous_relations', None)
+    if previous:
+        category_id, proveedor_id = previous
+        pairs.append((proveedor_id, category_id))
+    refresh_summaries(pairs)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_proveedores(sender, instance, **kwargs):
+    """Sus productos pasan a "sin categoría" (SET_NULL, sin señales): recordar los proveedores"""
+    instance._summary_proveedores = list(
+        ProveedorCategorySummary.objects.filter(category=instance).values_list('proveedor_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def refresh_summaries_on_category_delete(sender, instance, **kwargs):
+    refresh_summaries((proveedor_id, None) for proveedor_id in getattr(instance, '_summary_proveedores', []))
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductVideo)
+@receiver(post_delete, sender=ProductVideo)
+def invalidate_product_media_cache(sender, instance, **kwargs):
+    """La galería aparece en la ficha, los listados y la página del proveedor"""
+    product = Product.objects.filter(pk=instance.product_id).values_list('category_id', 'proveedor_id').first()
+    if product:
+        bump_on_commit(*product_groups(instance.product_id, *product))
+    else:
+        bump_on_commit('catalog', f'product:{instance.product_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
+@receiver(post_save, sender=Estatus)
+@receiver(post_delete, sender=Estatus)
+def invalidate_taxonomy_cache(sender, instance, **kwargs):
+    """Los nombres de la taxonomía aparecen en filtros, listados, fichas y portada"""
+    groups = ['catalog', 'taxonomy', 'home']
+    if sender is Category:
+        groups.append(f'category:{instance.pk}')
+    bump_on_commit(*groups)
+
+
+@receiver(post_save, sender=Proveedor)
+@receiver(post_delete, sender=Proveedor)
+def invalidate_proveedor_cache(sender, instance, **kwargs):
+    bump_on_commit('catalog', f'proveedor:{instance.pk}')
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+def generate_image_renditions(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Genera en segundo plano las variantes responsive de la imagen subida"""
+    if raw or not instance.image:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    schedule_renditions(instance.image.name)
+
+
+@receiver(post_save, sender=Product)
+def refresh_related_on_save(sender, instance, raw=False, **kwargs):
+    """Actualiza en segundo plano los productos relacionados afectados por el cambio"""
+    if raw:
+        return
+    schedule_related_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def refresh_related_on_delete(sender, instance, **kwargs):
+    """Los productos que lo tenían como relacionado necesitan un nuevo vecino"""
+    schedule_related_refresh(
+        RelatedProduct.objects.filter(related_id=instance.pk).values_list('product_id', flat=True)
+    )
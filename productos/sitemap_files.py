@@ -0,0 +1,195 @@
+# productos/sitemap_files.py
+# Sitemaps pregenerados en disco: un índice y archivos .xml.gz por tramos
+#
+# Cada sección de SITEMAPS se parte en tramos de SITEMAP_SHARD_SIZE URLs que se
+# escriben ya comprimidos en SITEMAP_ROOT. Un manifiesto (manifest.json) guarda
+# el hash y el lastmod de cada tramo: al regenerar, solo se reescriben los
+# archivos cuyo contenido ha cambiado, así que su fecha y su ETag se mantienen
+# y los buscadores reciben 304 en los que no han cambiado.
+#
+# Se regeneran cuando cambia la versión del catálogo (productos/cache.py): en
+# segundo plano mientras se sirven los anteriores, o con manage.py build_sitemaps.
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core import checks
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_versions
+from .sitemaps import SITEMAPS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+
+_lock = threading.Lock()
+_building = set()
+
+
+class SiteInfo:
+    """Lo que Sitemap.get_urls() necesita del sitio (no usamos django.contrib.sites)"""
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.name = domain
+
+
+def sitemap_root():
+    return getattr(settings, 'SITEMAP_ROOT', os.path.join(settings.BASE_DIR, 'cache', 'sitemaps'))
+
+
+def shard_name(section, page):
+    return f'sitemap-{section}-{page}.xml.gz'
+
+
+def shard_path(name):
+    return os.path.join(sitemap_root(), name)
+
+
+def current_version():
+    """Firma de la versión del catálogo de la que dependen los sitemaps"""
+    versions = get_versions(['site', 'catalog'])
+    return f'{versions["site"]}-{versions["catalog"]}'
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(sitemap_root(), MANIFEST)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, data):
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporary, 'wb') as fh:
+        fh.write(data)
+    os.replace(temporary, path)
+
+
+def build_sitemaps(base_url, version=None):
+    """
+    Genera los tramos y el manifiesto. Devuelve el número de archivos escritos
+    (los que no han cambiado se dejan como están).
+    """
+    parsed = urlsplit(base_url)
+    site, protocol = SiteInfo(parsed.netloc), parsed.scheme or 'https'
+    root = sitemap_root()
+    os.makedirs(root, exist_ok=True)
+
+    previous = load_manifest() or {}
+    old_shards = previous.get('shards', {}) if previous.get('base_url') == base_url else {}
+    shards, written = {}, 0
+    for section, sitemap_class in SITEMAPS.items():
+        sitemap = sitemap_class()
+        for page in sitemap.paginator.page_range:
+            urls = sitemap.get_urls(page=page, site=site, protocol=protocol)
+            content = render_to_string('sitemap.xml', {'urlset': urls}).encode('utf-8')
+            digest = hashlib.sha1(content).hexdigest()
+            lastmods = [url['lastmod'] for url in urls if url['lastmod']]
+            name = shard_name(section, page)
+            shards[name] = {
+                'sha1': digest,
+                'lastmod': max(lastmods).isoformat() if lastmods else None,
+            }
+            if old_shards.get(name, {}).get('sha1') != digest or not os.path.exists(shard_path(name)):
+                # mtime=0: el mismo XML produce siempre el mismo .gz
+                _write_atomic(shard_path(name), gzip.compress(content, mtime=0))
+                written += 1
+
+    # Tramos que ya no existen (catálogo más pequeño)
+    for name in os.listdir(root):
+        if name.startswith('sitemap-') and name.endswith('.xml.gz') and name not in shards:
+            os.remove(os.path.join(root, name))
+
+    changed = written or set(shards) != set(old_shards)
+    manifest = {
+        'version': version or current_version(),
+        'base_url': base_url,
+        'modified': timezone.now().isoformat() if changed else previous.get('modified'),
+        'shards': shards,
+    }
+    _write_atomic(os.path.join(root, MANIFEST), json.dumps(manifest, indent=1).encode('utf-8'))
+    return written
+
+
+def _build_safely(base_url, version):
+    try:
+        build_sitemaps(base_url, version)
+    except Exception:
+        logger.exception('Error regenerando los sitemaps')
+    finally:
+        with _lock:
+            _building.discard(base_url)
+
+
+def ensure_sitemaps(request):
+    """
+    Manifiesto vigente para servir el índice. Solo si no hay sitemaps se generan
+    en la petición (con SITEMAP_BASE_URL o, si no está configurada, el host de
+    esa primera petición). Si el catálogo o SITEMAP_BASE_URL han cambiado se
+    regeneran en segundo plano y mientras tanto se sirven los anteriores: una
+    petición por otro host o protocolo nunca provoca una regeneración.
+    """
+    manifest = load_manifest()
+    base_url = (
+        getattr(settings, 'SITEMAP_BASE_URL', '').rstrip('/')
+        or (manifest or {}).get('base_url')
+        or request.build_absolute_uri('/').rstrip('/')
+    )
+    version = current_version()
+    if manifest is None:
+        build_sitemaps(base_url, version)
+        return load_manifest()
+    if manifest.get('version') == version and manifest.get('base_url') == base_url:
+        return manifest
+
+    if not getattr(settings, 'SITEMAP_BACKGROUND_REBUILD', True):
+        build_sitemaps(base_url, version)
+        return load_manifest()
+    with _lock:
+        if base_url in _building:
+            return manifest
+        _building.add(base_url)
+    from .images import get_executor
+    get_executor().submit(_build_safely, base_url, version)
+    return manifest
+
+
+def shard_index(manifest, base_url=None):
+    """
+    [(url, lastmod)] de los tramos, para el índice. Con `base_url` (el host de la
+    petición) los tramos se enlazan en ese host: un índice solo puede enlazar
+    sitemaps de su mismo sitio. Su contenido usa siempre la URL del manifiesto.
+    """
+    base_url = base_url or manifest['base_url']
+    return [
+        (f'{base_url}/{name}', parse_datetime(entry['lastmod']) if entry['lastmod'] else None)
+        for name, entry in manifest['shards'].items()
+    ]
+
+
+def index_etag(manifest, base_url=None):
+    base_url = base_url or manifest['base_url']
+    signature = repr((base_url, sorted((name, e['sha1']) for name, e in manifest['shards'].items())))
+    return hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+
+def check_base_url(app_configs, **kwargs):
+    """manage.py check --deploy: sin SITEMAP_BASE_URL el host de los sitemaps depende de la primera petición"""
+    if getattr(settings, 'SITEMAP_BASE_URL', ''):
+        return []
+    return [checks.Warning(
+        'SITEMAP_BASE_URL no está configurada',
+        hint='Los sitemaps usarán el host y el protocolo de la primera petición que los genere. '
+             'Configura la URL pública del sitio, p. ej. https://coimpre.pythonanywhere.com',
+        id='productos.W001',
+    )]
@@ -1,10 +1,30 @@
 # productos/sitemaps.py
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max, Q
 from django.urls import reverse
-from .models import Product, Category, Subcategory, Proveedor
-from datetime import datetime
+from .models import Product, Category, Proveedor
 
-class StaticViewSitemap(Sitemap):
+
+def catalog_lastmod():
+    """Última modificación de cualquier producto activo"""
+    return Product.objects.filter(is_active=True).aggregate(lastmod=Max('updated_at'))['lastmod']
+
+
+def last_product_update():
+    """Anotación con la última modificación de los productos activos de una categoría / proveedor"""
+    return Max('product__updated_at', filter=Q(product__is_active=True))
+
+
+class ShardedSitemap(Sitemap):
+    """Sitemap partido en archivos de SITEMAP_SHARD_SIZE URLs (ver productos/sitemap_files.py)"""
+
+    @property
+    def limit(self):
+        return getattr(settings, 'SITEMAP_SHARD_SIZE', 5000)
+
+
+class StaticViewSitemap(ShardedSitemap):
     priority = 0.8
     changefreq = 'weekly'
 
@@ -15,37 +35,58 @@ class StaticViewSitemap(Sitemap):
         return reverse(item)
 
     def lastmod(self, item):
-        return datetime.now()
+        # Las páginas de contacto no cambian con el catálogo
+        if item == 'contact':
+            return None
+        if not hasattr(self, '_catalog_lastmod'):
+            self._catalog_lastmod = catalog_lastmod()
+        return self._catalog_lastmod
 
-class ProductSitemap(Sitemap):
+class ProductSitemap(ShardedSitemap):
     changefreq = 'weekly'
     priority = 0.9
 
     def items(self):
-        return Product.objects.filter(is_active=True).select_related('category', 'proveedor')
+        # Solo lo que va en el XML: ni JOIN ni columnas de texto largas
+        return Product.objects.filter(is_active=True).only('slug', 'updated_at').order_by('pk')
 
     def lastmod(self, obj):
-        return obj.updated_at if hasattr(obj, 'updated_at') else obj.created_at
+        return obj.updated_at
 
     def location(self, obj):
         return obj.get_absolute_url()
 
-class CategorySitemap(Sitemap):
+class CategorySitemap(ShardedSitemap):
     changefreq = 'monthly'
     priority = 0.7
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.exclude(slug='').annotate(last_product_update=last_product_update()).order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.last_product_update
 
     def location(self, obj):
         return reverse('productos:product_list') + f'?category={obj.slug}'
 
-class ProveedorSitemap(Sitemap):
+class ProveedorSitemap(ShardedSitemap):
     changefreq = 'monthly'
     priority = 0.6
 
     def items(self):
-        return Proveedor.objects.filter(is_active=True)
+        return Proveedor.objects.exclude(slug='').annotate(last_product_update=last_product_update()).order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.last_product_update
 
     def location(self, obj):
-        return reverse('productos:proveedor_list')
\ No newline at end of file
+        return reverse('productos:proveedor_detail', args=[obj.slug])
+
+
+# Configuración de sitemaps para SEO
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'products': ProductSitemap,
+    'categories': CategorySitemap,
+    'suppliers': ProveedorSitemap,
+}
@@ -0,0 +1,95 @@
+# productos/sku.py
+# Asignación de SKU sin colisiones: PROV-CAT-NNNNNN
+#
+# Cada prefijo PROV-CAT tiene su contador en SkuSequence. Los números se
+# reservan por bloques con un UPDATE ... SET next_value = next_value + N, que
+# la base de datos serializa: dos workers de gunicorn nunca reciben el mismo
+# número. Cada proceso guarda en memoria el resto de su bloque, así que crear
+# un producto suele costar cero consultas extra. Los números de un bloque que
+# no se llegan a usar (reinicio del worker) se pierden: quedan huecos, nunca
+# duplicados.
+import re
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Product, SkuSequence
+
+DIGITS = 6
+
+
+def sku_prefix(proveedor_name=None, category_name=None):
+    """PROV-CAT: 3 letras del proveedor y 2 de la categoría (GEN / XX si faltan)"""
+    proveedor_code = ''.join(ch for ch in (proveedor_name or '').upper() if ch.isalnum())[:3] or 'GEN'
+    category_code = ''.join(ch for ch in (category_name or '').upper() if ch.isalnum())[:2] or 'XX'
+    return f'{proveedor_code}-{category_code}'
+
+
+def format_sku(prefix, number):
+    return f'{prefix}-{number:0{DIGITS}d}'
+
+
+def first_free_number(prefix):
+    """Primer número libre para un prefijo nuevo, por si ya hay SKU escritos a mano con ese formato"""
+    pattern = re.compile(rf'^{re.escape(prefix)}-(\d+)$')
+    numbers = [
+        int(match.group(1))
+        for match in map(pattern.match, Product.objects.filter(sku__startswith=f'{prefix}-').values_list('sku', flat=True))
+        if match
+    ]
+    return max(numbers, default=0) + 1
+
+
+def reserve_block(prefix, count):
+    """Reserva `count` números consecutivos del prefijo en la base de datos. Devuelve un range"""
+    with transaction.atomic():
+        # El UPDATE va primero: toma el bloqueo de escritura antes de leer
+        updated = SkuSequence.objects.filter(prefix=prefix).update(next_value=F('next_value') + count)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    SkuSequence.objects.create(prefix=prefix, next_value=first_free_number(prefix) + count)
+            except IntegrityError:
+                # Otro worker ha creado la secuencia a la vez
+                SkuSequence.objects.filter(prefix=prefix).update(next_value=F('next_value') + count)
+        end = SkuSequence.objects.filter(prefix=prefix).values_list('next_value', flat=True).get()
+    return range(end - count, end)
+
+
+class SkuAllocator:
+    """Reparte SKU de bloques reservados; un bloque por prefijo y proceso"""
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.blocks = {}
+
+    def get_block_size(self):
+        return self.block_size or getattr(settings, 'SKU_BLOCK_SIZE', 20)
+
+    def allocate(self, prefix, count=1):
+        """Lista de `count` SKU nuevos con ese prefijo"""
+        if count > 1 or connection.in_atomic_block:
+            # Lotes: un único bloque exacto. Dentro de una transacción tampoco se
+            # guarda nada en memoria: si se deshace, los números vuelven a la secuencia
+            return [format_sku(prefix, number) for number in reserve_block(prefix, count)]
+
+        with self.lock:
+            block = self.blocks.get(prefix)
+            if not block:
+                block = self.blocks[prefix] = deque(reserve_block(prefix, self.get_block_size()))
+            return [format_sku(prefix, block.popleft())]
+
+
+allocator = SkuAllocator()
+
+
+def allocate_sku(prefix):
+    return allocator.allocate(prefix)[0]
+
+
+def allocate_skus(prefix, count):
+    return allocator.allocate(prefix, count)
@@ -0,0 +1,69 @@
+# productos/summaries.py
+# Resumen por proveedor y categoría de los productos activos
+# (ProveedorCategorySummary): las pestañas y conteos de la página del
+# proveedor salen de una lectura por índice en vez de contar sus productos.
+#
+# Las señales (productos/signals.py) recalculan solo los pares
+# (proveedor, categoría) que toca cada guardado; los cambios masivos
+# (acciones del admin, importación) recalculan sus proveedores completos.
+# `manage.py rebuild_proveedor_summaries` lo recalcula todo.
+#
+# Antes de sustituir las filas se bloquean las de sus proveedores (SELECT ...
+# FOR UPDATE, en orden de pk): dos guardados a la vez de productos del mismo
+# proveedor se turnan, y el segundo cuenta ya con lo que confirmó el primero
+# (en READ COMMITTED cada consulta ve lo confirmado) en vez de chocar con la
+# restricción única al insertar.
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Product, Proveedor, ProveedorCategorySummary
+
+
+def _replace(products, summaries, proveedor_ids=None):
+    """
+    Sustituye las filas de `summaries` por los conteos agrupados de `products`,
+    con los proveedores `proveedor_ids` (todos si es None) bloqueados
+    """
+    with transaction.atomic():
+        locked = Proveedor.objects.select_for_update().order_by('pk')
+        if proveedor_ids is not None:
+            locked = locked.filter(pk__in=proveedor_ids)
+        list(locked.values_list('pk', flat=True))
+        rows = (
+            products.filter(is_active=True)
+            .values('proveedor_id', 'category_id')
+            .annotate(productos_count=Count('pk'))
+            .order_by()
+        )
+        summaries.delete()
+        ProveedorCategorySummary.objects.bulk_create([ProveedorCategorySummary(**row) for row in rows])
+
+
+def refresh_summaries(pairs):
+    """Recalcula los pares (proveedor_id, category_id) indicados"""
+    condition = Q()
+    proveedor_ids = set()
+    for proveedor_id, category_id in set(pairs):
+        if proveedor_id:
+            condition |= Q(proveedor_id=proveedor_id, category_id=category_id)
+            proveedor_ids.add(proveedor_id)
+    if condition:
+        _replace(Product.objects.filter(condition), ProveedorCategorySummary.objects.filter(condition), proveedor_ids)
+
+
+def rebuild_summaries(proveedor_ids=None):
+    """Recalcula todas las filas de los proveedores indicados (todos si es None)"""
+    products = Product.objects.filter(proveedor__isnull=False)
+    summaries = ProveedorCategorySummary.objects.all()
+    if proveedor_ids is not None:
+        proveedor_ids = {pk for pk in proveedor_ids if pk}
+        if not proveedor_ids:
+            return
+        products = products.filter(proveedor_id__in=proveedor_ids)
+        summaries = summaries.filter(proveedor_id__in=proveedor_ids)
+    _replace(products, summaries, proveedor_ids)
+
+
+def proveedor_summaries(proveedor):
+    """Filas del proveedor con su categoría, ordenadas por nombre de categoría"""
+    return list(proveedor.category_summaries.select_related('category'))
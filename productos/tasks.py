@@ -0,0 +1,110 @@
+# productos/tasks.py
+# Tareas de la cola de trabajos (productos/jobs.py) que las vistas del panel
+# encolan en vez de hacer el trabajo pesado dentro de la petición.
+#
+# Todas se pueden repetir sin efectos dobles: un reintento tras un fallo a
+# mitad no duplica filas ni falla por archivos que ya no existen.
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+
+from .images import delete_renditions
+from .jobs import enqueue, task
+from .models import Product, ProductImage, ProductVideo
+from .related import refresh_related_products
+
+logger = logging.getLogger(__name__)
+
+
+def is_valid_image(path):
+    try:
+        with default_storage.open(path, 'rb') as fh:
+            Image.open(fh).verify()
+    except Exception:
+        return False
+    return True
+
+
+@task('delete_media_files')
+def delete_media_files(images=(), files=()):
+    """Borra del almacenamiento imágenes (con sus variantes responsive) y otros archivos"""
+    for path in images:
+        delete_renditions(path)
+        default_storage.delete(path)
+    for path in files:
+        default_storage.delete(path)
+
+
+@task('attach_gallery_media')
+def attach_gallery_media(product_id, images=(), videos=()):
+    """
+    Crea las imágenes y videos de la galería a partir de archivos ya guardados
+    en el almacenamiento. Las imágenes que no se pueden abrir se descartan y
+    se borra su archivo.
+    """
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None:
+        delete_media_files(files=[item['path'] for item in [*images, *videos]])
+        return
+    existing = set(product.images.values_list('image', flat=True))
+    existing.update(product.videos.values_list('video', flat=True))
+    invalid = []
+    with transaction.atomic():
+        for item in images:
+            if item['path'] in existing:
+                continue
+            if not is_valid_image(item['path']):
+                logger.warning('Imagen de galería no válida descartada: %s', item['path'])
+                invalid.append(item['path'])
+                continue
+            ProductImage.objects.create(
+                product=product,
+                image=item['path'],
+                alt_text=item.get('alt_text', ''),
+                order=item.get('order', 1),
+                is_main=bool(item.get('is_main')),
+            )
+        for item in videos:
+            if item['path'] in existing:
+                continue
+            ProductVideo.objects.create(
+                product=product,
+                video=item['path'],
+                title=item.get('title', ''),
+                description=item.get('description', ''),
+                order=item.get('order', 1),
+            )
+    delete_media_files(files=invalid)
+
+
+@task('refresh_related_products')
+def refresh_related(ids):
+    """Actualización de productos relacionados acumulada (productos/related.py)"""
+    refresh_related_products(ids)
+
+
+@task('delete_product')
+def delete_product(product_id):
+    """
+    Elimina el producto con sus filas dependientes y encola el borrado de sus
+    archivos en la misma transacción: o se hacen las dos cosas o ninguna.
+    No hace nada si el producto se reactivó después de pedir la eliminación.
+    """
+    with transaction.atomic():
+        product = (
+            Product.objects.select_for_update()
+            .filter(pk=product_id, is_active=False, delete_requested_at__isnull=False)
+            .first()
+        )
+        if product is None:
+            logger.info('Producto %s ya eliminado o reactivado: no se elimina', product_id)
+            return
+        images = [name for name in product.images.values_list('image', flat=True) if name]
+        files = [name for name in product.videos.values_list('video', flat=True) if name]
+        if product.image:
+            images.append(product.image.name)
+        files += [field.name for field in (product.video, product.ficha_tecnica) if field]
+        product.delete()
+        enqueue('delete_media_files', {'images': images, 'files': files}, key=f'delete-product-files:{product_id}')
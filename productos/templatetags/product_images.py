@@ -0,0 +1,51 @@
+# productos/templatetags/product_images.py
+# Etiquetas para servir imágenes responsive (srcset/sizes) a partir de sus variantes
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import RENDITION_FORMATS, available_renditions
+
+register = template.Library()
+
+
+def _srcset(candidates):
+    return ', '.join(f'{url} {width}w' for url, width in candidates)
+
+
+@register.simple_tag
+def image_srcset(image, ext='jpg'):
+    """Valor del atributo srcset de una imagen en el formato indicado ('' si no hay variantes)"""
+    if not image:
+        return ''
+    return _srcset(available_renditions(image.name).get(ext, []))
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', alt='', **attrs):
+    """
+    <picture> con variantes WebP y JPEG para una imagen subida.
+    Si todavía no hay variantes se emite un <img> normal con el original.
+
+    Uso: {% responsive_image product.image sizes="(max-width: 768px) 50vw, 25vw" alt=product.name class="card-img-top" %}
+    """
+    if not image:
+        return ''
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+
+    renditions = available_renditions(image.name)
+    if not renditions['jpg']:
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, extra)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (RENDITION_FORMATS[ext][1], _srcset(renditions[ext]), sizes)
+            for ext in RENDITION_FORMATS if ext != 'jpg' and renditions[ext]
+        ),
+    )
+    return format_html(
+        '<picture class="responsive-image">{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        sources, image.url, _srcset(renditions['jpg']), sizes, alt, extra,
+    )
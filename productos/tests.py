@@ -1,3 +1,1446 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from types import MappingProxyType
+from unittest import mock, skipUnless
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import CommandError
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from coimpres_cuba.context_processors import I18N_CATALOGS, compile_catalogs, get_catalog, i18n_context
+from coimpres_cuba.database import database_config
+from coimpres_cuba.db_router import PrimaryReplicaRouter, RoutingState, routing_state
+from coimpres_cuba import urls as project_urls
+from coimpres_cuba.middleware import PrimaryReplicaMiddleware
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+from asgiref.sync import iscoroutinefunction
+
+from . import urls as productos_urls
+from .models import Category, Job, Product, ProductImage, ProductVideo, Proveedor, ProveedorCategorySummary, RelatedProduct, SkuSequence, Subcategory, UploadSession
+from .benchmark import compare_results, seed_products
+from .cache import get_versions
+from .counters import reconcile_counters, update_active
+from .facets import get_facet_counts
+from .importer import RowError, import_catalog, parse_decimal, read_rows
+from .images import generate_renditions, rendition_name
+from .pagination import KeysetPaginator
+from .related import is_available as numpy_available, rebuild_related_products, refresh_related_products
+from .search import search_products
+from .sitemap_files import build_sitemaps
+from .sku import SkuAllocator, sku_prefix
+from . import home_feed, jobs, uploads
+from . import related as related_module
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RELATED_PRODUCTS_AUTO_REFRESH=False,
+    SITEMAP_BACKGROUND_REBUILD=False,
+)
+class CatalogTestCase(TestCase):
+    """Base de los tests: caché en memoria, vacía al empezar cada test; sin hilos en segundo plano"""
+
+    def setUp(self):
+        cache.clear()
+        home_feed._memory = (None, [])
+
+
+class ProductSearchTests(CatalogTestCase):
+    """Búsqueda de texto completo del catálogo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(name='Lavazza', id_unico='LAV')
+        cls.category = Category.objects.create(name='Café')
+        cls.espresso = Product.objects.create(
+            name='Café Espresso', short_description='Tostado oscuro',
+            proveedor=cls.proveedor, category=cls.category,
+        )
+        cls.pasta = Product.objects.create(
+            name='Pasta Penne', description='Pasta con café de acompañamiento',
+            category=cls.category,
+        )
+
+    def test_ranks_name_matches_first(self):
+        results = list(search_products(Product.objects.all(), 'cafe'))
+        self.assertEqual(results, [self.espresso, self.pasta])
+
+    def test_prefix_and_sku_match(self):
+        results = search_products(Product.objects.all(), self.espresso.sku[:6])
+        self.assertIn(self.espresso, results)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.pasta.name = 'Fusilli'
+        self.pasta.description = ''
+        self.pasta.save()
+        self.assertFalse(search_products(Product.objects.all(), 'penne').exists())
+        self.espresso.delete()
+        self.assertFalse(search_products(Product.objects.all(), 'espresso').exists())
+
+    def test_special_characters_do_not_break_query(self):
+        self.assertFalse(search_products(Product.objects.all(), '"*()').exists())
+        self.assertTrue(search_products(Product.objects.all(), 'espresso"').exists())
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search_products(Product.objects.all(), 'penne').count(), 1)
+
+    def test_catalog_and_admin_panel_use_index(self):
+        response = self.client.get(reverse('productos:product_list'), {'q': 'espresso'})
+        self.assertEqual(list(response.context['object_list']), [self.espresso])
+
+        User.objects.create_user('staff', password='pass', is_staff=True)
+        self.client.login(username='staff', password='pass')
+        response = self.client.get(reverse('productos:admin_panel'), {'search': 'penne'})
+        self.assertEqual(list(response.context['products']), [self.pasta])
+
+
+class I18nContextTests(TestCase):
+    """Catálogos de traducción compilados y context processor perezoso (coimpres_cuba/context_processors.py)"""
+
+    def request(self, **params):
+        request = RequestFactory().get('/', params)
+        request.session = mock.MagicMock()
+        request.session.get.return_value = 'it'
+        return request
+
+    def test_catalogs_are_read_only_and_fall_back_to_spanish(self):
+        self.assertIsInstance(I18N_CATALOGS, MappingProxyType)
+        self.assertIsInstance(get_catalog('en'), MappingProxyType)
+        with self.assertRaises(TypeError):
+            get_catalog('en')['home'] = 'Inicio'
+        catalogs = compile_catalogs({'es': {'home': 'Inicio', 'contact': 'Contacto'}, 'en': {'home': 'Home'}})
+        self.assertEqual(dict(catalogs['en']), {'home': 'Home', 'contact': 'Contacto'})
+        self.assertIs(get_catalog('xx'), get_catalog('es'))
+
+    def test_session_is_only_read_when_the_template_uses_it(self):
+        request = self.request()
+        context = i18n_context(request)
+        self.assertEqual(request.session.mock_calls, [])
+        self.assertEqual(context['i18n']['home'], get_catalog('it')['home'])
+        request.session.get.assert_called_once_with('selected_language', 'es')
+
+        request = self.request(lang='en')
+        self.assertEqual(str(i18n_context(request)['lang']), 'en')
+        request.session.__setitem__.assert_called_once_with('selected_language', 'en')
+        request.session.get.assert_not_called()
+
+    def test_profile_command_runs(self):
+        out = StringIO()
+        call_command('profile_context_processors', '--iterations', '2', '--lang', 'en', stdout=out)
+        self.assertIn('coimpres_cuba.context_processors.i18n_context', out.getvalue())
+
+
+class KeysetPaginationTests(CatalogTestCase):
+    """Paginación por cursor del catálogo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(23):
+            Product.objects.create(name=f'Producto {i}', destacado=i % 5 == 0, en_oferta=i % 3 == 0)
+
+    def test_walks_forward_and_back_in_catalog_order(self):
+        expected = list(Product.objects.all())
+        paginator = KeysetPaginator(Product.objects.all(), 10)
+
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 3])
+        self.assertEqual([p for page in pages for p in page], expected)
+        self.assertFalse(pages[0].has_previous())
+
+        back = paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual(list(back), expected[10:20])
+        self.assertEqual(list(paginator.get_page(back.previous_cursor)), expected[:10])
+
+    def test_catalog_view_skips_count_and_rejects_bad_cursor(self):
+        url = reverse('productos:product_list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('COUNT(*)' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(len(response.context['object_list']), 10)
+        self.assertIn('next_page_query', response.context)
+        response = self.client.get(url + '?' + response.context['next_page_query'])
+        self.assertEqual(len(response.context['object_list']), 10)
+        self.assertEqual(self.client.get(url, {'cursor': 'manipulado'}).status_code, 404)
+
+
+class FacetCountTests(CatalogTestCase):
+    """Conteos de facetas de la barra de filtros"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.food = Category.objects.create(name='Comida')
+        cls.build = Category.objects.create(name='Construcción')
+        cls.barilla = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        Product.objects.create(name='Penne', category=cls.food, proveedor=cls.barilla, en_oferta=True)
+        Product.objects.create(name='Fusilli', category=cls.food, proveedor=cls.barilla, destacado=True)
+        Product.objects.create(name='Cemento', category=cls.build)
+        Product.objects.create(name='Inactivo', category=cls.build, is_active=False)
+
+    def test_counts_exclude_own_facet_and_use_one_query(self):
+        with self.assertNumQueries(1):
+            counts = get_facet_counts('', {'category': self.food.pk})
+        # La faceta seleccionada no se filtra a sí misma
+        self.assertEqual(counts['category'], {self.food.pk: 2, self.build.pk: 1})
+        self.assertEqual(counts['proveedor'], {self.barilla.pk: 2})
+        self.assertEqual((counts['en_oferta'], counts['destacado']), (1, 1))
+
+    def test_cached_until_product_changes(self):
+        get_facet_counts('', {})
+        with self.assertNumQueries(0):
+            get_facet_counts('', {})
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Ladrillo', category=self.build)
+        self.assertEqual(get_facet_counts('', {})['category'][self.build.pk], 2)
+
+    def test_sidebar_shows_counts(self):
+        response = self.client.get(reverse('productos:product_list'), {'q': 'penne'})
+        self.assertContains(response, 'Comida (1)')
+        self.assertContains(response, 'Construcción (0)')
+
+
+class ImageRenditionTests(CatalogTestCase):
+    """Variantes responsive de las imágenes subidas"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, width=1000, height=600):
+        buffer = BytesIO()
+        Image.new('RGBA', (width, height), (200, 30, 30, 128)).save(buffer, 'PNG')
+        with self.captureOnCommitCallbacks(execute=False):
+            return Product.objects.create(
+                name='Foto', image=SimpleUploadedFile('foto.png', buffer.getvalue(), 'image/png'),
+            )
+
+    def test_generates_smaller_widths_only_and_is_resumable(self):
+        name = self.upload().image.name
+        self.assertEqual(generate_renditions(name), 6)  # 320, 640 y 960 en WebP y JPEG
+        self.assertFalse(default_storage.exists(rendition_name(name, 1280, 'jpg')))
+        with Image.open(default_storage.open(rendition_name(name, 640, 'webp'))) as image:
+            self.assertEqual(image.size, (640, 384))
+        self.assertEqual(generate_renditions(name), 0)
+        self.assertEqual(generate_renditions(name, force=True), 6)
+
+    def test_template_tag_emits_srcset(self):
+        product = self.upload()
+        template = Template('{% load product_images %}{% responsive_image product.image sizes="50vw" alt="Foto" class="x" %}')
+        self.assertNotIn('srcset', template.render(Context({'product': product})))
+        generate_renditions(product.image.name)
+        html = template.render(Context({'product': product}))
+        self.assertIn('<source type="image/webp" srcset="/media/products/foto.w320.webp 320w', html)
+        self.assertIn('sizes="50vw" alt="Foto" class="x" loading="lazy"', html)
+
+    def test_rendering_reads_the_manifest_without_probing_storage(self):
+        product = self.upload()
+        generate_renditions(product.image.name)
+        template = Template('{% load product_images %}{% responsive_image product.image %}')
+        with mock.patch.object(FileSystemStorage, 'exists', side_effect=AssertionError('stat')):
+            html = template.render(Context({'product': product}))
+            # Sin caché: una sola lectura del manifiesto y vuelve a la caché
+            cache.clear()
+            with mock.patch.object(FileSystemStorage, 'open', autospec=True, side_effect=FileSystemStorage.open) as opened:
+                self.assertEqual(template.render(Context({'product': product})), html)
+                self.assertEqual(template.render(Context({'product': product})), html)
+        self.assertEqual(opened.call_count, 1)
+        self.assertIn('foto.w960.jpg 960w', html)
+
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=1000)
+class ChunkedUploadTests(CatalogTestCase):
+    """Subidas por partes reanudables de la galería"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.staging_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging_dir)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_STAGING_DIR=self.staging_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.product = Product.objects.create(name='Penne')
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        buffer = BytesIO()
+        Image.effect_noise((64, 64), 50).convert('RGB').save(buffer, 'PNG')
+        self.png = buffer.getvalue()
+
+    def start(self, kind='image', content=None, **data):
+        content = self.png if content is None else content
+        data = {'kind': kind, 'filename': 'foto.png', 'size': len(content), 'order': 3, **data}
+        return self.client.post(reverse('productos:upload_start', args=[self.product.pk]), data).json()
+
+    def send(self, state, content, offset):
+        url = reverse('productos:upload_chunk', args=[state['upload_id']])
+        chunk = content[offset:offset + state['chunk_size']]
+        return self.client.post(url, chunk, content_type='application/octet-stream',
+                                headers={'X-Upload-Offset': str(offset)})
+
+    def test_resume_after_dropped_connection_and_finalize(self):
+        state = self.start(checksum=hashlib.sha256(self.png).hexdigest(), alt_text='Pasta')
+        self.assertEqual(self.send(state, self.png, 0).json()['offset'], 1000)
+        # Parte repetida: 409 con el offset desde el que seguir
+        response = self.send(state, self.png, 0)
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 1000))
+
+        # Conexión cortada a mitad de parte, y la siguiente llega a otro worker
+        class DroppedStream:
+            def __init__(self, data):
+                self.data = data
+
+            def read(self, size):
+                if not self.data:
+                    raise OSError('connection reset')
+                block, self.data = self.data[:size], self.data[size:]
+                return block
+
+        upload = UploadSession.objects.get()
+        with self.assertRaises(uploads.UploadError):
+            uploads.write_chunk(upload, 1000, DroppedStream(self.png[1000:1400]), 1000)
+        uploads._hashers.clear()
+        offset = self.client.get(reverse('productos:upload_chunk', args=[state['upload_id']])).json()['offset']
+        self.assertEqual(offset, 1400)
+
+        finalize = reverse('productos:upload_finalize', args=[self.product.pk])
+        self.assertEqual(self.client.post(finalize, {'upload_ids[]': [state['upload_id']]}).status_code, 409)
+        while offset < len(self.png):
+            offset = self.send(state, self.png, offset).json()['offset']
+
+        video = self.start(kind='video', content=b'video' * 100, filename='demo.mp4', title='Demo')
+        self.assertTrue(self.send(video, b'video' * 100, 0).json()['complete'])
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(finalize, {'upload_ids[]': [state['upload_id'], video['upload_id']]})
+        self.assertEqual(response.json()['images'], 1)
+        image = self.product.images.get()
+        self.assertEqual((image.alt_text, image.order), ('Pasta', 3))
+        self.assertEqual(default_storage.open(image.image.name).read(), self.png)
+        self.assertEqual(self.product.videos.get().title, 'Demo')
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_failed_finalize_keeps_uploads_retryable(self):
+        image = self.start()
+        for offset in range(0, len(self.png), 1000):
+            self.send(image, self.png, offset)
+        video = self.start(kind='video', content=b'video' * 100, filename='demo.mp4')
+        self.send(video, b'video' * 100, 0)
+        finalize = reverse('productos:upload_finalize', args=[self.product.pk])
+        data = {'upload_ids[]': [image['upload_id'], video['upload_id']]}
+
+        with mock.patch.object(ProductVideo.objects, 'create', side_effect=RuntimeError('db')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(finalize, data)
+        # Nada creado, y los archivos siguen en UPLOAD_STAGING_DIR listos para reintentar
+        self.assertFalse(self.product.images.exists())
+        for upload in UploadSession.objects.all():
+            self.assertTrue(upload.is_complete)
+            self.assertTrue(os.path.exists(uploads.staging_path(upload)))
+
+        self.assertEqual(self.client.post(finalize, data).json()['images'], 1)
+        self.assertEqual(default_storage.open(self.product.images.get().image.name).read(), self.png)
+        # Segunda confirmación (doble clic): las subidas ya no existen
+        self.assertEqual(self.client.post(finalize, data).status_code, 404)
+
+        lost = self.start()
+        for offset in range(0, len(self.png), 1000):
+            self.send(lost, self.png, offset)
+        os.remove(uploads.staging_path(UploadSession.objects.get()))
+        self.assertEqual(self.client.post(finalize, {'upload_ids[]': [lost['upload_id']]}).status_code, 410)
+
+    def test_concurrent_retry_of_a_chunk_is_rejected(self):
+        state = self.start()
+        upload = UploadSession.objects.get()
+        # Subida sin confirmar: fuera de MEDIA_ROOT, no se puede servir
+        self.assertFalse(default_storage.exists(upload.path))
+        self.assertEqual(self.client.get(f'/media/{upload.path}').status_code, 404)
+
+        class SlowStream:
+            """La petición original aún escribiendo cuando llega el reintento"""
+            def __init__(test_stream, data):
+                test_stream.data = data
+
+            def read(test_stream, size):
+                retry = self.send(state, self.png, 0)
+                self.assertEqual((retry.status_code, retry.json()['offset']), (409, 0))
+                block, test_stream.data = test_stream.data[:size], test_stream.data[size:]
+                return block
+
+        uploads.write_chunk(upload, 0, SlowStream(self.png[:1000]), 1000)
+        offset = 1000
+        while offset < len(self.png):
+            offset = self.send(state, self.png, offset).json()['offset']
+        with open(uploads.staging_path(upload), 'rb') as fh:
+            self.assertEqual(fh.read(), self.png)
+        upload.refresh_from_db()
+        self.assertEqual((upload.sha256, upload.writer), (hashlib.sha256(self.png).hexdigest(), ''))
+
+    def test_checksum_mismatch_restarts_upload(self):
+        content = b'x' * 1500
+        state = self.start(kind='video', content=content, checksum='0' * 64)
+        self.send(state, content, 0)
+        response = self.send(state, content, 1000)
+        self.assertEqual((response.status_code, response.json()['offset']), (422, 0))
+
+    def test_rejects_invalid_uploads(self):
+        state = self.start(filename='../../evil.png')
+        self.assertTrue(UploadSession.objects.get().path.startswith('products/gallery/evil'))
+        self.assertEqual(self.start(kind='pdf')['error'], 'Tipo de archivo no soportado')
+        # Una imagen que no lo es no se confirma
+        content = b'not an image'
+        fake = self.start(content=content)
+        self.send(fake, content, 0)
+        response = self.client.post(reverse('productos:upload_finalize', args=[self.product.pk]),
+                                    {'upload_ids[]': [fake['upload_id']]})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.product.images.count(), 0)
+        self.client.logout()
+        self.assertEqual(self.send(state, self.png, 0).status_code, 302)
+
+class PageCacheTests(CatalogTestCase):
+    """Caché de páginas completas de las vistas públicas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.category = Category.objects.create(name='Pasta')
+        cls.product = Product.objects.create(name='Penne', category=cls.category, proveedor=cls.proveedor)
+
+    def test_second_request_is_served_from_cache(self):
+        url = self.product.get_absolute_url()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(1):  # validadores HTTP (productos/conditional.py)
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Penne')
+
+    def test_key_depends_on_language_and_normalized_query(self):
+        url = reverse('productos:product_list')
+        self.client.get(url, {'category': 'pasta', 'utm_source': 'x', 'q': ''})
+        self.assertEqual(self.client.get(url, {'category': 'pasta'})['X-Page-Cache'], 'HIT')
+        # ?lang= escribe en la sesión: nunca se cachea, y la página en inglés es otra entrada
+        self.assertFalse(self.client.get(url, {'category': 'pasta', 'lang': 'en'}).has_header('X-Page-Cache'))
+        self.assertEqual(self.client.get(url, {'category': 'pasta'})['X-Page-Cache'], 'MISS')
+
+    def test_product_change_invalidates_its_pages(self):
+        urls = [self.product.get_absolute_url(), reverse('productos:product_list'), reverse('home')]
+        for url in urls:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Fusilli'
+            self.product.save()
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response['X-Page-Cache'], 'MISS')
+            self.assertContains(response, 'Fusilli')
+
+    def test_staff_is_never_cached(self):
+        url = reverse('home')
+        self.client.get(url)
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertFalse(self.client.get(url).has_header('X-Page-Cache'))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class HomeFeedTests(CatalogTestCase):
+    """Portada materializada (productos/home_feed.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Pasta')
+        cls.products = [Product.objects.create(name=f'Pasta {i}', category=cls.category) for i in range(18)]
+        cls.featured = Product.objects.create(name='Espresso', destacado=True)
+        Product.objects.create(name='Retirado', destacado=True, is_active=False)
+
+    def home_version(self):
+        return get_versions(['home'])['home']
+
+    def test_featured_first_and_served_without_queries(self):
+        response = self.client.get(reverse('home'))
+        cards = response.context['featured_products']
+        self.assertEqual(len(cards), home_feed.HOME_PRODUCTS)
+        self.assertEqual(cards[0].pk, self.featured.pk)
+        self.assertNotIn('Retirado', [card.name for card in cards])
+        self.assertContains(response, 'Pasta')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+
+    def test_rebuilt_only_when_home_changes(self):
+        home_feed.get_home_feed()
+        outside = self.products[0]  # el más antiguo: fuera de los 16
+        self.assertFalse(home_feed.in_home_feed(outside.pk))
+        version = self.home_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            outside.price = 10
+            outside.save()
+        self.assertEqual(self.home_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            outside.destacado = True
+            outside.save()
+        self.assertIn(outside.pk, [card.pk for card in home_feed.get_home_feed()[:2]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.featured.name = 'Ristretto'
+            self.featured.save()
+        self.assertIn('Ristretto', [card.name for card in home_feed.get_home_feed()])
+
+    def test_offer_toggle_outside_feed_rebuilds_it(self):
+        home_feed.get_home_feed()
+        outside = self.products[1]
+        self.assertFalse(home_feed.in_home_feed(outside.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            outside.en_oferta = True
+            outside.save()
+        self.assertTrue(home_feed.in_home_feed(outside.pk))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ProveedorDirectoryTests(CatalogTestCase):
+    """Directorio de proveedores (productos/directory.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.barilla = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.lavazza = Proveedor.objects.create(name='Lavazza', id_unico='LAV')
+        Proveedor.objects.create(name='Sin productos', id_unico='NONE')
+        for i in range(5):
+            Product.objects.create(name=f'Pasta {i}', proveedor=cls.barilla)
+        Product.objects.create(name='Retirado', proveedor=cls.barilla, is_active=False)
+        cls.espresso = Product.objects.create(name='Espresso', proveedor=cls.lavazza)
+
+    def test_counts_and_previews_with_fixed_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('productos:proveedor_list'))
+        directory = response.context['proveedores_con_productos']
+        self.assertEqual([(item['proveedor'], item['productos_count']) for item in directory],
+                         [(self.barilla, 5), (self.lavazza, 1)])
+        self.assertEqual([product.name for product in directory[0]['preview']], ['Pasta 4', 'Pasta 3', 'Pasta 2'])
+        self.assertEqual(directory[1]['preview'], [self.espresso])
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('productos:proveedor_list'))
+
+    def test_product_change_refreshes_directory(self):
+        self.client.get(reverse('productos:proveedor_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.espresso.is_active = False
+            self.espresso.save()
+        response = self.client.get(reverse('productos:proveedor_list'))
+        self.assertEqual([item['proveedor'] for item in response.context['proveedores_con_productos']], [self.barilla])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ProveedorDetailTests(CatalogTestCase):
+    """Página del proveedor: resumen por categoría y paginación por cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.pasta = Category.objects.create(name='Pasta')
+        cls.salsas = Category.objects.create(name='Salsas')
+        for i in range(30):
+            Product.objects.create(name=f'Penne {i}', proveedor=cls.proveedor, category=cls.pasta)
+        cls.pesto = Product.objects.create(name='Pesto', proveedor=cls.proveedor, category=cls.salsas)
+
+    def summary(self):
+        return {
+            summary.category_id: summary.productos_count
+            for summary in ProveedorCategorySummary.objects.filter(proveedor=self.proveedor)
+        }
+
+    def test_summaries_follow_product_changes(self):
+        self.assertEqual(self.summary(), {self.pasta.pk: 30, self.salsas.pk: 1})
+        self.pesto.category = self.pasta
+        self.pesto.save()
+        self.assertEqual(self.summary(), {self.pasta.pk: 31})
+        self.pesto.is_active = False
+        self.pesto.save()
+        self.assertEqual(self.summary(), {self.pasta.pk: 30})
+        self.pasta.delete()
+        self.assertEqual(self.summary(), {None: 30})
+
+    def test_refresh_locks_the_proveedor_before_replacing_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            Product.objects.create(name='Pesto rosso', proveedor=self.proveedor, category=self.salsas)
+        sql = [query['sql'] for query in queries]
+        lock = next(i for i, q in enumerate(sql) if q.startswith('SELECT "productos_proveedor"."id"'))
+        delete = next(i for i, q in enumerate(sql) if q.startswith('DELETE FROM "productos_proveedorcategorysummary"'))
+        self.assertLess(lock, delete)
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', sql[lock])
+        self.assertEqual(self.summary(), {self.pasta.pk: 30, self.salsas.pk: 2})
+
+    def test_paginated_with_constant_queries(self):
+        url = reverse('productos:proveedor_detail', args=[self.proveedor.slug])
+        with self.assertNumQueries(4):  # proveedor, resumen, página de productos y su galería
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['productos']), 24)
+        self.assertEqual([(s.category, s.productos_count) for s in response.context['category_summaries']],
+                         [(self.pasta, 30), (self.salsas, 1)])
+        self.assertEqual(response.context['total_productos_count'], 31)
+
+        response = self.client.get(f"{url}?{response.context['next_page_query']}")
+        self.assertEqual(len(response.context['productos']), 7)
+        self.assertNotIn('next_page_query', response.context)
+
+        response = self.client.get(url, {'category': self.salsas.slug})
+        self.assertEqual(list(response.context['productos']), [self.pesto])
+        self.assertEqual(response.context['productos_count'], 1)
+
+
+class TaxonomyCounterTests(CatalogTestCase):
+    """Contadores desnormalizados de la taxonomía (productos/counters.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pasta = Category.objects.create(name='Pasta')
+        cls.salsas = Category.objects.create(name='Salsas')
+        cls.corta = Subcategory.objects.create(name='Corta', category=cls.pasta)
+        cls.proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+
+    def counts(self):
+        for obj in (self.pasta, self.salsas, self.corta, self.proveedor):
+            obj.refresh_from_db()
+        return self.pasta.productos_count, self.salsas.productos_count, self.corta.productos_count, self.proveedor.productos_count
+
+    def test_product_save_and_delete_move_counters(self):
+        penne = Product.objects.create(name='Penne', category=self.pasta, subcategory=self.corta, proveedor=self.proveedor)
+        Product.objects.create(name='Fusilli', category=self.pasta, is_active=False)
+        self.assertEqual(self.counts(), (1, 0, 1, 1))
+
+        penne.category = self.salsas
+        penne.subcategory = None
+        penne.save()
+        self.assertEqual(self.counts(), (0, 1, 0, 1))
+
+        penne.is_active = False
+        penne.save()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+        penne.is_active = True
+        penne.save()
+        penne.delete()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+    def test_subcategory_counter(self):
+        larga = Subcategory.objects.create(name='Larga', category=self.pasta)
+        self.pasta.refresh_from_db()
+        self.assertEqual(self.pasta.subcategorias_count, 2)
+        larga.category = self.salsas
+        larga.save()
+        larga.delete()
+        self.assertEqual(
+            list(Category.objects.order_by('pk').values_list('subcategorias_count', flat=True)), [1, 0],
+        )
+
+    def test_saving_a_stale_instance_keeps_counters(self):
+        stale_proveedor = Proveedor.objects.get(pk=self.proveedor.pk)
+        stale_category = Category.objects.get(pk=self.pasta.pk)
+        Product.objects.create(name='Penne', category=self.pasta, proveedor=self.proveedor)
+        Subcategory.objects.create(name='Larga', category=self.pasta)
+
+        stale_proveedor.name = 'Barilla S.p.A.'
+        stale_proveedor.save()
+        stale_category.name = 'Pastas'
+        stale_category.save()
+        self.assertEqual(self.counts(), (1, 0, 0, 1))
+        self.assertEqual(self.pasta.subcategorias_count, 2)
+        self.assertEqual((self.pasta.name, self.proveedor.name), ('Pastas', 'Barilla S.p.A.'))
+
+    def test_bulk_update_and_reconcile(self):
+        for i in range(3):
+            Product.objects.create(name=f'Penne {i}', category=self.pasta, proveedor=self.proveedor)
+        update_active(Product.objects.filter(name__in=['Penne 0', 'Penne 1']), False)
+        self.assertEqual(self.counts(), (1, 0, 0, 1))
+        self.assertEqual(reconcile_counters(), [])
+
+        Category.objects.filter(pk=self.pasta.pk).update(productos_count=7)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_counters', '--check', stdout=StringIO())
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.counts()[0], 1)
+
+
+class JobQueueTests(CatalogTestCase):
+    """Cola de trabajos en segundo plano (productos/jobs.py, productos/tasks.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        self.product = Product.objects.create(name='Penne')
+
+    def test_idempotency_key_returns_existing_job(self):
+        first = jobs.enqueue('delete_product', {'product_id': self.product.pk}, key='delete-product:1')
+        again = jobs.enqueue('delete_product', {'product_id': self.product.pk}, key='delete-product:1')
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retry_with_backoff_then_failed(self):
+        job = jobs.enqueue('attach_gallery_media', {'product_id': self.product.pk, 'bogus': 1}, max_attempts=2)
+        with self.assertLogs('productos.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIn('TypeError', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(jobs.run_pending(), 0)  # aún no vence la espera
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('productos.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(jobs.retry_jobs(Job.objects.all()), 1)
+        self.assertEqual(jobs.backoff(1), 10)
+        self.assertEqual(jobs.backoff(20), 3600)
+
+    def test_delete_image_view_defers_file_removal(self):
+        path = default_storage.save('products/gallery/foto.jpg', BytesIO(b'data'))
+        image = ProductImage.objects.create(product=self.product, image=path)
+        self.client.get(reverse('productos:delete_product_image', args=[image.pk]))
+        self.assertFalse(ProductImage.objects.exists())
+        self.assertTrue(default_storage.exists(path))
+        call_command('run_jobs', '--once', '--workers', '1', stdout=StringIO())
+        self.assertFalse(default_storage.exists(path))
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_add_and_delete_product_in_background(self):
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8)).save(buffer, 'PNG')
+        gallery = [SimpleUploadedFile('foto.png', buffer.getvalue()), SimpleUploadedFile('rota.png', b'no')]
+        self.client.post(reverse('productos:add_product'), {'name': 'Fusilli', 'is_active': 'on', 'gallery_images[]': gallery})
+        fusilli = Product.objects.get(name='Fusilli')
+        self.assertFalse(fusilli.images.exists())
+        with self.assertLogs('productos.tasks', 'WARNING'):
+            jobs.run_pending()
+            # Repetir la tarea (reintento tras un fallo a mitad) no duplica la galería
+            jobs.TASKS['attach_gallery_media'](**Job.objects.get().payload)
+        self.assertEqual(fusilli.images.count(), 1)
+        path = fusilli.images.get().image.name
+
+        self.client.post(reverse('productos:delete_product', args=[fusilli.pk]))
+        fusilli.refresh_from_db()
+        self.assertFalse(fusilli.is_active)
+        call_command('run_jobs', '--once', '--workers', '1', stdout=StringIO())
+        self.assertFalse(Product.objects.filter(pk=fusilli.pk).exists())
+        self.assertFalse(default_storage.exists(path))
+
+        response = self.client.get(reverse('productos:jobs'))
+        self.assertEqual(response.json()['summary'][Job.DONE], 3)
+
+    def test_reactivated_product_is_not_deleted(self):
+        self.client.post(reverse('productos:delete_product', args=[self.product.pk]))
+        self.client.get(reverse('productos:toggle_product_status', args=[self.product.pk]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.is_active, self.product.delete_requested_at), (True, None))
+        jobs.run_pending()
+        self.assertTrue(Product.objects.filter(pk=self.product.pk).exists())
+
+        # Sin worker, el panel avisa de los trabajos que esperan
+        self.client.post(reverse('productos:delete_product', args=[self.product.pk]))
+        Job.objects.update(run_after=timezone.now() - timedelta(hours=1))
+        response = self.client.get(reverse('productos:admin_panel'))
+        self.assertEqual(response.context['job_backlog'], {'overdue': 1, 'failed': 0})
+        self.assertContains(response, 'manage.py run_jobs')
+
+
+class ConditionalGetTests(CatalogTestCase):
+    """ETag / Last-Modified y respuestas 304"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Penne')
+
+    def test_detail_returns_304_without_rendering(self):
+        url = self.product.get_absolute_url()
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertTemplateNotUsed('productos/product_detail.html'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_gallery_change_changes_detail_etag(self):
+        url = self.product.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        ProductVideo.objects.create(product=self.product, video='products/videos/demo.mp4', title='Demo')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_follows_catalog_version(self):
+        url = reverse('productos:product_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Fusilli')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_language_switch_is_never_short_circuited(self):
+        etags = {}
+        for lang in ('en', 'es', 'en'):
+            response = self.client.get('/', {'lang': lang}, HTTP_IF_NONE_MATCH=etags.get(lang, ''))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.session['selected_language'], lang)
+            etags[lang] = self.client.get('/')['ETag']
+        self.assertNotEqual(etags['en'], etags['es'])
+
+
+class MediaServingTests(CatalogTestCase):
+    """Entrega de archivos media en producción (coimpres_cuba/media.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        default_storage.save('products/videos/demo.mp4', BytesIO(bytes(range(100))))
+        self.url = '/media/products/videos/demo.mp4'
+
+    def test_full_response_has_validators_and_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=200-').status_code, 416)
+        # If-Range con una versión anterior: archivo completo
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"viejo"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_offload_to_proxy(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/products/videos/demo.mp4')
+        self.assertEqual(response.content, b'')
+
+    def test_rejects_path_traversal(self):
+        self.assertEqual(self.client.get('/media/products/%2E%2E/%2E%2E/settings.py').status_code, 404)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ProductDetailQueryTests(CatalogTestCase):
+    """Presupuesto de consultas de la ficha de producto"""
+
+    # validadores HTTP + producto con FK + imágenes + videos + relacionados
+    MAX_QUERIES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Pasta')
+        cls.proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.product = Product.objects.create(name='Penne', category=cls.category, proveedor=cls.proveedor)
+        for rank, name in enumerate(('Fusilli', 'Rigatoni', 'Farfalle', 'Orecchiette')):
+            related = Product.objects.create(name=name, category=cls.category)
+            RelatedProduct.objects.create(product=cls.product, related=related, rank=rank, score=1.0 - rank / 10)
+        for order in range(3):
+            ProductImage.objects.create(product=cls.product, image=f'products/gallery/{order}.jpg', order=order, is_main=order == 1)
+        ProductVideo.objects.create(product=cls.product, video='products/videos/demo.mp4')
+
+    def test_detail_page_query_budget(self):
+        with self.assertNumQueries(self.MAX_QUERIES):
+            response = self.client.get(self.product.get_absolute_url())
+        context = response.context
+        self.assertEqual(context['main_image'].name, 'products/gallery/1.jpg')
+        self.assertEqual(len(context['gallery_images']), 3)
+        self.assertEqual([p.name for p in context['related_products']], ['Fusilli', 'Rigatoni', 'Farfalle'])
+
+
+@skipUnless(numpy_available(), 'NumPy no está instalado')
+class RelatedProductsTests(CatalogTestCase):
+    """Tabla de productos relacionados precalculada"""
+
+    @classmethod
+    def setUpTestData(cls):
+        pasta = Category.objects.create(name='Pasta')
+        corta = Subcategory.objects.create(name='Corta', category=pasta)
+        cafe = Category.objects.create(name='Café')
+        cls.penne = Product.objects.create(name='Penne rigate', category=pasta, subcategory=corta)
+        cls.fusilli = Product.objects.create(name='Fusilli', category=pasta, subcategory=corta)
+        cls.spaghetti = Product.objects.create(name='Spaghetti', category=pasta)
+        cls.espresso = Product.objects.create(name='Espresso tostado', category=cafe)
+        cls.moka = Product.objects.create(name='Moka tostado', category=cafe)
+
+    def related_names(self, product):
+        return [link.related.name for link in product.related_links.select_related('related')]
+
+    def test_ranks_by_taxonomy_and_text(self):
+        rebuild_related_products()
+        self.assertEqual(self.related_names(self.penne)[:2], ['Fusilli', 'Spaghetti'])
+        self.assertEqual(self.related_names(self.espresso)[0], 'Moka tostado')
+
+    def test_incremental_refresh(self):
+        rebuild_related_products()
+        self.fusilli.is_active = False
+        self.fusilli.save()
+        refresh_related_products([self.fusilli.pk])
+        self.assertFalse(RelatedProduct.objects.filter(related=self.fusilli).exists())
+        self.assertFalse(self.fusilli.related_links.exists())
+        self.assertEqual(self.related_names(self.penne)[0], 'Spaghetti')
+
+    @override_settings(RELATED_PRODUCTS_AUTO_REFRESH=True)
+    def test_saves_coalesce_into_one_debounced_job(self):
+        rebuild_related_products()
+        with mock.patch('productos.related.load_catalog_matrix') as load:
+            for product in (self.moka, self.penne):
+                with self.captureOnCommitCallbacks(execute=True):
+                    product.save()
+        load.assert_not_called()
+        job = Job.objects.get()
+        self.assertEqual(job.payload, {'ids': sorted([self.penne.pk, self.moka.pk])})
+        self.assertGreater(job.run_after, timezone.now())
+        Job.objects.update(run_after=timezone.now())
+        jobs.run_pending()
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(self.related_names(self.moka)[0], 'Espresso tostado')
+
+
+@skipUnless(numpy_available(), 'NumPy no está instalado')
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RELATED_PRODUCTS_AUTO_REFRESH=False,
+    SITEMAP_BACKGROUND_REBUILD=False,
+)
+class RelatedProductsWorkerTests(TransactionTestCase):
+    """Actualización de relacionados desde el worker (en autocommit, sin transacción)"""
+
+    def setUp(self):
+        cache.clear()
+        pasta = Category.objects.create(name='Pasta')
+        self.cafe = Category.objects.create(name='Café')
+        self.penne = Product.objects.create(name='Penne rigate', category=pasta)
+        self.fusilli = Product.objects.create(name='Fusilli rigate', category=pasta)
+        Product.objects.create(name='Espresso tostado', category=self.cafe)
+
+    def test_cached_detail_page_never_keeps_old_neighbours(self):
+        rebuild_related_products()
+        url = self.penne.get_absolute_url()
+        self.assertContains(self.client.get(url), self.fusilli.get_absolute_url())
+        # Deja de parecerse a Penne (update(): sin señales que invaliden la ficha)
+        Product.objects.filter(pk=self.fusilli.pk).update(name='Moka tostado', category=self.cafe)
+
+        # Una petición justo después de invalidar guarda en caché lo que haya en ese momento
+        bump_versions = related_module.bump_versions
+
+        def bump_and_render(*groups):
+            bump_versions(*groups)
+            self.client.get(url)
+
+        with mock.patch('productos.related.bump_versions', side_effect=bump_and_render):
+            refresh_related_products([self.fusilli.pk])
+        self.assertNotContains(self.client.get(url), self.fusilli.get_absolute_url())
+
+
+class PerformanceMetricsTests(CatalogTestCase):
+    """Server-Timing y métricas por vista (coimpres_cuba/metrics.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        settings_override = override_settings(METRICS_DIR=self.metrics_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_server_timing_header(self):
+        Product.objects.create(name='Penne')
+        response = self.client.get(reverse('productos:product_list'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cp;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_metrics_endpoint_is_staff_only_and_aggregates_workers(self):
+        url = reverse('productos:metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        # Otro worker que ya volcó sus métricas
+        with open(f'{self.metrics_dir}/99999-1.json', 'w') as fh:
+            fh.write('[{"view": "productos:product_list", "method": "GET", '
+                     '"latency_ms": {"counts": [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0], "sum": 3.0}, '
+                     '"queries": {"counts": [0, 0, 0, 1, 0, 0, 0, 0, 0, 0], "sum": 4}}]')
+        self.client.get(reverse('productos:product_list'))
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        views = {entry['view']: entry for entry in self.client.get(url).json()['views']}
+        self.assertGreaterEqual(views['productos:product_list']['requests'], 2)
+        text = self.client.get(url, {'format': 'prometheus'}).content.decode()
+        self.assertIn('# TYPE coimpre_request_duration_seconds histogram', text)
+        self.assertIn('coimpre_request_duration_seconds_bucket{view="productos:product_list",method="GET",le="0.005"}', text)
+
+
+class BenchmarkComparisonTests(TestCase):
+    """Comparación de resultados del benchmark con la línea base"""
+
+    def test_flags_regressions_over_threshold(self):
+        baseline = {'1000': {'home': {'4': {'p95_ms': 10.0, 'throughput_rps': 100.0}}}}
+        within = {'1000': {'home': {'4': {'p95_ms': 11.5, 'throughput_rps': 90.0}}}}
+        worse = {'1000': {'home': {'4': {'p95_ms': 13.0, 'throughput_rps': 70.0}}}}
+        self.assertEqual(compare_results(within, baseline, 0.2), [])
+        self.assertEqual(len(compare_results(worse, baseline, 0.2)), 2)
+
+
+class BenchmarkSeedTests(CatalogTestCase):
+    """Catálogo sembrado por manage.py benchmark"""
+
+    def test_seeded_catalog_has_its_denormalized_data(self):
+        seed_products(60)
+        self.assertEqual(reconcile_counters(repair=False), [])
+        proveedor = Proveedor.objects.filter(productos_count__gt=0).first()
+        self.assertIsNotNone(proveedor)
+        response = self.client.get(reverse('productos:proveedor_list'))
+        self.assertContains(response, proveedor.name)
+        summaries = ProveedorCategorySummary.objects.filter(proveedor=proveedor)
+        self.assertEqual(sum(summary.productos_count for summary in summaries), proveedor.productos_count)
+        if numpy_available():
+            self.assertTrue(RelatedProduct.objects.exists())
+
+
+class CatalogImportTests(CatalogTestCase):
+    """Importación de listas de precios de proveedores"""
+
+    CSV = (
+        'Código;Nombre;Proveedor;Categoría;Subcategoría;Precio;Destacado\n'
+        'BAR-001;Penne Rigate;Barilla;Pasta;Corta;1.234,50;sí\n'
+        'BAR-002;Spaghetti;Barilla;Pasta;Larga;2,10;\n'
+        ';Sin código;Barilla;Pasta;;3;\n'
+        'BAR-003;;Barilla;Pasta;;4;\n'
+    )
+
+    def run_import(self, text):
+        return import_catalog(read_rows(BytesIO(text.encode('utf-8')), 'lista.csv'), batch_size=2)
+
+    def test_creates_products_and_taxonomy(self):
+        result = self.run_import(self.CSV)
+        self.assertEqual((result.created, result.error_count, result.taxonomy_created), (3, 1, 4))
+        penne = Product.objects.get(sku='BAR-001')
+        self.assertEqual(str(penne.price), '1234.50')
+        self.assertTrue(penne.destacado)
+        self.assertEqual((penne.proveedor.name, penne.category.name, penne.subcategory.name), ('Barilla', 'Pasta', 'Corta'))
+        self.assertTrue(search_products(Product.objects.all(), 'penne').exists())
+        self.assertTrue(Product.objects.get(name='Sin código').sku.startswith('BAR-PA-'))
+
+    def test_reimport_only_touches_changed_rows(self):
+        self.run_import(self.CSV)
+        result = self.run_import(self.CSV)
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 3))
+        result = self.run_import(self.CSV.replace('2,10', '2,25'))
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, 2))
+        self.assertEqual(str(Product.objects.get(sku='BAR-002').price), '2.25')
+
+    def test_decimal_separators(self):
+        for value, expected in (('1,234.50', '1234.50'), ('1.234,50', '1234.50'), ('12,5', '12.5'), ('1.234.567', '1234567')):
+            self.assertEqual(str(parse_decimal(value)), expected)
+        for value in ('1,2.3', '1,2,3'):
+            with self.assertRaises(RowError):
+                parse_decimal(value)
+
+    def test_moving_a_product_invalidates_the_old_proveedor_page(self):
+        self.run_import('Código;Nombre;Proveedor\nBAR-001;Penne Rigate;Barilla\n')
+        url = reverse('productos:proveedor_detail', args=['barilla'])
+        self.assertContains(self.client.get(url), 'Penne Rigate')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import('Código;Nombre;Proveedor\nBAR-001;Penne Rigate;Lavazza\n')
+        self.assertNotContains(self.client.get(url), 'Penne Rigate')
+
+    def test_rows_without_sku_only_match_their_own_proveedor(self):
+        self.run_import('Nombre;Proveedor;Precio\nAceite de oliva 1L;Prov A;5\n')
+        original = Product.objects.get()
+        for _ in range(2):
+            result = self.run_import('Nombre;Proveedor;Precio\nAceite de oliva 1L;Prov B;7\n')
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 1))
+        original.refresh_from_db()
+        self.assertEqual((original.proveedor.name, str(original.price)), ('Prov A', '5.00'))
+        other = Product.objects.exclude(pk=original.pk).get()
+        self.assertEqual((other.slug, other.proveedor.name), ('aceite-de-oliva-1l-prov-b', 'Prov B'))
+
+    def test_same_name_in_one_batch_gets_distinct_slugs(self):
+        result = self.run_import(
+            'Código;Nombre;Proveedor\n'
+            'A1;Aceite de oliva 1L;Prov A\n'
+            'B1;Aceite de oliva 1L;Prov B\n'
+        )
+        self.assertEqual((result.created, result.error_count), (2, 0))
+        slugs = set(Product.objects.values_list('slug', flat=True))
+        self.assertEqual(slugs, {'aceite-de-oliva-1l', 'aceite-de-oliva-1l-b1'})
+
+
+
+class CatalogExportTests(CatalogTestCase):
+    """Exportación en streaming desde el panel de administración"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.barilla = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        lavazza = Proveedor.objects.create(name='Lavazza', id_unico='LAV')
+        pasta = Category.objects.create(name='Pasta')
+        Product.objects.create(name='Penne <Rigate>', sku='BAR-1', proveedor=cls.barilla, category=pasta, price='1.50')
+        Product.objects.create(name='Spaghetti', sku='BAR-2', proveedor=cls.barilla, category=pasta, is_active=False)
+        Product.objects.create(name='Qualità Oro', sku='LAV-1', proveedor=lavazza)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+
+    def export(self, fmt, **params):
+        response = self.client.get(reverse('productos:export_products', args=[fmt]), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_honours_panel_filters_and_reimports(self):
+        response, content = self.export('csv', proveedor=self.barilla.pk, is_active='1')
+        self.assertIn('attachment; filename="catalogo-', response['Content-Disposition'])
+        lines = content.decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('BAR-1;Penne <Rigate>;Barilla;Pasta;'))
+        # El archivo exportado se puede volver a importar tal cual
+        result = import_catalog(read_rows(BytesIO(content), 'catalogo.csv'))
+        self.assertEqual((result.created, result.error_count), (0, 0))
+
+    def test_jsonl_and_xlsx(self):
+        _, content = self.export('jsonl', search='qualita')
+        records = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([r['sku'] for r in records], ['LAV-1'])
+
+        _, content = self.export('xlsx')
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('Penne &lt;Rigate&gt;', sheet)
+        self.assertIn('<v>1.50</v>', sheet)
+
+    def test_staff_only(self):
+        self.client.logout()
+        response = self.client.get(reverse('productos:export_products', args=['csv']))
+        self.assertEqual(response.status_code, 302)
+
+
+
+class SitemapTests(CatalogTestCase):
+    """Índice de sitemaps y tramos .xml.gz pregenerados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.barilla = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.pasta = Category.objects.create(name='Pasta')
+        for name in ('Penne', 'Spaghetti', 'Fusilli'):
+            Product.objects.create(name=name, proveedor=cls.barilla, category=cls.pasta)
+        Product.objects.create(name='Inactivo', category=cls.pasta, is_active=False)
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings_override = override_settings(SITEMAP_ROOT=root, SITEMAP_SHARD_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def shard(self, name):
+        response = self.client.get(f'/{name}')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        return gzip.decompress(b''.join(response.streaming_content)).decode()
+
+    def test_index_shards_and_lastmod(self):
+        response = self.client.get('/sitemap.xml')
+        index = response.content.decode()
+        for name in ('static-1', 'products-1', 'products-2', 'categories-1', 'suppliers-1'):
+            self.assertIn(f'http://testserver/sitemap-{name}.xml.gz', index)
+        self.assertNotIn('products-3', index)
+
+        products = self.shard('sitemap-products-1.xml.gz') + self.shard('sitemap-products-2.xml.gz')
+        self.assertIn('/productos/penne/', products)
+        self.assertNotIn('inactivo', products)
+        newest = Product.objects.filter(is_active=True).latest('updated_at').updated_at
+        suppliers = self.shard('sitemap-suppliers-1.xml.gz')
+        self.assertIn('/productos/proveedores/barilla/', suppliers)
+        self.assertIn(f'<lastmod>{newest.date().isoformat()}', suppliers)
+
+    def test_validators_and_incremental_rebuild(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        shard = self.client.get('/sitemap-products-2.xml.gz')
+        self.assertEqual(
+            self.client.get('/sitemap-products-2.xml.gz', HTTP_IF_NONE_MATCH=shard['ETag']).status_code, 304
+        )
+        robots = self.client.get('/robots.txt')
+        self.assertIn('Sitemap: http://testserver/sitemap.xml', robots.content.decode())
+        self.assertEqual(self.client.get('/robots.txt', HTTP_IF_NONE_MATCH=robots['ETag']).status_code, 304)
+
+        # Nada ha cambiado: no se reescribe ningún archivo
+        self.assertEqual(build_sitemaps('http://testserver'), 0)
+        # Cambia una URL del último tramo: solo se reescribe ese archivo
+        Product.objects.filter(name='Fusilli').update(slug='fusilli-bucati')
+        self.assertEqual(build_sitemaps('http://testserver'), 1)
+        self.assertIn('/productos/fusilli-bucati/', self.shard('sitemap-products-2.xml.gz'))
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'www.testserver'])
+    def test_other_host_never_rebuilds(self):
+        self.client.get('/sitemap.xml')
+        with mock.patch('productos.sitemap_files.build_sitemaps') as build:
+            index = self.client.get('/sitemap.xml', HTTP_HOST='www.testserver', secure=True).content.decode()
+            self.client.get('/sitemap.xml')
+        build.assert_not_called()
+        # El índice enlaza los tramos en el host de la petición; su contenido usa el del manifiesto
+        self.assertIn('https://www.testserver/sitemap-products-1.xml.gz', index)
+        self.assertIn('http://testserver/productos/penne/', self.shard('sitemap-products-1.xml.gz'))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RELATED_PRODUCTS_AUTO_REFRESH=False,
+)
+class SkuAllocatorTests(TransactionTestCase):
+    """SKU por prefijo reservados por bloques (fuera de transacción, como en producción)"""
+
+    def test_blocks_are_shared_between_workers_without_collisions(self):
+        worker_a, worker_b = SkuAllocator(block_size=5), SkuAllocator(block_size=5)
+        with CaptureQueriesContext(connection) as queries:
+            first = [worker_a.allocate('LAV-CA')[0] for _ in range(3)]
+        reserved = len(queries)
+        self.assertEqual(first, ['LAV-CA-000001', 'LAV-CA-000002', 'LAV-CA-000003'])
+        self.assertEqual(worker_b.allocate('LAV-CA'), ['LAV-CA-000006'])
+        self.assertEqual(worker_a.allocate('LAV-CA', 2), ['LAV-CA-000011', 'LAV-CA-000012'])
+        self.assertEqual(SkuSequence.objects.get(prefix='LAV-CA').next_value, 13)
+        # Los dos siguientes salen del bloque en memoria: sin consultas
+        with CaptureQueriesContext(connection) as queries:
+            worker_a.allocate('LAV-CA')
+        self.assertEqual(len(queries), 0)
+        self.assertGreater(reserved, 0)
+
+    def test_new_sequence_skips_existing_manual_skus(self):
+        Product.objects.create(name='Manual', sku='LAV-CA-000041')
+        proveedor = Proveedor.objects.create(name='Lavazza', id_unico='LAV')
+        category = Category.objects.create(name='Café')
+        product = Product.objects.create(name='Qualità Oro', proveedor=proveedor, category=category)
+        self.assertEqual(sku_prefix('Lavazza', 'Café'), 'LAV-CA')
+        self.assertEqual(product.sku, 'LAV-CA-000042')
+        self.assertEqual(Product.objects.create(name='Sin datos').sku, 'GEN-XX-000001')
+
+
+class DatabaseProfileTests(TestCase):
+    """Perfiles de conexión elegidos por entorno (coimpres_cuba/database.py)"""
+
+    def test_sqlite_profile_applies_pragmas(self):
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'sqlite', 'SQLITE_MMAP_SIZE_MB': '64'}):
+            config = database_config('/srv/app')['default']
+        self.assertEqual(config['NAME'], '/srv/app/db.sqlite3')
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        for pragma in ('journal_mode=WAL', 'synchronous=NORMAL', 'busy_timeout=5000', 'mmap_size=67108864'):
+            self.assertIn(f'PRAGMA {pragma}', config['OPTIONS']['init_command'])
+
+    def test_postgres_profile_pools_connections(self):
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'postgres', 'POSTGRES_POOL_MAX': '20'}):
+            config = database_config('/srv/app')['default']
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 20)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'postgres', 'POSTGRES_POOL': 'false'}):
+            self.assertEqual(database_config('/srv/app')['default']['CONN_MAX_AGE'], 600)
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'mysql'}):
+            with self.assertRaises(ImproperlyConfigured):
+                database_config('/srv/app')
+
+    def test_replicas_from_environment(self):
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'sqlite', 'SQLITE_REPLICA_PATHS': '/srv/r1.sqlite3'}):
+            databases = database_config('/srv/app')
+        self.assertEqual(databases['replica_1']['NAME'], '/srv/r1.sqlite3')
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+        with mock.patch.dict('os.environ', {'DB_PROFILE': 'postgres', 'POSTGRES_REPLICA_HOSTS': 'r1:6432,r2'}):
+            databases = database_config('/srv/app')
+        self.assertEqual((databases['replica_1']['HOST'], databases['replica_1']['PORT']), ('r1', '6432'))
+        self.assertEqual((databases['replica_2']['HOST'], databases['replica_2']['PORT']), ('r2', '5432'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_READ_YOUR_WRITES_SECONDS=10)
+class PrimaryReplicaRoutingTests(TestCase):
+    """Lecturas públicas en réplicas, escrituras y lecturas posteriores en la primaria"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False):
+        """Pasa la petición por el middleware y devuelve (alias de lectura, respuesta)"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            if write:
+                self.router.db_for_write(Product)
+                seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+
+        response = PrimaryReplicaMiddleware(view)(request)
+        return seen, response
+
+    def test_public_reads_use_replica_until_a_write(self):
+        seen, response = self.route(self.factory.get('/productos/'))
+        self.assertEqual(seen, ['replica_1'])
+        self.assertNotIn('primary_until', response.cookies)
+
+        seen, response = self.route(self.factory.post('/contact/'), write=True)
+        self.assertEqual(seen, ['default', 'default'])
+        self.assertEqual(response.cookies['primary_until']['max-age'], 10)
+
+        # Dentro de la ventana de la cookie, el mismo cliente lee de la primaria
+        request = self.factory.get('/productos/')
+        request.COOKIES['primary_until'] = response.cookies['primary_until'].value
+        self.assertEqual(self.route(request)[0], ['default'])
+        request.COOKIES['primary_until'] = '1'
+        self.assertEqual(self.route(request)[0], ['replica_1'])
+
+    def test_panel_commands_and_migrations_use_primary(self):
+        self.assertEqual(self.route(self.factory.get('/productos/admin/'))[0], ['default'])
+        self.assertEqual(self.route(self.factory.get('/admin/productos/product/'))[0], ['default'])
+        # Fuera de una petición (comandos, hilos en segundo plano)
+        self.assertIsNone(routing_state.get())
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'productos'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'productos'))
+        # Una réplica por petición
+        token = routing_state.set(RoutingState(allow_replica=True))
+        self.addCleanup(routing_state.reset, token)
+        with self.settings(DATABASE_REPLICAS=['replica_1', 'replica_2']):
+            aliases = {self.router.db_for_read(Product) for _ in range(10)}
+        self.assertEqual(len(aliases), 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaCacheFillTests(CatalogTestCase):
+    """Las cachés versionadas se rellenan desde la primaria aunque la réplica vaya con retraso"""
+
+    def test_cache_fills_do_not_read_the_lagging_replica(self):
+        proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        Product.objects.create(name='Penne', proveedor=proveedor, destacado=True)
+        catalog_reads = []
+        real_db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def lagging_replica(router, model, **hints):
+            alias = real_db_for_read(router, model, **hints)
+            if model in (Product, Proveedor):
+                catalog_reads.append(alias)
+            # En los tests la réplica es la misma base: aquí solo importa a dónde se enruta
+            return 'default'
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', lagging_replica):
+            for url in ('/', reverse('productos:product_list'), reverse('productos:proveedor_list')):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertTrue(catalog_reads)
+        self.assertEqual(set(catalog_reads), {'default'})
+        self.assertEqual([card.name for card in home_feed.get_home_feed()], ['Penne'])
+
+
+def reload_urlconf():
+    """Vuelve a importar las URLconf, que eligen las vistas según ASYNC_PUBLIC_VIEWS"""
+    importlib.reload(productos_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+@override_settings(ASYNC_PUBLIC_VIEWS=True)
+class AsyncPublicViewsTests(CatalogTestCase):
+    """Vistas públicas asíncronas (ASGI): mismo contenido, caché y validadores que las síncronas"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urlconf()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        reload_urlconf()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(name='Barilla', id_unico='BAR')
+        cls.category = Category.objects.create(name='Pasta')
+        cls.subcategory = Subcategory.objects.create(name='Corta', category=cls.category)
+        cls.penne = Product.objects.create(
+            name='Penne', category=cls.category, subcategory=cls.subcategory, proveedor=cls.proveedor,
+        )
+        cls.espresso = Product.objects.create(name='Espresso', destacado=True)
+
+    def test_public_urls_resolve_to_async_views(self):
+        for url in ['/', reverse('productos:product_list'), self.penne.get_absolute_url(),
+                    reverse('productos:proveedor_list'), reverse('productos:proveedor_detail', args=[self.proveedor.slug])]:
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+
+    async def test_list_filters_facets_and_page_cache(self):
+        url = reverse('productos:product_list')
+        response = await self.async_client.get(url, {'subcategory': self.subcategory.slug})
+        self.assertContains(response, 'Penne')
+        self.assertNotContains(response, 'Espresso')
+        self.assertEqual(response.context['selected_category_from_subcategory'], self.category)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+        response = await self.async_client.get(url, {'subcategory': self.subcategory.slug})
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertEqual((await self.async_client.get(url, {'cursor': 'x'})).status_code, 404)
+
+    async def test_detail_conditional_get(self):
+        url = self.penne.get_absolute_url()
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Penne')
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get('/productos/no-existe/')).status_code, 404)
+
+    async def test_home_and_proveedor_pages(self):
+        response = await self.async_client.get(reverse('home'))
+        self.assertEqual([card.pk for card in response.context['featured_products']], [self.espresso.pk, self.penne.pk])
+
+        response = await self.async_client.get(reverse('productos:proveedor_list'))
+        self.assertEqual(response.context['proveedores_con_productos'],
+                         [{'proveedor': self.proveedor, 'productos_count': 1, 'preview': [self.penne]}])
+
+        url = reverse('productos:proveedor_detail', args=[self.proveedor.slug])
+        response = await self.async_client.get(url, {'category': 'otra'})
+        self.assertEqual((response.context['productos_count'], response.context['total_productos_count']), (0, 1))
+
+    async def test_language_from_session(self):
+        await self.async_client.get(reverse('change_language'), {'lang': 'en'})
+        response = await self.async_client.get(reverse('productos:product_list'))
+        self.assertEqual(str(response.context['lang']), 'en')
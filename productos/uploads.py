@@ -0,0 +1,344 @@
+# productos/uploads.py
+# Subidas por partes (reanudables) de imágenes y videos de la galería.
+#
+# El navegador crea una subida por archivo (start_upload), envía el archivo en
+# partes indicando el offset de cada una (write_chunk) y, cuando han llegado
+# todas, confirma las del producto en una sola transacción (finalize_uploads).
+#
+# Las partes se escriben en un archivo provisional de UPLOAD_STAGING_DIR, fuera
+# de MEDIA_ROOT (nada incompleto o sin verificar se sirve), y el SHA-256 se
+# calcula mientras llegan los datos. Cada parte se reclama con un UPDATE
+# condicional antes de escribirla: un reintento del cliente mientras la
+# petición original sigue escribiendo recibe 409 en vez de pisar el archivo.
+# Si la conexión se corta, el cliente pregunta el offset y sigue desde ahí.
+# Al confirmar, el archivo se mueve a su ruta final del almacenamiento.
+import hashlib
+import os
+import posixpath
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from .models import ProductImage, ProductVideo, UploadSession
+
+READ_BLOCK_SIZE = 64 * 1024
+
+# Campo de destino de cada tipo de subida (su upload_to decide la ruta)
+UPLOAD_FIELDS = {
+    'image': ProductImage._meta.get_field('image'),
+    'video': ProductVideo._meta.get_field('video'),
+}
+
+# SHA-256 en curso de cada subida en este proceso: {upload_id: (offset, hasher)}.
+# Si la siguiente parte llega a otro worker, se recalcula desde el archivo.
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Error de una subida, con el código HTTP de la respuesta"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class StagedFile(File):
+    """Archivo provisional completo: FileSystemStorage lo mueve en vez de copiarlo"""
+
+    def temporary_file_path(self):
+        return self.name
+
+
+def staging_path(upload):
+    return os.path.join(settings.UPLOAD_STAGING_DIR, f'{upload.upload_id.hex}.part')
+
+
+def chunk_lock_timeout():
+    return getattr(settings, 'UPLOAD_CHUNK_LOCK_SECONDS', 10 * 60)
+
+
+def store_gallery_file(kind, uploaded):
+    """Guarda un archivo subido en la ruta de su campo de galería y devuelve la ruta final"""
+    return default_storage.save(UPLOAD_FIELDS[kind].generate_filename(None, uploaded.name), uploaded)
+
+
+def chunk_size():
+    return getattr(settings, 'UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024)
+
+
+def upload_state(upload):
+    """Estado de la subida para el navegador (progreso y offset desde el que seguir)"""
+    return {
+        'upload_id': str(upload.upload_id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.received,
+        'complete': upload.is_complete,
+        'progress': round(upload.received * 100 / upload.size, 1) if upload.size else 100.0,
+        'chunk_size': chunk_size(),
+    }
+
+
+# =================== INICIO ===================
+
+def purge_stale_uploads():
+    """Elimina las subidas abandonadas (sin partes nuevas en UPLOAD_EXPIRY_HOURS) y sus archivos"""
+    limit = timezone.now() - timedelta(hours=getattr(settings, 'UPLOAD_EXPIRY_HOURS', 24))
+    stale = list(UploadSession.objects.filter(updated_at__lt=limit))
+    for upload in stale:
+        discard_staged(upload)
+        forget_hasher(upload)
+    UploadSession.objects.filter(pk__in=[upload.pk for upload in stale]).delete()
+    return len(stale)
+
+
+def discard_staged(upload):
+    try:
+        os.remove(staging_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def start_upload(product, kind, filename, size, checksum='', metadata=None):
+    """Crea la subida y su archivo provisional (vacío)"""
+    if kind not in UPLOAD_FIELDS:
+        raise UploadError('Tipo de archivo no soportado')
+    if size <= 0 or size > getattr(settings, 'UPLOAD_MAX_SIZE', 1024 ** 3):
+        raise UploadError('Tamaño de archivo no permitido', status=413)
+    checksum = checksum.strip().lower()
+    if checksum and (len(checksum) != 64 or any(c not in '0123456789abcdef' for c in checksum)):
+        raise UploadError('Checksum SHA-256 no válido')
+
+    purge_stale_uploads()
+
+    filename = posixpath.basename(filename.replace('\\', '/')).strip()
+    if not filename:
+        raise UploadError('Nombre de archivo no válido')
+
+    # Misma ruta que una subida normal del campo; el nombre libre se elige al confirmar
+    path = UPLOAD_FIELDS[kind].generate_filename(None, filename)
+    upload = UploadSession.objects.create(
+        product=product, kind=kind, filename=filename[:255], path=path,
+        size=size, checksum=checksum, metadata=metadata or {},
+    )
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    open(staging_path(upload), 'wb').close()
+    return upload
+
+
+# =================== PARTES ===================
+
+def forget_hasher(upload):
+    with _hashers_lock:
+        _hashers.pop(upload.upload_id, None)
+
+
+def hasher_at(upload, path):
+    """SHA-256 de los bytes ya recibidos: el de este proceso o recalculado desde el archivo"""
+    with _hashers_lock:
+        entry = _hashers.pop(upload.upload_id, None)
+    if entry is not None and entry[0] == upload.received:
+        return entry[1]
+
+    hasher = hashlib.sha256()
+    remaining = upload.received
+    with open(path, 'rb') as fh:
+        while remaining:
+            block = fh.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                raise UploadError('El archivo de la subida está incompleto', status=409)
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def claim_chunk(upload, offset):
+    """
+    Reclama la escritura de la parte que empieza en `offset`: solo una petición
+    a la vez por subida. Un reclamo más antiguo que UPLOAD_CHUNK_LOCK_SECONDS
+    se da por abandonado (worker caído). Devuelve el token del reclamo.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    free = Q(writer='') | Q(writing_since__lt=now - timedelta(seconds=chunk_lock_timeout()))
+    claimed = UploadSession.objects.filter(free, pk=upload.pk, received=offset).update(
+        writer=token, writing_since=now,
+    )
+    if not claimed:
+        raise UploadError('Otra petición está escribiendo esta parte', status=409)
+    return token
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Escribe en el archivo provisional `length` bytes de `stream` a partir de
+    `offset`, que debe coincidir con lo ya recibido (si no, 409 con el offset
+    correcto). Si la conexión se corta a mitad de la parte, lo escrito se conserva.
+    """
+    if upload.is_complete:
+        raise UploadError('La subida ya está completa', status=409)
+    if offset != upload.received:
+        raise UploadError('El offset no coincide con lo recibido', status=409)
+    if length <= 0 or length > chunk_size() or offset + length > upload.size:
+        raise UploadError('Tamaño de parte no válido', status=413)
+
+    token = claim_chunk(upload, offset)
+    try:
+        return _write_claimed_chunk(upload, token, offset, stream, length)
+    finally:
+        UploadSession.objects.filter(pk=upload.pk, writer=token).update(writer='', writing_since=None)
+
+
+def _write_claimed_chunk(upload, token, offset, stream, length):
+    path = staging_path(upload)
+    hasher = hasher_at(upload, path)
+    written = 0
+    interrupted = False
+    with open(path, 'r+b') as fh:
+        fh.seek(offset)
+        try:
+            while written < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                fh.write(block)
+                hasher.update(block)
+                written += len(block)
+        except OSError:
+            # Conexión cortada: se guarda lo escrito y el cliente reanuda desde ahí
+            interrupted = True
+        # Con la parte reclamada, offset es lo ya confirmado: nunca se recorta por debajo
+        fh.truncate(offset + written)
+
+    # Solo avanza si el reclamo sigue siendo nuestro (no caducó y lo tomó otra petición)
+    received = offset + written
+    updated = UploadSession.objects.filter(pk=upload.pk, received=offset, writer=token).update(
+        received=received, updated_at=timezone.now(),
+    )
+    if not updated:
+        forget_hasher(upload)
+        raise UploadError('Otra petición ha escrito esta parte', status=409)
+    upload.received = received
+
+    if upload.is_complete:
+        upload.sha256 = hasher.hexdigest()
+        if upload.checksum and upload.checksum != upload.sha256:
+            # Archivo corrupto: se descarta lo recibido y el cliente vuelve a empezar
+            UploadSession.objects.filter(pk=upload.pk).update(received=0)
+            upload.received = 0
+            with open(path, 'r+b') as fh:
+                fh.truncate(0)
+            raise UploadError('El checksum del archivo no coincide', status=422)
+        UploadSession.objects.filter(pk=upload.pk).update(sha256=upload.sha256)
+    else:
+        with _hashers_lock:
+            _hashers[upload.upload_id] = (received, hasher)
+
+    if interrupted or written < length:
+        raise UploadError('Parte incompleta: reanudar desde el offset recibido', status=409)
+    return upload
+
+
+# =================== CONFIRMACIÓN ===================
+
+def verify_image(upload):
+    try:
+        with open(staging_path(upload), 'rb') as fh:
+            Image.open(fh).verify()
+    except Exception:
+        raise UploadError(f'"{upload.filename}" no es una imagen válida', status=422)
+
+
+def move_staged(upload):
+    """Mueve el archivo provisional a su ruta final del almacenamiento y la devuelve"""
+    try:
+        with open(staging_path(upload), 'rb') as fh:
+            return default_storage.save(upload.path, StagedFile(fh, name=staging_path(upload)))
+    except FileNotFoundError:
+        raise UploadError(f'El archivo de "{upload.filename}" ya no está: vuelve a subirlo', status=410)
+
+
+def unstage_failed(upload, path):
+    """Devuelve a UPLOAD_STAGING_DIR un archivo ya movido: la confirmación se puede reintentar"""
+    try:
+        os.replace(default_storage.path(path), staging_path(upload))
+    except NotImplementedError:
+        # Almacenamiento sin rutas locales: se copia de vuelta
+        with default_storage.open(path, 'rb') as src, open(staging_path(upload), 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        default_storage.delete(path)
+
+
+def finalize_uploads(product, upload_ids):
+    """
+    Crea en una sola transacción las imágenes y videos de la galería de las
+    subidas completas indicadas. Si falta alguna parte no se crea nada.
+
+    Las subidas se bloquean durante la confirmación: una segunda petición a la
+    vez (doble clic) espera y después ya no las encuentra. Si algo falla, los
+    archivos ya movidos vuelven a UPLOAD_STAGING_DIR y las subidas siguen
+    completas, listas para reintentar.
+    """
+    try:
+        upload_ids = {uuid.UUID(value) for value in upload_ids}
+    except ValueError:
+        raise UploadError('Subida no encontrada', status=404)
+
+    moved = []  # (subida, ruta final) de los archivos ya movidos
+    try:
+        with transaction.atomic():
+            uploads = list(
+                product.uploads.select_for_update().filter(upload_id__in=upload_ids).order_by('pk')
+            )
+            if not uploads or len(uploads) != len(upload_ids):
+                raise UploadError('Subida no encontrada', status=404)
+            pending = [upload.filename for upload in uploads if not upload.is_complete]
+            if pending:
+                raise UploadError(f'Faltan partes de: {", ".join(pending)}', status=409)
+            for upload in uploads:
+                if not os.path.exists(staging_path(upload)):
+                    raise UploadError(f'El archivo de "{upload.filename}" ya no está: vuelve a subirlo', status=410)
+                if upload.kind == 'image':
+                    verify_image(upload)
+
+            # Los archivos pasan de UPLOAD_STAGING_DIR a su ruta final (con nombre libre)
+            created = {'image': [], 'video': []}
+            for upload in uploads:
+                path = move_staged(upload)
+                moved.append((upload, path))
+                data = upload.metadata
+                if upload.kind == 'image':
+                    obj = ProductImage.objects.create(
+                        product=product,
+                        image=path,
+                        alt_text=data.get('alt_text', ''),
+                        order=data.get('order', 1),
+                        is_main=bool(data.get('is_main')),
+                    )
+                else:
+                    obj = ProductVideo.objects.create(
+                        product=product,
+                        video=path,
+                        title=data.get('title', ''),
+                        description=data.get('description', ''),
+                        order=data.get('order', 1),
+                    )
+                created[upload.kind].append(obj)
+            UploadSession.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    except Exception:
+        for upload, path in moved:
+            unstage_failed(upload, path)
+        raise
+    for upload in uploads:
+        forget_hasher(upload)
+    return created
@@ -1,15 +1,29 @@
 # productos/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'productos'
 
+# Con ASGI las páginas públicas usan las vistas asíncronas (productos/async_views.py)
+if getattr(settings, 'ASYNC_PUBLIC_VIEWS', False):
+    from . import async_views
+    product_list = async_views.product_list_view
+    product_detail = async_views.product_detail_view
+    proveedor_list = async_views.proveedor_list_view
+    proveedor_detail = async_views.proveedor_detail_view
+else:
+    product_list = views.ProductListView.as_view()
+    product_detail = views.ProductDetailView.as_view()
+    proveedor_list = views.ProveedorListView.as_view()
+    proveedor_detail = views.ProveedorDetailView.as_view()
+
 urlpatterns = [
-    path('', views.ProductListView.as_view(), name='product_list'),
+    path('', product_list, name='product_list'),
     
     # URLs públicas de proveedores
-    path('proveedores/', views.ProveedorListView.as_view(), name='proveedor_list'),
-    path('proveedores/<slug:slug>/', views.ProveedorDetailView.as_view(), name='proveedor_detail'),
+    path('proveedores/', proveedor_list, name='proveedor_list'),
+    path('proveedores/<slug:slug>/', proveedor_detail, name='proveedor_detail'),
     
     # URLs de autenticación (secretas) - DEBEN IR ANTES que el slug genérico
     path('secret-admin-login/', views.secret_login_view, name='secret_login'),
@@ -17,6 +31,9 @@ urlpatterns = [
     
     # URLs del panel de administración (protegidas)
     path('admin/', views.admin_panel, name='admin_panel'),
+    path('admin/metrics/', views.metrics_view, name='metrics'),
+    path('admin/jobs/', views.jobs_view, name='jobs'),
+    path('admin/productos/exportar/<str:fmt>/', views.export_products, name='export_products'),
     
     # URLs para agregar entidades
     path('admin/add-proveedor/', views.add_proveedor, name='add_proveedor'),
@@ -60,6 +77,11 @@ urlpatterns = [
     path('admin/producto-video/edit/<int:pk>/', views.edit_product_video, name='edit_product_video'),
     path('admin/producto-video/delete/<int:pk>/', views.delete_product_video, name='delete_product_video'),
     
+    # URLs de subidas por partes (galería de imágenes y videos)
+    path('admin/producto-subida/start/<int:product_pk>/', views.upload_start, name='upload_start'),
+    path('admin/producto-subida/finalize/<int:product_pk>/', views.upload_finalize, name='upload_finalize'),
+    path('admin/producto-subida/chunk/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
+    
     # URL genérica para productos - DEBE IR AL FINAL
-    path('<slug:slug>/', views.ProductDetailView.as_view(), name='product_detail'),
+    path('<slug:slug>/', product_detail, name='product_detail'),
 ]
\ No newline at end of file
@@ -6,8 +6,28 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.urls import reverse
-from django.http import Http404
-from .models import Product, Category, Subcategory, Proveedor, Estatus, ProductImage, ProductVideo
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import F
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from coimpres_cuba.metrics import collect_metrics, metrics_summary, prometheus_text
+from .models import Product, Category, Subcategory, Proveedor, Estatus, Job, ProductImage, ProductVideo, UploadSession
+from .search import search_products
+from .facets import get_facet_counts
+from .pagination import KeysetPaginator, InvalidCursor, cursor_links, uses_offset_pagination
+from .page_cache import cache_public_page, add_page_dependencies
+from .detail import product_detail_queryset, product_detail_context
+from .directory import get_proveedor_directory
+from .summaries import proveedor_summaries
+from .conditional import conditional_page, catalog_etag, product_etag, product_last_modified
+from .export import FORMATS as EXPORT_FORMATS, stream_export
+from .uploads import UploadError, finalize_uploads, start_upload, store_gallery_file, upload_state, write_chunk
+from .jobs import enqueue, job_backlog, job_state, job_summary
+
+PROVEEDOR_PAGE_SIZE = 24  # Productos por página en la página del proveedor
+JOBS_PAGE_SIZE = 50  # Trabajos recientes en /productos/admin/jobs/
 
 # =================== FUNCIONES DE AUTENTICACIÓN Y SEGURIDAD ===================
 
@@ -30,136 +50,205 @@ def require_staff_login(view_func):
     return wrapper
 
 # =================== VISTAS PÚBLICAS ===================
+# Las consultas de las páginas públicas están en funciones para compartirlas
+# con las versiones asíncronas (productos/async_views.py)
+
+def product_list_queryset(params):
+    """Productos activos del listado con los filtros de la querystring (sin ejecutar consultas)"""
+    queryset = Product.objects.filter(is_active=True).select_related('proveedor', 'category', 'subcategory', 'estatus')
+    
+    # Filtrar por categoría si está presente en la URL
+    category_slug = params.get('category')
+    subcategory_slug = params.get('subcategory')
+    
+    if category_slug:
+        queryset = queryset.filter(category__slug=category_slug)
+    
+    # Filtrar por subcategoría si está presente en la URL
+    if subcategory_slug:
+        queryset = queryset.filter(subcategory__slug=subcategory_slug)
+        # Automáticamente incluir la categoría padre si no está especificada
+        if not category_slug:
+            queryset = queryset.filter(category=F('subcategory__category'))
+    
+    # Filtrar por proveedor si está presente en la URL
+    proveedor_slug = params.get('proveedor')
+    if proveedor_slug:
+        queryset = queryset.filter(proveedor__slug=proveedor_slug)
+    
+    # Filtrar por estatus si está presente en la URL
+    estatus_slug = params.get('estatus')
+    if estatus_slug:
+        queryset = queryset.filter(estatus__slug=estatus_slug)
+    
+    # Filtrar productos destacados
+    if params.get('destacado') == 'true':
+        queryset = queryset.filter(destacado=True)
+    
+    # Filtrar productos en oferta
+    if params.get('en_oferta') == 'true':
+        queryset = queryset.filter(en_oferta=True)
+    
+    # Búsqueda por término (índice de texto completo, ordenado por relevancia)
+    search_term = params.get('q')
+    if search_term:
+        queryset = search_products(queryset, search_term)
+    
+    return queryset
+
+def paginate_products(request, queryset, page_size):
+    """(paginator, página) por cursor (keyset), o por número en enlaces ?page= antiguos y búsquedas"""
+    if uses_offset_pagination(request, queryset):
+        paginator = Paginator(queryset, page_size, orphans=0, allow_empty_first_page=True)
+        try:
+            return paginator, paginator.page(request.GET.get('page') or 1)
+        except InvalidPage:
+            raise Http404("Página no encontrada")
+    
+    paginator = KeysetPaginator(queryset, page_size)
+    try:
+        page = paginator.get_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Página no encontrada")
+    return paginator, page
+
+def proveedor_detail_context(request, proveedor):
+    """
+    Contexto de la página del proveedor: pestañas de categoría y conteos desde
+    su resumen (productos/summaries.py) y productos paginados por cursor
+    """
+    summaries = proveedor_summaries(proveedor)
+    category_summaries = [summary for summary in summaries if summary.category]
+    total = sum(summary.productos_count for summary in summaries)
+    
+    productos = proveedor.productos_asociados.select_related(
+        'category', 'subcategory', 'estatus'
+    ).prefetch_related('images')
+    
+    # Filtrar por categoría si está presente en la URL
+    category_slug = request.GET.get('category')
+    productos_count = total
+    if category_slug:
+        selected = next((summary for summary in category_summaries if summary.category.slug == category_slug), None)
+        productos = productos.filter(category_id=selected.category_id) if selected else productos.none()
+        productos_count = selected.productos_count if selected else 0
+    
+    paginator = KeysetPaginator(productos, PROVEEDOR_PAGE_SIZE)
+    try:
+        page = paginator.get_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404("Página no encontrada")
+    
+    context = {
+        'productos': page,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'productos_count': productos_count,
+        'total_productos_count': total,
+        'category_summaries': category_summaries,
+    }
+    context.update(cursor_links(request, page))
+    return context
 
+def load_filter_taxonomies():
+    """Taxonomías de la barra de filtros (se evalúan una vez y se reutilizan)"""
+    return {
+        'category': list(Category.objects.all()),
+        'subcategory': list(Subcategory.objects.select_related('category').all()),
+        'proveedor': list(Proveedor.objects.order_by('name')),
+        'estatus': list(Estatus.objects.all()),
+    }
+
+def product_filters_context(params, taxonomies):
+    """Contexto de la barra de filtros: taxonomías con su facet_count y categoría seleccionada"""
+    context = {
+        'categories': taxonomies['category'],
+        'all_subcategories': taxonomies['subcategory'],
+        'proveedores': taxonomies['proveedor'],
+        'estatus_list': taxonomies['estatus'],
+    }
+    
+    # Conteos de productos por opción de filtro
+    selected = {}
+    for facet, objects in taxonomies.items():
+        slug = params.get(facet)
+        match = next((obj for obj in objects if obj.slug == slug), None) if slug else None
+        if match:
+            selected[facet] = match.pk
+    for flag in ('en_oferta', 'destacado'):
+        if params.get(flag) == 'true':
+            selected[flag] = True
+    
+    counts = get_facet_counts(params.get('q', ''), selected)
+    for facet, objects in taxonomies.items():
+        for obj in objects:
+            obj.facet_count = counts[facet].get(obj.pk, 0)
+    context['facet_counts'] = counts
+    
+    # Obtener categoría seleccionada (directamente o por subcategoría)
+    category_slug = params.get('category')
+    subcategory_slug = params.get('subcategory')
+    
+    if category_slug:
+        context['selected_category'] = next((c for c in taxonomies['category'] if c.slug == category_slug), None)
+    elif subcategory_slug:
+        # Si hay subcategoría seleccionada, obtener su categoría padre
+        selected_subcategory = next((s for s in taxonomies['subcategory'] if s.slug == subcategory_slug), None)
+        if selected_subcategory:
+            context['selected_category_from_subcategory'] = selected_subcategory.category
+    
+    return context
+
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
+@method_decorator(cache_public_page, name='dispatch')
 class ProductListView(ListView):
     model = Product
     template_name = 'productos/product_list_seo.html'
     paginate_by = 10
     
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related('proveedor', 'category', 'subcategory', 'estatus')
-        
-        # Filtrar por categoría si está presente en la URL
-        category_slug = self.request.GET.get('category')
-        subcategory_slug = self.request.GET.get('subcategory')
-        
-        if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
-        
-        # Filtrar por subcategoría si está presente en la URL
-        if subcategory_slug:
-            queryset = queryset.filter(subcategory__slug=subcategory_slug)
-            # Automáticamente incluir la categoría padre si no está especificada
-            if not category_slug:
-                selected_subcategory = Subcategory.objects.select_related('category').filter(slug=subcategory_slug).first()
-                if selected_subcategory:
-                    queryset = queryset.filter(category=selected_subcategory.category)
-        
-        # Filtrar por proveedor si está presente en la URL
-        proveedor_slug = self.request.GET.get('proveedor')
-        if proveedor_slug:
-            queryset = queryset.filter(proveedor__slug=proveedor_slug)
-        
-        # Filtrar por estatus si está presente en la URL
-        estatus_slug = self.request.GET.get('estatus')
-        if estatus_slug:
-            queryset = queryset.filter(estatus__slug=estatus_slug)
-        
-        # Filtrar productos destacados
-        destacado = self.request.GET.get('destacado')
-        if destacado == 'true':
-            queryset = queryset.filter(destacado=True)
-        
-        # Filtrar productos en oferta
-        en_oferta = self.request.GET.get('en_oferta')
-        if en_oferta == 'true':
-            queryset = queryset.filter(en_oferta=True)
-        
-        # Búsqueda por término
-        search_term = self.request.GET.get('q')
-        if search_term:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(name__icontains=search_term) | 
-                Q(description__icontains=search_term) | 
-                Q(short_description__icontains=search_term) |
-                Q(sku__icontains=search_term)
-            )
-            
-        return queryset
+        add_page_dependencies(self.request, 'catalog')
+        return product_list_queryset(self.request.GET)
+    
+    def paginate_queryset(self, queryset, page_size):
+        """Paginación por cursor (keyset) salvo enlaces ?page= antiguos y búsquedas"""
+        paginator, page = paginate_products(self.request, queryset, page_size)
+        return (paginator, page, page.object_list, page.has_other_pages())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Añadir categorías al contexto
-        context['categories'] = Category.objects.all()
-        
-        # Añadir todas las subcategorías al contexto
-        context['all_subcategories'] = Subcategory.objects.select_related('category').all()
-        
-        # Añadir estatus al contexto
-        context['estatus_list'] = Estatus.objects.all()
-        
-        # Obtener categoría seleccionada (directamente o por subcategoría)
-        category_slug = self.request.GET.get('category')
-        subcategory_slug = self.request.GET.get('subcategory')
-        
-        if category_slug:
-            context['selected_category'] = Category.objects.filter(slug=category_slug).first()
-        elif subcategory_slug:
-            # Si hay subcategoría seleccionada, obtener su categoría padre
-            selected_subcategory = Subcategory.objects.select_related('category').filter(slug=subcategory_slug).first()
-            if selected_subcategory:
-                context['selected_category_from_subcategory'] = selected_subcategory.category
+        # Enlaces de la paginación por cursor
+        context.update(cursor_links(self.request, context.get('page_obj')))
         
+        # Barra de filtros: taxonomías, conteos y categoría seleccionada
+        context.update(product_filters_context(self.request.GET, load_filter_taxonomies()))
         return context
 
+@method_decorator(conditional_page(product_etag, product_last_modified), name='dispatch')
+@method_decorator(cache_public_page, name='dispatch')
 class ProductDetailView(DetailView):
     model = Product
     template_name = 'productos/product_detail.html'
-    queryset = Product.objects.filter(is_active=True).select_related('proveedor', 'category', 'subcategory', 'estatus').prefetch_related('images', 'videos')
+    
+    def get_queryset(self):
+        # Una consulta para el producto y sus FK; galería, videos y relacionados por prefetch
+        return product_detail_queryset()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Obtener el producto actual
-        product = self.get_object()
-        
-        # Galería de imágenes
-        gallery_images = product.get_all_images()
-        context['gallery_images'] = gallery_images
-        
-        # Imagen principal: priorizar imagen principal del producto, luego imagen marcada como main
-        if product.image:
-            context['main_image'] = product.image
-        else:
-            main_image_obj = gallery_images.filter(is_main=True).first()
-            if main_image_obj:
-                context['main_image'] = main_image_obj.image
-            elif gallery_images.exists():
-                context['main_image'] = gallery_images.first().image
-            else:
-                context['main_image'] = None
-        
-        context['has_multiple_images'] = gallery_images.count() > 0 or bool(product.image)
-        
-        # Galería de videos
-        gallery_videos = product.get_all_videos()
-        context['gallery_videos'] = gallery_videos
-        context['has_multiple_videos'] = gallery_videos.count() > 0
-        
-        # Obtener productos relacionados (de la misma categoría)
-        if product.category:
-            related_products = Product.objects.filter(
-                category=product.category,
-                is_active=True
-            ).exclude(pk=product.pk)[:3]  # Limitar a 3 productos relacionados
-            context['related_products'] = related_products
-            
+        product = self.object
+        add_page_dependencies(
+            self.request, 'taxonomy', f'product:{product.pk}',
+            f'category:{product.category_id}', f'proveedor:{product.proveedor_id}',
+        )
+        context.update(product_detail_context(product))
         return context
 
 # =================== VISTAS PÚBLICAS DE PROVEEDORES ===================
 
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
+@method_decorator(cache_public_page, name='dispatch')
 class ProveedorListView(ListView):
     """Vista para mostrar todos los proveedores con sus productos"""
     model = Proveedor
@@ -167,89 +256,77 @@ class ProveedorListView(ListView):
     context_object_name = 'proveedores'
     
     def get_queryset(self):
-        # Solo mostrar proveedores que tienen productos activos
-        return Proveedor.objects.prefetch_related(
-            'product_set'
-        ).filter(
-            product__is_active=True
-        ).distinct().order_by('name')
+        add_page_dependencies(self.request, 'catalog')
+        # Solo proveedores con productos activos, con su conteo y vista previa
+        # (productos/directory.py: dos consultas y en caché)
+        self.directory = get_proveedor_directory()
+        return [item['proveedor'] for item in self.directory]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Agregar conteo de productos por proveedor
-        proveedores_con_productos = []
-        for proveedor in context['proveedores']:
-            productos_count = proveedor.productos_asociados.count()
-            proveedores_con_productos.append({
-                'proveedor': proveedor,
-                'productos_count': productos_count
-            })
-        
-        context['proveedores_con_productos'] = proveedores_con_productos
+        context['proveedores_con_productos'] = self.directory
         return context
 
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
+@method_decorator(cache_public_page, name='dispatch')
 class ProveedorDetailView(DetailView):
     """Vista detallada de un proveedor con sus productos"""
     model = Proveedor
     template_name = 'productos/proveedor_detail.html'
     context_object_name = 'proveedor'
     
-    def get_queryset(self):
-        return Proveedor.objects.prefetch_related('product_set')
-    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        proveedor = self.get_object()
-        
-        # Obtener productos activos del proveedor
-        productos = proveedor.productos_asociados.select_related(
-            'category', 'subcategory'
-        ).prefetch_related('images')
-        
-        # Filtrar por categoría si está presente en la URL
-        category_slug = self.request.GET.get('category')
-        if category_slug:
-            productos = productos.filter(category__slug=category_slug)
-        
-        context['productos'] = productos
-        context['productos_count'] = productos.count()
-        
-        # Obtener categorías de los productos de este proveedor
-        categorias = Category.objects.filter(
-            product__proveedor=proveedor,
-            product__is_active=True
-        ).distinct()
-        context['categorias'] = categorias
-        
-        # Contar productos totales (sin filtro de categoría)
-        context['total_productos_count'] = proveedor.productos_asociados.count()
-        
+        add_page_dependencies(self.request, 'taxonomy', f'proveedor:{self.object.pk}')
+        context.update(proveedor_detail_context(self.request, self.object))
         return context
 
 # =================== VISTAS DE ADMINISTRACIÓN (PROTEGIDAS) ===================
 
+def admin_products_queryset(request):
+    """Productos del panel con la búsqueda y los filtros de la petición (listado y exportación)"""
+    products = Product.objects.all().select_related('proveedor', 'category', 'subcategory', 'estatus').order_by('-created_at', '-id')
+    filters = {
+        'search': request.GET.get('search', ''),
+        'proveedor': request.GET.get('proveedor', ''),
+        'category': request.GET.get('category', ''),
+        'estatus': request.GET.get('estatus', ''),
+        'is_active': request.GET.get('is_active', ''),
+    }
+    
+    for name in ('proveedor', 'category', 'estatus'):
+        if filters[name].isdigit():
+            products = products.filter(**{f'{name}_id': filters[name]})
+    if filters['is_active'] in ('1', '0'):
+        products = products.filter(is_active=filters['is_active'] == '1')
+    
+    if filters['search']:
+        products = search_products(
+            products, filters['search'],
+            fields=['name', 'sku', 'description'],
+            ordering=['-created_at'],
+        )
+    return products, filters
+
 @require_staff_login
 def admin_panel(request):
     """Vista principal del panel de administración - Lista de Productos"""
     from django.core.paginator import Paginator
     
-    products = Product.objects.all().select_related('proveedor', 'category', 'subcategory', 'estatus').order_by('-created_at')
+    products, filters = admin_products_queryset(request)
+    search = filters['search']
     
-    # Filtros opcionales
-    search = request.GET.get('search', '')
-    if search:
-        from django.db.models import Q
-        products = products.filter(
-            Q(name__icontains=search) | 
-            Q(sku__icontains=search) |
-            Q(description__icontains=search)
-        )
-    
-    # Paginación
-    paginator = Paginator(products, 10)  # 10 productos por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación: por cursor salvo en búsquedas (orden por relevancia) o con ?page=
+    if uses_offset_pagination(request, products):
+        paginator = Paginator(products, 10)  # 10 productos por página
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+    else:
+        paginator = KeysetPaginator(products, 10, ordering=('-created_at', '-id'))
+        try:
+            page_obj = paginator.get_page(request.GET.get('cursor'))
+        except InvalidCursor:
+            page_obj = paginator.get_page()
     
     context = {
         'products': page_obj,
@@ -261,9 +338,46 @@ def admin_panel(request):
         'subcategories': Subcategory.objects.all(),
         'proveedores': Proveedor.objects.all(),
         'estatus_list': Estatus.objects.all(),
+        'filters': filters,
+        'export_query': urlencode({name: value for name, value in filters.items() if value}),
+        'job_backlog': job_backlog(),
+        **cursor_links(request, page_obj),
     }
     return render(request, 'productos/admin.html', context)
 
+@require_staff_login
+def export_products(request, fmt):
+    """Exporta en streaming los productos del panel (misma búsqueda y filtros) en CSV, JSONL o XLSX"""
+    if fmt not in EXPORT_FORMATS:
+        raise Http404("Formato no soportado")
+    products, _ = admin_products_queryset(request)
+    content_type, extension = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream_export(products, fmt), content_type=content_type)
+    filename = f"catalogo-{timezone.localtime():%Y%m%d-%H%M}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+@require_staff_login
+def metrics_view(request):
+    """Métricas de rendimiento por vista de todos los workers (JSON o ?format=prometheus)"""
+    merged = collect_metrics()
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(prometheus_text(merged), content_type='text/plain; version=0.0.4; charset=utf-8')
+    return JsonResponse({'views': metrics_summary(merged)})
+
+@require_staff_login
+def jobs_view(request):
+    """Estado de la cola de trabajos en segundo plano (JSON, ?status= para filtrar)"""
+    jobs = Job.objects.all()
+    status = request.GET.get('status')
+    if status:
+        jobs = jobs.filter(status=status)
+    return JsonResponse({
+        'summary': job_summary(),
+        'jobs': [job_state(job) for job in jobs[:JOBS_PAGE_SIZE]],
+    })
+
 @require_staff_login
 def add_proveedor(request):
     """Vista para agregar un nuevo proveedor"""
@@ -400,15 +514,18 @@ def add_product(request):
             gallery_orders = request.POST.getlist('gallery_orders[]')
             gallery_is_main = request.POST.getlist('gallery_is_main[]')
             
+            # Los archivos se guardan ya (solo existen durante la petición); crear
+            # las filas, verificar las imágenes y generar sus variantes se hace
+            # en segundo plano (productos/tasks.py)
+            images = []
             for i, image in enumerate(gallery_images):
                 if image:
-                    ProductImage.objects.create(
-                        product=product,
-                        image=image,
-                        alt_text=gallery_alt_texts[i] if i < len(gallery_alt_texts) else '',
-                        order=int(gallery_orders[i]) if i < len(gallery_orders) and gallery_orders[i] else i + 1,
-                        is_main=str(i + 1) in gallery_is_main
-                    )
+                    images.append({
+                        'path': store_gallery_file('image', image),
+                        'alt_text': gallery_alt_texts[i] if i < len(gallery_alt_texts) else '',
+                        'order': int(gallery_orders[i]) if i < len(gallery_orders) and gallery_orders[i] else i + 1,
+                        'is_main': str(i + 1) in gallery_is_main,
+                    })
             
             # Procesar galería de videos múltiples
             gallery_videos = request.FILES.getlist('gallery_videos[]')
@@ -416,17 +533,22 @@ def add_product(request):
             video_descriptions = request.POST.getlist('video_descriptions[]')
             video_orders = request.POST.getlist('video_orders[]')
             
+            videos = []
             for i, video in enumerate(gallery_videos):
                 if video:
-                    ProductVideo.objects.create(
-                        product=product,
-                        video=video,
-                        title=video_titles[i] if i < len(video_titles) else '',
-                        description=video_descriptions[i] if i < len(video_descriptions) else '',
-                        order=int(video_orders[i]) if i < len(video_orders) and video_orders[i] else i + 1
-                    )
+                    videos.append({
+                        'path': store_gallery_file('video', video),
+                        'title': video_titles[i] if i < len(video_titles) else '',
+                        'description': video_descriptions[i] if i < len(video_descriptions) else '',
+                        'order': int(video_orders[i]) if i < len(video_orders) and video_orders[i] else i + 1,
+                    })
             
-            messages.success(request, f'Producto "{product.name}" agregado exitosamente con {len(gallery_images)} imágenes y {len(gallery_videos)} videos.')
+            message = f'Producto "{product.name}" agregado exitosamente.'
+            if images or videos:
+                enqueue('attach_gallery_media', {'product_id': product.pk, 'images': images, 'videos': videos},
+                        key=f'add-gallery:{product.pk}')
+                message += f' Sus {len(images)} imágenes y {len(videos)} videos aparecerán en la galería en unos instantes.'
+            messages.success(request, message)
             
         except Exception as e:
             messages.error(request, f'Error al agregar el producto: {str(e)}')
@@ -519,6 +641,9 @@ def edit_category(request, pk):
     
     context = {
         'category': category,
+        'subcategories': list(category.subcategories.all()),
+        # Primeros productos activos; los totales salen de los contadores (productos/counters.py)
+        'productos': list(Product.objects.filter(category=category, is_active=True).select_related('subcategory', 'estatus')[:10]),
         'active_tab': 'categorias'
     }
     return render(request, 'productos/edit_category.html', context)
@@ -584,6 +709,7 @@ def edit_subcategory(request, pk):
     context = {
         'subcategory': subcategory,
         'categories': Category.objects.all(),
+        'productos': list(subcategory.productos_asociados.select_related('proveedor', 'estatus')[:10]),
         'active_tab': 'subcategorias'
     }
     return render(request, 'productos/edit_subcategory.html', context)
@@ -634,6 +760,7 @@ def edit_estatus(request, pk):
     
     context = {
         'estatus': estatus,
+        'productos': list(estatus.productos_asociados.select_related('category', 'proveedor')[:10]),
         'active_tab': 'estatus'
     }
     return render(request, 'productos/edit_estatus.html', context)
@@ -755,9 +882,13 @@ def delete_product(request, pk):
     
     if request.method == 'POST':
         try:
-            name = product.name
-            product.delete()
-            messages.success(request, f'Producto "{name}" eliminado exitosamente.')
+            # Se oculta ya del catálogo; el borrado en cascada y el de sus
+            # archivos se hacen en segundo plano (productos/tasks.py)
+            product.is_active = False
+            product.delete_requested_at = timezone.now()
+            product.save()
+            enqueue('delete_product', {'product_id': product.pk}, key=f'delete-product:{product.pk}:{product.delete_requested_at:%Y%m%d%H%M%S%f}')
+            messages.success(request, f'Producto "{product.name}" desactivado; se eliminará en segundo plano.')
         except Exception as e:
             messages.error(request, f'Error al eliminar el producto: {str(e)}')
     
@@ -858,12 +989,12 @@ def delete_product_image(request, pk):
     product_name = image.product.name
     
     try:
-        # Eliminar el archivo físico
-        if image.image:
-            image.image.delete()
-        
-        # Eliminar el registro de la base de datos
+        # Eliminar el registro; el archivo y sus variantes responsive se
+        # borran en segundo plano
+        path = image.image.name
         image.delete()
+        if path:
+            enqueue('delete_media_files', {'images': [path]})
         messages.success(request, f'Imagen eliminada exitosamente del producto "{product_name}"')
         
     except Exception as e:
@@ -906,12 +1037,11 @@ def delete_product_video(request, pk):
     product_name = video.product.name
     
     try:
-        # Eliminar el archivo físico
-        if video.video:
-            video.video.delete()
-        
-        # Eliminar el registro de la base de datos
+        # Eliminar el registro; el archivo se borra en segundo plano
+        path = video.video.name
         video.delete()
+        if path:
+            enqueue('delete_media_files', {'files': [path]})
         messages.success(request, f'Video eliminado exitosamente del producto "{product_name}"')
         
     except Exception as e:
@@ -982,3 +1112,85 @@ def edit_product_video(request, pk):
             messages.error(request, f'Error al actualizar el video: {str(e)}')
     
     return redirect('productos:edit_product', pk=product_pk)
+
+
+# =================== SUBIDAS POR PARTES (GALERÍA) ===================
+# Protocolo JSON usado por edit_product.html (ver productos/uploads.py)
+
+def upload_error_response(error):
+    return JsonResponse({'error': str(error)}, status=error.status)
+
+def int_or_default(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+@require_staff_login
+def upload_start(request, product_pk):
+    """Crea una subida por partes: nombre, tamaño, checksum y datos de la galería"""
+    product = get_object_or_404(Product, pk=product_pk)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    
+    kind = request.POST.get('kind', '')
+    order = int_or_default(request.POST.get('order'), 1)
+    if kind == 'image':
+        metadata = {
+            'alt_text': request.POST.get('alt_text', ''),
+            'order': order,
+            'is_main': request.POST.get('is_main') == 'true',
+        }
+    else:
+        metadata = {
+            'title': request.POST.get('title', ''),
+            'description': request.POST.get('description', ''),
+            'order': order,
+        }
+    try:
+        upload = start_upload(
+            product, kind, request.POST.get('filename', ''),
+            int_or_default(request.POST.get('size'), 0),
+            checksum=request.POST.get('checksum', ''), metadata=metadata,
+        )
+    except UploadError as error:
+        return upload_error_response(error)
+    return JsonResponse(upload_state(upload), status=201)
+
+@require_staff_login
+def upload_chunk(request, upload_id):
+    """GET: estado de la subida (para reanudar). POST: una parte, con su offset en X-Upload-Offset"""
+    upload = get_object_or_404(UploadSession, upload_id=upload_id)
+    if request.method == 'POST':
+        try:
+            write_chunk(
+                upload,
+                int_or_default(request.headers.get('X-Upload-Offset'), -1),
+                request,
+                int_or_default(request.headers.get('Content-Length'), 0),
+            )
+        except UploadError as error:
+            upload.refresh_from_db()
+            return JsonResponse({'error': str(error), **upload_state(upload)}, status=error.status)
+    return JsonResponse(upload_state(upload))
+
+@require_staff_login
+def upload_finalize(request, product_pk):
+    """Crea en una transacción las imágenes y videos de las subidas completas (upload_ids[])"""
+    product = get_object_or_404(Product, pk=product_pk)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    try:
+        created = finalize_uploads(product, request.POST.getlist('upload_ids[]'))
+    except UploadError as error:
+        return upload_error_response(error)
+    
+    messages.success(
+        request,
+        f'{len(created["image"])} imágenes y {len(created["video"])} videos agregados al producto "{product.name}"'
+    )
+    return JsonResponse({
+        'images': len(created['image']),
+        'videos': len(created['video']),
+        'redirect': reverse('productos:edit_product', args=[product.pk]),
+    })